@@ -5,6 +5,33 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Serving the API with async workers
+----------------------------------
+    gunicorn backend.asgi:application -k uvicorn_worker.UvicornWorker \
+        --workers 2 --timeout 30 --keep-alive 5
+
+(or, for a single process, ``uvicorn backend.asgi:application``)
+
+A sync gunicorn worker holds one request at a time, so a slow search ties
+it up until it finishes. Under uvicorn the hot GET endpoints
+(recipes/async_views.py: search, recipe detail, recent, favourites) are
+coroutines: while one waits on Postgres, the worker's event loop serves
+others, so each process carries many requests in flight instead of one.
+Django 4.2 runs each async ORM query on a per-request thread, so the
+ceiling per process is the database, not the worker count – size the
+Postgres connection limit (or pgbouncer pool) for workers × requests in
+flight. Everything else is still a sync DRF view, run in a thread as
+before.
+
+The async routes are mounted only when settings.ASYNC_VIEWS is on, which
+this module does (ASYNC_VIEWS=1): under WSGI each coroutine would run
+through async_to_sync, so there the DRF views serve them.
+
+Persistent connections belong to those per-request threads and would be
+left open after each request, so this module turns them off
+(DB_CONN_MAX_AGE=0); put pgbouncer in front of Postgres if connection setup
+shows up in latency. The WSGI entry point keeps conn_max_age=600.
 """
 
 import os
@@ -12,5 +39,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+os.environ.setdefault('DB_CONN_MAX_AGE', '0')
+os.environ.setdefault('ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
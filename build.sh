@@ -4,6 +4,7 @@ pip install -r requirements.txt
 
 python manage.py collectstatic --no-input
 python manage.py migrate 
-python manage.py load_recipes --path ./backend/recipes_sample500.csv  
+python manage.py load_recipes --path ./backend/recipes_sample500.csv --bulk
 python manage.py seed_predefined_catalogs
-python manage.py populate_search_vector
\ No newline at end of file
+python manage.py build_similar_recipes
+python manage.py build_recipe_cooccurrence
\ No newline at end of file
@@ -0,0 +1,173 @@
+# recipes/access_log.py
+"""
+Write-behind buffer for RecipeAccess.
+
+The recipe detail views (sync and async) only record (user, recipe, time)
+in memory; a daemon thread flushes the pending events every FLUSH_INTERVAL seconds with one
+multi-row INSERT … ON CONFLICT (user_id, recipe_id) DO UPDATE, and trims
+each touched user's history to KEEP_PER_USER rows every TRIM_INTERVAL
+seconds. Repeat views of the same recipe coalesce in the buffer; once
+MAX_PENDING distinct pairs are waiting, new ones are dropped (and counted)
+rather than blocking the request. A batch whose flush fails goes back into
+the buffer, within the same bound, for the next attempt. RecentList merges
+the unflushed events with the table so users still see their latest views
+immediately.
+
+With BACKGROUND off no thread is started and flush() / trim() are left to
+the caller – tests do this, since the thread's own connection would write
+outside the test's transaction.
+"""
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "MAX_PENDING": 10000,
+    "FLUSH_INTERVAL": 1.0,
+    "KEEP_PER_USER": 10,
+    "TRIM_INTERVAL": 60.0,
+    "BACKGROUND": True,             # flush from a daemon thread
+}
+
+# rows whose recipe or user was deleted meanwhile are skipped, not fatal
+UPSERT_SQL = """
+INSERT INTO recipes_recipeaccess (user_id, recipe_id, accessed_at)
+SELECT v.user_id, v.recipe_id, v.accessed_at
+FROM (VALUES {values}) AS v (user_id, recipe_id, accessed_at)
+WHERE EXISTS (SELECT 1 FROM recipes_recipe r WHERE r.id = v.recipe_id)
+  AND EXISTS (SELECT 1 FROM auth_user u WHERE u.id = v.user_id)
+ON CONFLICT (user_id, recipe_id) DO UPDATE SET accessed_at = EXCLUDED.accessed_at
+"""
+
+# recent views feed the recommendations; their feeds are rebuilt lazily (feed.py)
+STALE_FEED_SQL = """
+UPDATE recipes_userfeed SET generation = generation + 1 WHERE user_id = ANY(%s)
+"""
+
+TRIM_SQL = """
+DELETE FROM recipes_recipeaccess a
+USING (
+    SELECT id, row_number() OVER (PARTITION BY user_id ORDER BY accessed_at DESC) AS rn
+    FROM recipes_recipeaccess
+    WHERE user_id = ANY(%s)
+) ranked
+WHERE a.id = ranked.id AND ranked.rn > %s
+"""
+
+
+class AccessBuffer:
+    def __init__(self):
+        conf = {**DEFAULTS, **getattr(settings, "RECIPE_ACCESS_BUFFER", {})}
+        self.max_pending = conf["MAX_PENDING"]
+        self.flush_interval = conf["FLUSH_INTERVAL"]
+        self.keep = conf["KEEP_PER_USER"]
+        self.trim_interval = conf["TRIM_INTERVAL"]
+        self.background = conf["BACKGROUND"]
+
+        self._pending = {}              # (user_id, recipe pk) → accessed_at
+        self._to_trim = set()           # user ids flushed since the last trim
+        self._lock = threading.Lock()
+        self._thread = None
+        self._last_trim = time.monotonic()
+        self.dropped = 0
+
+    # ---- request side ----
+    def record(self, user_id, recipe_pk):
+        key = (user_id, recipe_pk)
+        with self._lock:
+            if key not in self._pending and len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                return
+            self._pending[key] = timezone.now()
+        self._ensure_thread()
+
+    def recent(self, user_id):
+        """Unflushed (recipe pk, accessed_at) pairs for one user."""
+        with self._lock:
+            return [
+                (rid, ts) for (uid, rid), ts in self._pending.items() if uid == user_id
+            ]
+
+    # ---- flusher ----
+    def _ensure_thread(self):
+        if not self.background:
+            return
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(
+                        target=self._run, name="recipe-access-flush", daemon=True
+                    )
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            close_old_connections()
+            try:
+                self.flush()
+                if time.monotonic() - self._last_trim >= self.trim_interval:
+                    self.trim()
+            except Exception:
+                logger.exception("RecipeAccess flush failed")
+
+    def flush(self):
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if not batch:
+            return 0
+        rows = [(uid, rid, ts) for (uid, rid), ts in batch.items()]
+        values = ", ".join(["(%s, %s, %s)"] * len(rows))
+        params = [v for row in rows for v in row]
+        users = list({uid for uid, _, _ in rows})
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(UPSERT_SQL.format(values=values), params)
+                cursor.execute(STALE_FEED_SQL, [users])
+        except Exception:
+            self._requeue(batch)
+            raise
+        with self._lock:
+            self._to_trim.update(users)
+        return len(rows)
+
+    def _requeue(self, batch):
+        """Put a failed batch back for the next flush, within MAX_PENDING."""
+        lost = 0
+        with self._lock:
+            for key, accessed_at in batch.items():
+                if key in self._pending:        # viewed again since: keep the newer time
+                    continue
+                if len(self._pending) >= self.max_pending:
+                    lost += 1
+                    continue
+                self._pending[key] = accessed_at
+            self.dropped += lost
+        if lost:
+            logger.warning("RecipeAccess flush failed; %d views over MAX_PENDING dropped", lost)
+
+    def trim(self):
+        with self._lock:
+            users, self._to_trim = list(self._to_trim), set()
+        self._last_trim = time.monotonic()
+        if users:
+            with connection.cursor() as cursor:
+                cursor.execute(TRIM_SQL, [users, self.keep])
+
+
+access_buffer = AccessBuffer()
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        access_buffer.flush()
+    except Exception:
+        logger.exception("RecipeAccess flush at exit failed")
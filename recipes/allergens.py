@@ -0,0 +1,62 @@
+# recipes/allergens.py
+"""
+Allergen filtering via Recipe.allergen_mask (kept current by the triggers in
+migration 0007). Excluding a user's allergens is one integer predicate,
+`allergen_mask & user_mask = 0`, instead of an anti-join through
+RecipeIngredient → Ingredient.
+"""
+from django.db import connection
+from django.db.models import F
+
+from .models import UserAllergy
+
+REFRESH_SQL = "UPDATE recipes_recipe SET allergen_mask = recipes_allergen_mask(id)"
+
+
+def _user_bits(user):
+    return (
+        UserAllergy.objects.filter(user=user)
+        .exclude(allergen__bit=None)
+        .values_list("allergen__bit", flat=True)
+    )
+
+
+def user_allergen_mask(request):
+    """The caller's allergen bits, looked up once and cached on the request."""
+    if not hasattr(request, "_allergen_mask"):
+        mask = 0
+        if request.user and request.user.is_authenticated:
+            for bit in _user_bits(request.user):
+                mask |= 1 << bit
+        request._allergen_mask = mask
+    return request._allergen_mask
+
+
+async def auser_allergen_mask(request):
+    """
+    user_allergen_mask for async views. Awaiting it first lets the sync
+    helpers (exclude_allergens, …) run on the event loop: they only read
+    the cached mask.
+    """
+    if not hasattr(request, "_allergen_mask"):
+        mask = 0
+        if request.user and request.user.is_authenticated:
+            async for bit in _user_bits(request.user):
+                mask |= 1 << bit
+        request._allergen_mask = mask
+    return request._allergen_mask
+
+
+def exclude_allergens(qs, request):
+    """Drop recipes containing any of the caller's allergens."""
+    mask = user_allergen_mask(request)
+    if not mask:
+        return qs
+    return qs.alias(blocked=F("allergen_mask").bitand(mask)).filter(blocked=0)
+
+
+def refresh_all_masks():
+    """Recompute every recipe's mask in one statement; returns rows updated."""
+    with connection.cursor() as cursor:
+        cursor.execute(REFRESH_SQL)
+        return cursor.rowcount
@@ -0,0 +1,190 @@
+# recipes/async_views.py
+"""
+Native async versions of the hottest GET endpoints, for ASGI workers
+(deployment notes in backend/asgi.py; mounted only with
+settings.ASYNC_VIEWS, which asgi.py turns on):
+
+  GET /api/search/                 SearchView
+  GET /api/recipes/<recipe_id>/    RecipeViewSet.retrieve
+  GET /api/recent/                 RecentList
+  GET /api/favorites/              FavoriteViewSet.list
+
+DRF views are sync, so these are plain Django coroutines that reuse the
+DRF views' querysets, serializers and paginators and await the async ORM
+(and the shared cache) wherever a query runs. While one request waits on
+Postgres the worker's event loop serves others. Responses are the same
+bytes, headers that matter (ETag, Cache-Control, Vary) and error bodies
+as the DRF views. Other methods, and browsable-API requests, are handed to
+the DRF view unchanged.
+
+Side effects stay off the response path: views are recorded in the
+in-memory access buffer (access_log.py), which a background thread
+flushes.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from rest_framework.exceptions import APIException, AuthenticationFailed, NotAuthenticated, NotFound
+from rest_framework.request import Request
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from . import conditional, replicas
+from .access_log import access_buffer
+from .allergens import auser_allergen_mask
+from .renderers import ORJSONRenderer
+from .search_cache import search_cache
+from .serializers import slim_data, slim_rows
+from .views import FavoriteViewSet, RecentList, RecipeViewSet, SearchView
+
+_jwt = JWTAuthentication()
+_renderer = ORJSONRenderer()
+
+
+def json_response(data, status=200):
+    response = HttpResponse(
+        _renderer.render(data), content_type="application/json", status=status
+    )
+    patch_vary_headers(response, ["Accept"])
+    return response
+
+
+def error_response(exc):
+    """The body and status DRF's exception handler would send."""
+    detail = exc.detail if isinstance(exc.detail, (list, dict)) else {"detail": exc.detail}
+    response = json_response(detail, status=exc.status_code)
+    if isinstance(exc, (AuthenticationFailed, NotAuthenticated)):
+        response["WWW-Authenticate"] = _jwt.authenticate_header(None)
+    return response
+
+
+async def authenticate(request):
+    """JWTAuthentication.authenticate: the token checks are pure, the user lookup awaits."""
+    header = _jwt.get_header(request)
+    if header is None:
+        return None
+    raw_token = _jwt.get_raw_token(header)
+    if raw_token is None:
+        return None
+    return await sync_to_async(_jwt.get_user)(_jwt.get_validated_token(raw_token))
+
+
+def async_get(sync_view, authenticated=False, replica=False):
+    """
+    Serve GET / HEAD with the decorated coroutine, called with a DRF
+    Request (query_params, user) for the shared view code; everything else
+    goes to `sync_view`, the endpoint's DRF view. `replica` reads from a
+    replica as ReplicaReadsMixin does.
+    """
+    def decorator(handler):
+        async def view(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD") or "text/html" in request.headers.get("Accept", ""):
+                return await sync_to_async(sync_view)(request, *args, **kwargs)
+            request = Request(request)
+            try:
+                request.user = await authenticate(request) or AnonymousUser()
+                if authenticated and not request.user.is_authenticated:
+                    raise NotAuthenticated()
+                token = await replicas.aread_from_replica(request.user) if replica else None
+                try:
+                    response = await handler(request, *args, **kwargs)
+                finally:
+                    replicas.reset(token)
+            except APIException as exc:
+                response = error_response(exc)
+            if request.method == "HEAD" and response.content:
+                # GET's headers, no body (ASGI servers send what they're given)
+                response["Content-Length"] = len(response.content)
+                response.content = b""
+            return response
+
+        view.csrf_exempt = True     # as DRF views are; Django 4.2 can't wrap coroutines
+        return wraps(handler)(view)
+    return decorator
+
+
+def drf_view(cls, request, action=None, **kwargs):
+    """A DRF view instance set up as dispatch() would, for its helpers."""
+    return cls(request=request, args=(), kwargs=kwargs, action=action, format_kwarg=None)
+
+
+# ---- GET /api/search/ ----
+@async_get(SearchView.as_view(), replica=True)
+async def search(request):
+    view = SearchView()
+    try:
+        query, exclude_id, cursor, limit, page = view.parse(request.query_params)
+    except ValueError:
+        return json_response({"detail": "page and limit must be integers"}, status=400)
+
+    if not query:
+        return json_response({"results": [], "next": None, "next_cursor": None})
+
+    key = await search_cache.akey(
+        query, exclude_id, cursor or page, limit, await auser_allergen_mask(request)
+    )
+    cached = await search_cache.aget(key)
+    if cached is not None:
+        rows = [row async for row in view.cached_rows(cached)]
+        return json_response(view.cached_body(cached, rows))
+
+    rows = view.window(view.search_rows(query, exclude_id, request), cursor, page, limit)
+    entry, rows = view.page([row async for row in rows], cursor, page, limit)
+    await search_cache.aset(key, entry)
+    return json_response(view.body(entry, rows))
+
+
+# ---- GET /api/recipes/<recipe_id>/ ----
+@async_get(RecipeViewSet.as_view({"get": "retrieve"}), replica=True)
+async def recipe_detail(request, recipe_id):
+    view = drf_view(RecipeViewSet, request, "retrieve", recipe_id=recipe_id)
+    row = await RecipeViewSet.detail_row(recipe_id).afirst()
+    if row is None:
+        raise NotFound()
+    pk, updated_at = row
+
+    # RecipeViewSet.detail_validators / user_validators
+    user_parts = []
+    if request.user.is_authenticated:
+        favorites, totals = RecipeViewSet.favorite_totals(request.user)
+        user_parts = RecipeViewSet.user_parts(
+            request.user, await auser_allergen_mask(request), await favorites.aaggregate(**totals)
+        )
+    etag, response = conditional.check(request, [updated_at], updated_at, user_parts)
+    if response is None:
+        queryset = view.filter_queryset(view.get_queryset())    # as get_object()
+        recipe = await queryset.filter(pk=pk).afirst()
+        if recipe is None:
+            raise NotFound()
+        response = json_response(view.get_serializer(recipe).data)
+    conditional.finish(response, etag, updated_at, user_parts, view.detail_max_age)
+
+    if RecipeViewSet.counts_as_view(request, response):
+        access_buffer.record(request.user.id, pk)
+    return response
+
+
+# ---- GET /api/recent/ ----
+@async_get(RecentList.as_view(), authenticated=True)
+async def recent(request):
+    view = drf_view(RecentList, request)
+    user_id = request.user.id
+    stored = [row async for row in RecentList.stored(user_id)]
+    rows = [row async for row in slim_rows(RecentList.recipes(RecentList.merge(user_id, stored)))]
+
+    page = view.paginate_queryset(rows)     # a list: no COUNT query
+    if page is not None:
+        return json_response(view.get_paginated_response(slim_data(page)).data)
+    return json_response(slim_data(rows))
+
+
+# ---- GET /api/favorites/ ----
+@async_get(FavoriteViewSet.as_view({"get": "list", "post": "create"}), authenticated=True)
+async def favorites(request):
+    view = drf_view(FavoriteViewSet, request, "list")
+    await auser_allergen_mask(request)      # get_queryset filters on it
+    rows = slim_rows(view.filter_queryset(view.get_queryset()), *view.slim_keys)
+    page = await view.paginator.apaginate_queryset(rows, request, view=view)
+    return json_response(view.paginator.get_paginated_response(slim_data(page)).data)
@@ -0,0 +1,90 @@
+# recipes/batch.py
+"""
+Batch add / remove of recipes for a basket – a user's favourites or one of
+their catalogs – in a fixed number of queries however many ids are sent:
+
+  add:    resolve recipe_ids (one IN query), read the basket, one
+          INSERT … ON CONFLICT DO NOTHING RETURNING inside a transaction
+  remove: resolve recipe_ids, one DELETE … RETURNING
+
+Conflicts with a concurrent insert of the same pair are ignored rather than
+raising IntegrityError, and only the rows actually inserted count for the
+feed. Rows are written in recipe order, so overlapping batches can't
+deadlock. Results are per requested id, in request order: added /
+already_present / removed / not_present / not_found.
+"""
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .feed import basket_added
+from .models import Recipe
+
+BATCH_MAX = 100
+
+INSERT_SQL = """
+INSERT INTO {table} ({owner}, recipe_id, {stamp})
+SELECT %s, pk, %s FROM unnest(%s::bigint[]) AS pk ORDER BY pk
+ON CONFLICT DO NOTHING RETURNING recipe_id
+"""
+
+DELETE_SQL = """
+DELETE FROM {table} WHERE {owner} = %s AND recipe_id = ANY(%s) RETURNING recipe_id
+"""
+
+
+def _resolve(recipe_ids):
+    """Unique ids in request order, and recipe_id → pk for those that exist."""
+    ordered = list(dict.fromkeys(recipe_ids))
+    return ordered, dict(Recipe.objects.filter(recipe_id__in=ordered).values_list("recipe_id", "id"))
+
+
+def add_recipes(model, owner, recipe_ids):
+    """
+    Add recipes to the basket `model.objects.filter(**owner)`,
+    e.g. add_recipes(Favorite, {"user_id": 3}, [462697, 5120]).
+    """
+    ordered, pks = _resolve(recipe_ids)
+    (column, value), = owner.items()
+    # the auto_now_add column: favorited_at / added_at
+    stamp = next(f.column for f in model._meta.concrete_fields if getattr(f, "auto_now_add", False))
+    with transaction.atomic(), connection.cursor() as cursor:
+        basket = set(model.objects.filter(**owner).values_list("recipe_id", flat=True))
+        new = [pk for pk in pks.values() if pk not in basket]
+        cursor.execute(
+            INSERT_SQL.format(table=model._meta.db_table, owner=column, stamp=stamp),
+            [value, timezone.now(), new],
+        )
+        inserted = {row[0] for row in cursor.fetchall()}
+        # no post_save here: update the feed's counts for the rows this call wrote
+        if inserted:
+            basket_added(inserted, basket)
+
+    return [
+        {"recipe_id": rid, "status": (
+            "not_found" if rid not in pks
+            else "added" if pks[rid] in inserted
+            else "already_present"      # before the call, or a concurrent insert won
+        )}
+        for rid in ordered
+    ]
+
+
+def remove_recipes(model, owner, recipe_ids):
+    """Remove recipes from the basket `model.objects.filter(**owner)`."""
+    ordered, pks = _resolve(recipe_ids)
+    (column, value), = owner.items()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            DELETE_SQL.format(table=model._meta.db_table, owner=column),
+            [value, list(pks.values())],
+        )
+        removed = {row[0] for row in cursor.fetchall()}
+
+    return [
+        {"recipe_id": rid, "status": (
+            "not_found" if rid not in pks
+            else "removed" if pks[rid] in removed
+            else "not_present"
+        )}
+        for rid in ordered
+    ]
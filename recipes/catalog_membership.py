@@ -0,0 +1,118 @@
+# recipes/catalog_membership.py
+"""
+Materialized membership for predefined (browse) catalogs.
+
+Each PredefinedCatalog's filter_criteria are RecipeFilter params
+(e.g. {"total_mins_lt": 15}). Instead of running that filter on every browse
+tap, the matching recipes are stored in PredefinedCatalogRecipe with a sort
+key, and PredefinedCatalog.member_count caches their number.
+
+Refreshes are set-based: one DELETE plus one INSERT … SELECT per catalog,
+either for the whole catalog (criteria changed, management command) or for
+just the recipes that changed (signals.py, load_recipes). A recipe save
+that names its update_fields only refreshes the catalogs reading them.
+
+Criteria that filter on nothing ({} – the seeded Meal Type catalogs – or
+only unknown params) would list the entire corpus; such catalogs are left
+empty until they are given criteria.
+"""
+from django.db import connection, transaction
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Coalesce, Now
+
+from .filters import RecipeFilter
+from .models import PredefinedCatalog, Recipe
+
+# quickest first; recipes without a time sort last
+SORT_KEY = Coalesce("total_mins", Value(float("inf")), output_field=FloatField())
+SORT_FIELDS = {"total_mins"}
+
+INSERT_SQL = """
+INSERT INTO recipes_predefinedcatalogrecipe (catalog_id, recipe_id, sort_key)
+SELECT %s, sub.id, sub.sort_key FROM ({select}) AS sub
+"""
+
+
+def matching_recipes(catalog, recipe_ids=None):
+    qs = Recipe.objects.all()
+    if recipe_ids is not None:
+        qs = qs.filter(pk__in=recipe_ids)
+    return RecipeFilter(catalog.filter_criteria, queryset=qs).qs
+
+
+def criteria_fields(catalog):
+    """The Recipe fields `catalog`'s criteria filter on (empty: no real filter)."""
+    fields = set()
+    for name in catalog.filter_criteria or {}:
+        param = RecipeFilter.base_filters.get(name)
+        if param is not None:
+            fields.add(param.field_name.split("__")[0])
+    return fields
+
+
+def refresh_catalog(catalog, recipe_ids=None):
+    """
+    Rewrite the membership of one catalog – all of it, or only the rows for
+    `recipe_ids` – and keep member_count in step.
+    """
+    if not criteria_fields(catalog):
+        if recipe_ids is None:
+            with transaction.atomic():
+                catalog.memberships.all().delete()
+                PredefinedCatalog.objects.filter(pk=catalog.pk).update(
+                    member_count=0, updated_at=Now()
+                )
+        return
+
+    select, params = (
+        matching_recipes(catalog, recipe_ids)
+        .annotate(sort_key=SORT_KEY)
+        .values_list("id", "sort_key")
+        .query.sql_with_params()
+    )
+    with transaction.atomic(), connection.cursor() as cursor:
+        if recipe_ids is None:
+            cursor.execute(
+                "DELETE FROM recipes_predefinedcatalogrecipe WHERE catalog_id = %s",
+                [catalog.pk],
+            )
+        else:
+            cursor.execute(
+                "DELETE FROM recipes_predefinedcatalogrecipe "
+                "WHERE catalog_id = %s AND recipe_id = ANY(%s)",
+                [catalog.pk, list(recipe_ids)],
+            )
+        removed = cursor.rowcount
+        cursor.execute(INSERT_SQL.format(select=select), [catalog.pk, *params])
+        added = cursor.rowcount
+
+        if recipe_ids is None:
+            count = added
+        else:
+            count = F("member_count") + added - removed
+        PredefinedCatalog.objects.filter(pk=catalog.pk).update(
+            member_count=count, updated_at=Now()
+        )
+
+
+def refresh_memberships(recipe_ids=None, fields=None):
+    """
+    Refresh every predefined catalog, optionally only for some recipes, and
+    only the catalogs reading one of `fields` (changed Recipe field names).
+    """
+    if recipe_ids is not None and not recipe_ids:
+        return
+    for catalog in PredefinedCatalog.objects.only("id", "filter_criteria"):
+        read = criteria_fields(catalog)
+        if recipe_ids is not None and not read:
+            continue                    # never materialized (see above)
+        if fields is not None and not (read | SORT_FIELDS) & set(fields):
+            continue
+        refresh_catalog(catalog, recipe_ids)
+
+
+def forget_recipe(recipe_pk):
+    """Decrement member_count for a recipe about to be deleted (rows cascade)."""
+    PredefinedCatalog.objects.filter(memberships__recipe_id=recipe_pk).update(
+        member_count=F("member_count") - 1, updated_at=Now()
+    )
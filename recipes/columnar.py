@@ -0,0 +1,234 @@
+# recipes/columnar.py
+"""
+Read-only columnar snapshot of the numeric Recipe attributes.
+
+Each worker keeps the recipe pks plus one NumPy array per numeric column
+(float64 like the float8 columns, so a filter bound matches exactly the
+rows SQL would; NaN for NULL), category_id and allergen_mask. Any combination of
+RecipeFilter range filters becomes a vectorized boolean mask, and sorting is
+a partition + lexsort over the surviving rows, so /api/recipes/ browse
+queries on unindexed nutrition columns never scan Postgres – only the final
+page of ids is hydrated from the DB.
+
+The same masks drive /api/recipes/facets/: category, cook-time, calorie
+and keyword counts for a filter come from one pass of bincounts over the
+snapshot (keywords are held CSR-style: one flat id array plus offsets).
+
+Rebuilt in the background when the corpus version moves
+(indexes.py). NULLs never match a range and sort where Postgres puts
+them: last ascending, first descending.
+"""
+import numpy as np
+
+from django.conf import settings
+
+from .conditional import corpus_version
+from .filters import NUMERIC_FIELDS, RecipeFilter
+from .indexes import VersionedIndex
+from .models import Recipe, RecipeCategory
+
+# "< 15/30/60 Mins" groups, as seeded by seed_predefined_catalogs
+COOK_TIME_BUCKETS = (15, 30, 60)
+# calorie bands: [lo, hi)
+CALORIE_BANDS = ((0, 200), (200, 400), (400, 600), (600, None))
+TOP_KEYWORDS = 20
+# orderings RecipePagination serves from an index without a filter
+SQL_ORDERINGS = ("total_mins", "-total_mins")
+
+OPS = {
+    "lt": np.less,
+    "lte": np.less_equal,
+    "gt": np.greater,
+    "gte": np.greater_equal,
+    "exact": np.equal,
+}
+
+
+class ColumnarSnapshot:
+    def __init__(self, ids, columns, category, allergen, category_names,
+                 keyword_ids, keyword_offsets, keywords, corpus_version=None):
+        self.ids = ids                      # int64 recipe pks
+        self.columns = columns              # field → float64 array
+        self.category = category            # int64, -1 for NULL
+        self.allergen = allergen            # int64 allergen_mask
+        self.category_names = category_names    # pk → name
+        self.category_ids = {n.lower(): pk for pk, n in category_names.items()}
+        self.keyword_ids = keyword_ids      # int32, all recipes' keywords
+        self.keyword_offsets = keyword_offsets  # recipe i → [off[i], off[i+1])
+        self.keywords = keywords            # keyword id → text
+        self.base_facets = None             # unfiltered facets, computed once
+        self.corpus_version = corpus_version    # DB corpus version it reflects
+
+    def __len__(self):
+        return len(self.ids)
+
+    def mask(self, conditions, category_name=None, allergen_mask=0):
+        """conditions: [(field, lookup, value)] from RecipeFilter."""
+        keep = np.ones(len(self.ids), dtype=bool)
+        for field, lookup, value in conditions:
+            keep &= OPS[lookup](self.columns[field], value)
+        if category_name is not None:
+            keep &= self.category == self.category_ids.get(category_name.lower(), -2)
+        if allergen_mask:
+            keep &= (self.allergen & allergen_mask) == 0
+        return keep
+
+    def page(self, keep, order="id", desc=False, after=None, limit=20):
+        """
+        Ordered pks of the first `limit` rows of `keep` that sort after the
+        keyset `after` ([value, pk]; value None for NULL). The order is SQL's
+        ORDER BY <order>, id – or <order> DESC, id DESC – with NULLs last
+        ascending and first descending. Returns (pks, next keyset or None).
+        """
+        rows = np.flatnonzero(keep)
+        ids = self.ids[rows]
+        keys = ids.astype(np.float64) if order == "id" else self.columns[order][rows]
+        # descending is ascending on the negated key and pk
+        sign = -1 if desc else 1
+        keys, ties = keys * sign, ids * sign
+
+        if after is not None:
+            value, last_id = after
+            last_tie = last_id * sign
+            nulls = np.isnan(keys)
+            if value is None:
+                beyond = nulls & (ties > last_tie)
+                if desc:
+                    beyond |= ~nulls
+            else:
+                value *= sign
+                beyond = (keys > value) | ((keys == value) & (ties > last_tie))
+                if not desc:
+                    beyond |= nulls
+            rows, ties, keys = rows[beyond], ties[beyond], keys[beyond]
+
+        nulls = np.isnan(keys)
+        filled = np.where(nulls, -np.inf if desc else np.inf, keys)
+        # keep only the rows that can make the page before the full sort
+        if len(rows) > limit + 1:
+            kth = np.partition(filled, limit)[limit]
+            near = filled <= kth
+            rows, ties, nulls, filled = rows[near], ties[near], nulls[near], filled[near]
+
+        null_rank = ~nulls if desc else nulls
+        order_idx = np.lexsort((ties, filled, null_rank))[:limit + 1]
+        page_ids = ties[order_idx] * sign
+        page_nulls = nulls[order_idx]
+        page_keys = filled[order_idx]
+        next_key = None
+        if len(page_ids) > limit:
+            next_key = [
+                None if page_nulls[limit - 1] else float(page_keys[limit - 1]) * sign,
+                int(page_ids[limit - 1]),
+            ]
+        return [int(pk) for pk in page_ids[:limit]], next_key
+
+    def facets(self, keep):
+        """Every facet's counts for the rows in `keep`, in one pass each."""
+        mins = self.columns["total_mins"][keep]
+        calories = self.columns["calories"][keep]
+
+        cat_counts = np.bincount(self.category[keep] + 1)   # slot 0 = NULL
+        categories = [
+            {"id": pk, "name": self.category_names[pk], "count": int(cat_counts[pk + 1])}
+            for pk in self.category_names
+            if pk + 1 < len(cat_counts) and cat_counts[pk + 1]
+        ]
+        categories.sort(key=lambda c: -c["count"])
+
+        cook_time = [
+            {"label": f"< {limit} Mins", "total_mins_lt": limit,
+             "count": int(np.count_nonzero(mins < limit))}
+            for limit in COOK_TIME_BUCKETS
+        ]
+        calorie_bands = [
+            {"calories_min": lo, "calories_max": hi,
+             "count": int(np.count_nonzero(
+                 (calories >= lo) & (calories < hi if hi is not None else True)))}
+            for lo, hi in CALORIE_BANDS
+        ]
+
+        lengths = np.diff(self.keyword_offsets)
+        kw_counts = np.bincount(
+            self.keyword_ids[np.repeat(keep, lengths)], minlength=len(self.keywords)
+        )
+        top = np.argsort(-kw_counts, kind="stable")[:TOP_KEYWORDS]
+        keywords = [
+            {"keyword": self.keywords[i], "count": int(kw_counts[i])}
+            for i in top if kw_counts[i]
+        ]
+        return {
+            "count": int(np.count_nonzero(keep)),
+            "categories": categories,
+            "cook_time": cook_time,
+            "calories": calorie_bands,
+            "keywords": keywords,
+        }
+
+
+def conditions_from(filterset):
+    """
+    Translate a validated RecipeFilter into engine conditions.
+    Returns (conditions, category name) or None if some filter can't be served.
+    """
+    conditions, category = [], None
+    for name, value in filterset.form.cleaned_data.items():
+        if value in (None, ""):
+            continue
+        flt = filterset.filters[name]
+        if flt.field_name in NUMERIC_FIELDS and flt.lookup_expr in OPS:
+            conditions.append((flt.field_name, flt.lookup_expr, float(value)))
+        elif name == "recipe_category":
+            category = value
+        else:
+            return None
+    return conditions, category
+
+
+def handles(params):
+    """Whether a /api/recipes/ list request should go through the engine."""
+    if not getattr(settings, "COLUMNAR_ENGINE", True):
+        return False
+    ordering = params.get("ordering", "")
+    # unfiltered, (total_mins, id) is an index scan either way (RecipePagination)
+    return (
+        ordering.lstrip("-") in NUMERIC_FIELDS and ordering not in SQL_ORDERINGS
+        or any(name in params for name in RecipeFilter.base_filters)
+    )
+
+
+def build_snapshot(version=None):
+    # read before the rows: never newer than them
+    built_from = corpus_version() if version is None else version
+    pks, category, allergen = [], [], []
+    values = {field: [] for field in NUMERIC_FIELDS}
+    vocab, keyword_ids, offsets = {}, [], [0]
+    for row in (
+        Recipe.objects
+        .values_list("id", "category_id", "allergen_mask", "keywords", *NUMERIC_FIELDS)
+        .order_by("id")
+        .iterator(chunk_size=20000)
+    ):
+        pks.append(row[0])
+        category.append(-1 if row[1] is None else row[1])
+        allergen.append(row[2])
+        for kw in row[3]:
+            keyword_ids.append(vocab.setdefault(kw, len(vocab)))
+        offsets.append(len(keyword_ids))
+        for field, value in zip(NUMERIC_FIELDS, row[4:]):
+            values[field].append(np.nan if value is None else value)
+
+    return ColumnarSnapshot(
+        ids=np.array(pks, dtype=np.int64),
+        columns={f: np.array(v, dtype=np.float64) for f, v in values.items()},
+        category=np.array(category, dtype=np.int64),
+        allergen=np.array(allergen, dtype=np.int64),
+        category_names=dict(RecipeCategory.objects.values_list("id", "name")),
+        keyword_ids=np.array(keyword_ids, dtype=np.int32),
+        keyword_offsets=np.array(offsets, dtype=np.int64),
+        keywords=list(vocab),
+        corpus_version=built_from,
+    )
+
+
+columnar_index = VersionedIndex(build_snapshot)
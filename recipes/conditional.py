@@ -0,0 +1,115 @@
+# recipes/conditional.py
+"""
+Conditional GET (ETag / Last-Modified / 304) for the read-only endpoints.
+
+Validators are computed from cheap lookups – an object's updated_at, the
+corpus version counter (migrations 0010, 0014) for list pages, plus whatever the
+caller's identity changes in the body – and If-None-Match /
+If-Modified-Since are checked against them before any queryset is
+evaluated or serializer runs. ETags are strong: a hash of the validators
+and the full request path (filters, cursor, ?fields= all change the body).
+
+Anonymous responses are public so a CDN can hold them; responses that
+depend on the user (is_favorite, allergen filtering) are private and must
+be revalidated. `check` / `finish` are the same steps for views outside
+the mixin (async_views.py).
+"""
+import hashlib
+import json
+
+from django.db import connections, router
+from django.utils.cache import (
+    get_conditional_response, patch_cache_control, patch_vary_headers,
+)
+from django.utils.http import http_date, quote_etag
+
+from .models import Recipe
+
+
+def corpus_version():
+    """
+    Bumped by a trigger inside every transaction that writes recipe /
+    catalog tables, and only visible once it commits. Read from the
+    database the body will come from (replicas.py), so a lagging replica
+    can't pair a new ETag with old data.
+    """
+    with connections[router.db_for_read(Recipe)].cursor() as cursor:
+        cursor.execute("SELECT sum(value) FROM recipes_corpus_version_slot")
+        return cursor.fetchone()[0]
+
+
+def make_etag(request, parts):
+    raw = json.dumps([request.get_full_path(), *parts], default=str)
+    return quote_etag(hashlib.sha1(raw.encode("utf-8")).hexdigest())
+
+
+class ConditionalGetMixin:
+    """
+    Wraps list / retrieve of a read-only viewset. list_validators and
+    detail_validators return (parts, last_modified), or None to skip;
+    user_validators returns the per-user state the body depends on, which
+    also makes the response private.
+    """
+    list_max_age = 60
+    detail_max_age = 300
+
+    def list_validators(self, request):
+        return [corpus_version()], None
+
+    def detail_validators(self, request):
+        return self.list_validators(request)
+
+    def user_validators(self, request):
+        return []
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(
+            request, self.list_validators, self.list_max_age,
+            self.render_list, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(
+            request, self.detail_validators, self.detail_max_age,
+            self.render_retrieve, *args, **kwargs
+        )
+
+    # the actual (unconditional) responses; viewsets customise these
+    def render_list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    def render_retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    def conditional(self, request, validators, max_age, render, *args, **kwargs):
+        found = validators(request)
+        if found is None:
+            return render(request, *args, **kwargs)
+        parts, last_modified = found
+        user_parts = self.user_validators(request)
+        etag, response = check(request, parts, last_modified, user_parts)
+        if response is None:
+            response = render(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        return finish(response, etag, last_modified, user_parts, max_age)
+
+
+def check(request, parts, last_modified, user_parts):
+    """(etag, 304 / 412 response or None when the body must be rendered)."""
+    etag = make_etag(request, [*parts, *user_parts])
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    return etag, get_conditional_response(request, etag=etag, last_modified=timestamp)
+
+
+def finish(response, etag, last_modified, user_parts, max_age):
+    """Validator and caching headers for a 200 or 304."""
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(int(last_modified.timestamp()))
+    if user_parts:
+        patch_cache_control(response, private=True, no_cache=True)
+    else:
+        patch_cache_control(response, public=True, max_age=max_age)
+    patch_vary_headers(response, ["Authorization"])
+    return response
@@ -0,0 +1,266 @@
+# recipes/feed.py
+"""
+Item-item recommendations behind /api/feed/.
+
+Baskets are each user's favourites and each user catalog. RecipePair holds,
+for every pair of recipes, the number of baskets containing both (plus the
+per-recipe basket count on the diagonal):
+
+  • `build_cooccurrence` computes it offline as Bᵀ·B of the sparse
+    basket × recipe matrix, pruned to each recipe's TOP_PAIRS others
+    seen together at least MIN_PAIR_COUNT times, and swaps it in
+    (manage.py build_recipe_cooccurrence);
+  • `basket_added` keeps it current as favourites / catalog entries are
+    added – one INSERT … ON CONFLICT over the basket (signals.py). Removals
+    only slightly overstate counts and are reconciled by the next rebuild.
+
+A user's feed scores every recipe co-occurring with their favourites (and,
+at half weight, their recent views) by cosine-normalised co-occurrence,
+drops what they already favourited and keeps the top FEED_SIZE in UserFeed.
+Changes bump UserFeed.generation, and the list is recomputed lazily on the
+next request, so serving a fresh feed is one primary-key lookup. Users with
+no signal get the most-basketed recipes.
+"""
+import io
+import re
+
+import numpy as np
+from scipy import sparse
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import CatalogRecipe, Favorite, RecipeAccess, RecipePair, UserFeed
+
+FEED_SIZE = 100
+RECENT_WEIGHT = 0.5
+WRITE_BATCH = 100000    # rows per COPY
+BUILD_BLOCK = 20000     # recipes per block of BᵀB
+MIN_PAIR_COUNT = 2      # a pair seen in one basket is noise
+TOP_PAIRS = 200         # others kept per recipe
+
+# new × (new ∪ others) covers new pairs both ways and the diagonal;
+# others × new adds the reverse direction of the new-old pairs. Rows are
+# locked in key order, so concurrent baskets sharing pairs can't deadlock.
+ADD_SQL = """
+INSERT INTO recipes_recipepair (recipe_id, other_id, count)
+SELECT n, x, 1
+FROM unnest(%(items)s::bigint[]) AS n,
+     unnest(%(items)s::bigint[] || %(others)s::bigint[]) AS x
+UNION ALL
+SELECT o, n, 1
+FROM unnest(%(others)s::bigint[]) AS o, unnest(%(items)s::bigint[]) AS n
+ORDER BY 1, 2
+ON CONFLICT (recipe_id, other_id)
+DO UPDATE SET count = recipes_recipepair.count + 1
+"""
+
+SCORE_SQL = """
+WITH seeds (recipe_id, weight) AS (
+    SELECT * FROM unnest(%(seeds)s::bigint[], %(weights)s::float8[])
+)
+SELECT p.other_id
+FROM seeds s
+JOIN recipes_recipepair p ON p.recipe_id = s.recipe_id
+JOIN recipes_recipepair ds ON ds.recipe_id = p.recipe_id AND ds.other_id = p.recipe_id
+JOIN recipes_recipepair dp ON dp.recipe_id = p.other_id AND dp.other_id = p.other_id
+WHERE p.other_id <> p.recipe_id AND NOT (p.other_id = ANY(%(favorites)s::bigint[]))
+GROUP BY p.other_id
+ORDER BY SUM(s.weight * p.count / sqrt(ds.count::float8 * dp.count)) DESC, p.other_id
+LIMIT %(limit)s
+"""
+
+
+# ---- co-occurrence model ----
+def _prune(pairs, first):
+    """
+    (recipe, other, count) arrays to keep from a block of BᵀB rows starting
+    at recipe `first`: every diagonal entry, and per recipe its TOP_PAIRS
+    most co-occurring others seen in at least MIN_PAIR_COUNT baskets.
+    """
+    pairs = pairs.tocoo()
+    recipe, other, count = pairs.row + first, pairs.col, pairs.data
+    diagonal = recipe == other
+    keep = ~diagonal & (count >= MIN_PAIR_COUNT)
+    recipe, other, count = recipe[keep], other[keep], count[keep]
+    order = np.lexsort((other, -count, recipe))
+    recipe, other, count = recipe[order], other[order], count[order]
+    rank = np.arange(len(recipe)) - np.searchsorted(recipe, recipe)
+    top = rank < TOP_PAIRS
+    return (
+        np.concatenate([pairs.row[diagonal] + first, recipe[top]]),
+        np.concatenate([pairs.col[diagonal], other[top]]),
+        np.concatenate([pairs.data[diagonal], count[top]]),
+    )
+
+
+def _copy_pairs(cursor, table, recipe, other, count):
+    for start in range(0, len(recipe), WRITE_BATCH):
+        end = start + WRITE_BATCH
+        buf = io.StringIO("".join(
+            f"{r}\t{o}\t{c}\n"
+            for r, o, c in zip(recipe[start:end].tolist(), other[start:end].tolist(), count[start:end].tolist())
+        ))
+        cursor.copy_expert(f"COPY {table} (recipe_id, other_id, count) FROM STDIN", buf)
+
+
+def _drop_dangling(cursor, table):
+    cursor.execute(f"""
+        DELETE FROM {table} p
+        WHERE NOT EXISTS (SELECT 1 FROM recipes_recipe r WHERE r.id = p.recipe_id)
+           OR NOT EXISTS (SELECT 1 FROM recipes_recipe r WHERE r.id = p.other_id)
+    """)
+
+
+def _swap_in(cursor, table, staging):
+    """
+    Replace `table` with `staging`, recreating its indexes and constraints
+    under their original names (migrations refer to them). Indexes are
+    built before the lock; the swap itself is a few catalog updates.
+    """
+    cursor.execute("""
+        SELECT c.conname, pg_get_constraintdef(c.oid), c.contype
+        FROM pg_constraint c WHERE c.conrelid = %s::regclass AND c.contype IN ('p', 'u', 'f')
+    """, [table])
+    constraints = cursor.fetchall()
+    cursor.execute("""
+        SELECT i.relname, pg_get_indexdef(i.oid)
+        FROM pg_index x JOIN pg_class i ON i.oid = x.indexrelid
+        WHERE x.indrelid = %s::regclass
+          AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = x.indexrelid)
+    """, [table])
+    indexes = cursor.fetchall()
+
+    renames = []
+    for n, (name, definition) in enumerate(indexes):
+        temp = f"{staging}_i{n}"
+        definition = definition.replace(f"INDEX {name} ON", f"INDEX {temp} ON", 1)
+        cursor.execute(re.sub(rf" ON (\S+\.)?{table} ", f" ON {staging} ", definition, count=1))
+        renames.append(f"ALTER INDEX {temp} RENAME TO {name}")
+    foreign_keys = []
+    for n, (name, definition, kind) in enumerate(constraints):
+        temp = f"{staging}_c{n}"
+        if kind == "f":                 # added NOT VALID in the swap, validated after it
+            foreign_keys.append(name)
+            renames.append(f"ALTER TABLE {table} ADD CONSTRAINT {name} {definition} NOT VALID")
+        else:
+            cursor.execute(f"ALTER TABLE {staging} ADD CONSTRAINT {temp} {definition}")
+            renames.append(f"ALTER TABLE {table} RENAME CONSTRAINT {temp} TO {name}")
+
+    _drop_dangling(cursor, staging)     # pairs of recipes deleted during the build
+    with transaction.atomic():
+        cursor.execute(f"DROP TABLE {table}")
+        cursor.execute(f"ALTER TABLE {staging} RENAME TO {table}")
+        for statement in renames:
+            cursor.execute(statement)
+        UserFeed.objects.update(generation=F("generation") + 1)
+    for name in foreign_keys:
+        try:
+            with transaction.atomic():
+                cursor.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {name}")
+        except IntegrityError:          # a recipe deleted just before the swap
+            _drop_dangling(cursor, table)
+            cursor.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {name}")
+    cursor.execute(f"ANALYZE {table}")
+
+
+def build_cooccurrence():
+    """
+    Rebuild RecipePair, pruned (see _prune), into a staging table and swap
+    it in; returns the number of rows written. Readers keep the old counts
+    until the swap; pairs basket_added writes during the build are lost
+    until the next rebuild.
+    """
+    baskets = {}
+    for user_id, recipe_id in Favorite.objects.values_list("user_id", "recipe_id").iterator():
+        baskets.setdefault(("u", user_id), []).append(recipe_id)
+    for catalog_id, recipe_id in CatalogRecipe.objects.values_list("catalog_id", "recipe_id").iterator():
+        baskets.setdefault(("c", catalog_id), []).append(recipe_id)
+
+    rows, cols = [], []
+    for i, items in enumerate(baskets.values()):
+        rows.extend([i] * len(items))
+        cols.extend(items)
+    size = max(cols, default=0) + 1
+    basket_matrix = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.int32), (rows, cols)),
+        shape=(len(baskets), size),
+    )
+    by_recipe = basket_matrix.T.tocsr()
+
+    table, staging = RecipePair._meta.db_table, f"{RecipePair._meta.db_table}_build"
+    written = 0
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {staging}")
+        cursor.execute(
+            f"CREATE TABLE {staging} (LIKE {table} INCLUDING DEFAULTS INCLUDING IDENTITY)"
+        )
+        # BᵀB a block of recipes at a time: memory stays bounded by the block
+        for first in range(0, size, BUILD_BLOCK):
+            block = by_recipe[first:first + BUILD_BLOCK] @ basket_matrix
+            recipe, other, count = _prune(block, first)
+            _copy_pairs(cursor, staging, recipe, other, count)
+            written += len(recipe)
+        _swap_in(cursor, table, staging)
+    return written
+
+
+def basket_added(items, others):
+    """`items` were added to a basket already holding `others` (disjoint)."""
+    with connection.cursor() as cursor:
+        cursor.execute(ADD_SQL, {"items": list(items), "others": list(others)})
+
+
+# ---- per-user feeds ----
+def mark_stale(user_ids):
+    UserFeed.objects.filter(user_id__in=user_ids).update(generation=F("generation") + 1)
+
+
+def compute_feed(user_id, limit=FEED_SIZE):
+    favorites = list(Favorite.objects.filter(user_id=user_id).values_list("recipe_id", flat=True))
+    favorite_set = set(favorites)
+    recent = [
+        pk for pk in RecipeAccess.objects.filter(user_id=user_id).values_list("recipe_id", flat=True)
+        if pk not in favorite_set
+    ]
+    seeds = favorites + recent
+    if seeds:
+        with connection.cursor() as cursor:
+            cursor.execute(SCORE_SQL, {
+                "seeds": seeds,
+                "weights": [1.0] * len(favorites) + [RECENT_WEIGHT] * len(recent),
+                "favorites": favorites,
+                "limit": limit,
+            })
+            ids = [row[0] for row in cursor.fetchall()]
+        if ids:
+            return ids
+    return list(
+        RecipePair.objects.filter(recipe=F("other"))
+        .exclude(recipe_id__in=favorites)
+        .order_by("-count", "recipe")
+        .values_list("recipe_id", flat=True)[:limit]
+    )
+
+
+def get_feed(user_id):
+    """The user's cached recommendations, recomputed first if outdated."""
+    row = (
+        UserFeed.objects.filter(user_id=user_id)
+        .values_list("recipe_ids", "generation", "built_generation").first()
+    )
+    if row is None:
+        UserFeed.objects.get_or_create(user_id=user_id)   # from now on, bumps stick
+        generation = 0
+    elif row[1] == row[2]:
+        return row[0]
+    else:
+        generation = row[1]
+
+    ids = compute_feed(user_id)
+    # a change that lands meanwhile has bumped generation: still stale
+    UserFeed.objects.filter(user_id=user_id).update(
+        recipe_ids=ids, built_generation=generation, computed_at=timezone.now()
+    )
+    return ids
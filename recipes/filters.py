@@ -2,10 +2,53 @@
 import django_filters as df
 from .models import Recipe
 
+# numeric Recipe columns with <field>_min / <field>_max filters below
+NUMERIC_FIELDS = (
+    "cook_mins",
+    "prep_mins",
+    "total_mins",
+    "calories",
+    "fat_content",
+    "saturated_fat_content",
+    "cholesterol_content",
+    "sodium_content",
+    "carbohydrate_content",
+    "fiber_content",
+    "sugar_content",
+    "protein_content",
+)
+
+
 class RecipeFilter(df.FilterSet):
     total_mins_lt = df.NumberFilter(field_name="total_mins", lookup_expr="lt")
     total_mins_lte = df.NumberFilter(field_name="total_mins", lookup_expr="lte")
-    recipe_category = df.CharFilter(field_name="category", lookup_expr="iexact")
+    recipe_category = df.CharFilter(field_name="category__name", lookup_expr="iexact")
+
+    # range filters on every numeric column (served by columnar.py)
+    cook_mins_min = df.NumberFilter(field_name="cook_mins", lookup_expr="gte")
+    cook_mins_max = df.NumberFilter(field_name="cook_mins", lookup_expr="lte")
+    prep_mins_min = df.NumberFilter(field_name="prep_mins", lookup_expr="gte")
+    prep_mins_max = df.NumberFilter(field_name="prep_mins", lookup_expr="lte")
+    total_mins_min = df.NumberFilter(field_name="total_mins", lookup_expr="gte")
+    total_mins_max = df.NumberFilter(field_name="total_mins", lookup_expr="lte")
+    calories_min = df.NumberFilter(field_name="calories", lookup_expr="gte")
+    calories_max = df.NumberFilter(field_name="calories", lookup_expr="lte")
+    fat_content_min = df.NumberFilter(field_name="fat_content", lookup_expr="gte")
+    fat_content_max = df.NumberFilter(field_name="fat_content", lookup_expr="lte")
+    saturated_fat_content_min = df.NumberFilter(field_name="saturated_fat_content", lookup_expr="gte")
+    saturated_fat_content_max = df.NumberFilter(field_name="saturated_fat_content", lookup_expr="lte")
+    cholesterol_content_min = df.NumberFilter(field_name="cholesterol_content", lookup_expr="gte")
+    cholesterol_content_max = df.NumberFilter(field_name="cholesterol_content", lookup_expr="lte")
+    sodium_content_min = df.NumberFilter(field_name="sodium_content", lookup_expr="gte")
+    sodium_content_max = df.NumberFilter(field_name="sodium_content", lookup_expr="lte")
+    carbohydrate_content_min = df.NumberFilter(field_name="carbohydrate_content", lookup_expr="gte")
+    carbohydrate_content_max = df.NumberFilter(field_name="carbohydrate_content", lookup_expr="lte")
+    fiber_content_min = df.NumberFilter(field_name="fiber_content", lookup_expr="gte")
+    fiber_content_max = df.NumberFilter(field_name="fiber_content", lookup_expr="lte")
+    sugar_content_min = df.NumberFilter(field_name="sugar_content", lookup_expr="gte")
+    sugar_content_max = df.NumberFilter(field_name="sugar_content", lookup_expr="lte")
+    protein_content_min = df.NumberFilter(field_name="protein_content", lookup_expr="gte")
+    protein_content_max = df.NumberFilter(field_name="protein_content", lookup_expr="lte")
 
     class Meta:
         model  = Recipe
@@ -0,0 +1,72 @@
+# recipes/indexes.py
+"""
+Per-worker holder for in-memory indexes derived from the recipe corpus
+(autocomplete, pantry, columnar, …). The index is built on first use and
+rebuilt in a background thread whenever the database corpus version
+(conditional.corpus_version) moves, so writes from any worker or loader
+are picked up; the previous index keeps serving until the new one is
+ready.
+
+The version is read at most every CHECK_INTERVAL seconds per index, and
+a rebuild is followed by MIN_REBUILD_INTERVAL seconds without checks, so
+a burst of saves costs one rebuild per index, not one per save.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+
+from .conditional import corpus_version
+
+DEFAULTS = {
+    "CHECK_INTERVAL": 5.0,          # seconds between corpus version reads
+    "MIN_REBUILD_INTERVAL": 60.0,   # seconds from one rebuild to the next check
+}
+
+conf = {**DEFAULTS, **getattr(settings, "CORPUS_INDEXES", {})}
+
+
+class VersionedIndex:
+    def __init__(self, build, load=None):
+        # build(version) -> index; load() -> (index, version) or None (e.g. a snapshot)
+        self._build = build
+        self._load = load
+        self._index = None
+        self._version = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        self._rebuilding = threading.Event()
+        self._worker = None
+
+    def _rebuild(self, version):
+        try:
+            self._index = self._build(version)
+            self._version = version
+        finally:
+            connection.close()      # this thread's own connection
+            self._rebuilding.clear()
+
+    def get(self):
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    loaded = self._load() if self._load else None
+                    if loaded is not None:
+                        self._index, self._version = loaded
+                    else:
+                        version = corpus_version()      # read first: never newer than the rows
+                        self._index, self._version = self._build(version), version
+                    self._next_check = time.monotonic() + conf["CHECK_INTERVAL"]
+            return self._index
+
+        now = time.monotonic()
+        if now >= self._next_check and not self._rebuilding.is_set():
+            self._next_check = now + conf["CHECK_INTERVAL"]
+            version = corpus_version()
+            if version != self._version:
+                self._rebuilding.set()
+                self._next_check = now + conf["MIN_REBUILD_INTERVAL"]
+                self._worker = threading.Thread(target=self._rebuild, args=(version,), daemon=True)
+                self._worker.start()
+        return self._index
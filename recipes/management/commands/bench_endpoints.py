@@ -0,0 +1,301 @@
+import json
+import platform
+import random
+import re
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Max, Min
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import AccessToken
+
+from ...models import Catalog, Ingredient, PredefinedCatalog, Recipe
+from .generate_synthetic_corpus import USER_PREFIX
+
+SAMPLE = 500        # recipes / ingredients / users drawn to build requests from
+SERVER_TIMING_QUERIES = re.compile(r'sql;[^,]*desc="(\d+) queries"')
+
+
+# name → (needs a user, request builder(sample, rng) → (method, path, body))
+ENDPOINTS = {
+    "recipes_list": (False, lambda s, rng: ("GET", "/api/recipes/", None)),
+    "recipes_filtered": (False, lambda s, rng: (
+        "GET", f"/api/recipes/?total_mins_lte={rng.choice([15, 30, 60])}&ordering=total_mins", None,
+    )),
+    "recipe_detail": (False, lambda s, rng: (
+        "GET", f"/api/recipes/{rng.choice(s['recipe_ids'])}/", None,
+    )),
+    "recipe_similar": (False, lambda s, rng: (
+        "GET", f"/api/recipes/{rng.choice(s['recipe_ids'])}/similar/", None,
+    )),
+    "recipes_batch": (False, lambda s, rng: (
+        "GET", "/api/recipes/batch/?ids=" + ",".join(map(str, rng.sample(s["recipe_ids"], 20))), None,
+    )),
+    "facets": (False, lambda s, rng: ("GET", "/api/recipes/facets/", None)),
+    "search": (False, lambda s, rng: ("GET", f"/api/search/?q={rng.choice(s['terms'])}", None)),
+    "suggest": (False, lambda s, rng: (
+        "GET", f"/api/search/suggest/?prefix={rng.choice(s['terms'])[:3]}", None,
+    )),
+    "pantry": (False, lambda s, rng: (
+        "GET", "/api/pantry/?ingredients=" + ",".join(rng.sample(s["ingredients"], 5)), None,
+    )),
+    "predefined_types": (False, lambda s, rng: ("GET", "/api/predefined-types/", None)),
+    "predefined_recipes": (False, lambda s, rng: (
+        "GET", f"/api/predefined-catalogs/{rng.choice(s['predefined'])}/recipes/", None,
+    )),
+    "favorites": (True, lambda s, rng: ("GET", "/api/favorites/", None)),
+    "recent": (True, lambda s, rng: ("GET", "/api/recent/", None)),
+    "catalogs_summary": (True, lambda s, rng: ("GET", "/api/catalogs/?summary=1", None)),
+    "catalog_recipes": (True, lambda s, rng: (
+        "GET", f"/api/catalogs/{rng.choice(s['catalogs'][s['user']] or [0])}/recipes/", None,
+    )),
+    "feed": (True, lambda s, rng: ("GET", "/api/feed/", None)),
+    # writes: only with --writes
+    "favorite_add": (True, lambda s, rng: (
+        "POST", "/api/favorites/", {"recipe_id": rng.choice(s["recipe_ids"])},
+    )),
+}
+WRITES = {"favorite_add"}
+
+
+def _percentile(values, q):
+    return round(float(np.percentile(values, q)), 2) if values else None
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive the API routes with a reproducible request mix and write p50/p95/p99 "
+        "latency, throughput and SQL query counts per endpoint to a JSON report"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--endpoints", help="Comma-separated names (default: all reads)")
+        parser.add_argument("--list", action="store_true", help="List endpoint names and exit")
+        parser.add_argument("--writes", action="store_true", help="Include write endpoints")
+        parser.add_argument("--requests", type=int, default=200, help="Measured requests per endpoint")
+        parser.add_argument("--warmup", type=int, default=20, help="Unmeasured requests first")
+        parser.add_argument("--concurrency", type=int, default=1, help="Client threads")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--base-url",
+            help="Send HTTP to a running server (e.g. http://127.0.0.1:8000) instead of "
+                 "calling the app in-process; SQL counts then come from its Server-Timing "
+                 "header (SQL_STATS_SAMPLE_RATE=1 on the server)",
+        )
+        parser.add_argument("--output", default="bench-report.json", help="JSON report path")
+
+    def handle(self, *args, **opts):
+        if opts["list"]:
+            for name, (auth, _) in ENDPOINTS.items():
+                self.stdout.write(f"{name}{' (user)' if auth else ''}{' (write)' if name in WRITES else ''}")
+            return
+
+        names = [n for n in ENDPOINTS if n not in WRITES or opts["writes"]]
+        if opts["endpoints"]:
+            names = opts["endpoints"].split(",")
+            unknown = [n for n in names if n not in ENDPOINTS]
+            if unknown:
+                raise CommandError(f"Unknown endpoints: {', '.join(unknown)} (see --list)")
+
+        self.base_url = opts["base_url"]
+        self.local = threading.local()
+        sample = self.sample(random.Random(opts["seed"]))
+        if not sample["recipe_ids"]:
+            raise CommandError("No recipes loaded; run generate_synthetic_corpus first.")
+
+        results = {}
+        for name in names:
+            auth, build = ENDPOINTS[name]
+            if auth and not sample["users"]:
+                self.stdout.write(self.style.WARNING(f"{name}: skipped, no users"))
+                continue
+            rng = random.Random(f"{opts['seed']}:{name}")
+            requests = [
+                self.prepare(sample, rng, auth, build)
+                for _ in range(opts["warmup"] + opts["requests"])
+            ]
+            self.run(requests[:opts["warmup"]], opts["concurrency"])
+            results[name] = self.run(requests[opts["warmup"]:], opts["concurrency"])
+            self.report_line(name, results[name])
+
+        report = {
+            "meta": self.meta(opts, sample),
+            "endpoints": results,
+        }
+        with open(opts["output"], "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2, sort_keys=True)
+            fh.write("\n")
+        self.stdout.write(self.style.SUCCESS(f"Report written to {opts['output']}"))
+
+    # ---- request mix ----
+    def sample(self, rng):
+        """Ids and terms to build requests from, drawn reproducibly from the data."""
+        bounds = Recipe.objects.aggregate(lo=Min("id"), hi=Max("id"))
+        recipe_ids, terms = [], []
+        if bounds["lo"] is not None:
+            pks = [rng.randint(bounds["lo"], bounds["hi"]) for _ in range(SAMPLE)]
+            for recipe_id, name in (
+                Recipe.objects.filter(pk__in=pks).order_by("pk").values_list("recipe_id", "name")
+            ):
+                recipe_ids.append(recipe_id)
+                terms.append(rng.choice(name.split()).lower())
+
+        ingredients = list(
+            Ingredient.objects.order_by("pk").values_list("name", flat=True)[:SAMPLE * 4]
+        )
+        users = User.objects.order_by("pk")
+        if users.filter(username__startswith=USER_PREFIX).exists():
+            users = users.filter(username__startswith=USER_PREFIX)
+        user_ids = list(users.values_list("pk", flat=True))
+        user_ids = rng.sample(user_ids, min(SAMPLE, len(user_ids)))
+        catalogs = {u: [] for u in user_ids}
+        for user_id, catalog_id in Catalog.objects.filter(user_id__in=user_ids).values_list("user_id", "id"):
+            catalogs[user_id].append(catalog_id)
+
+        return {
+            "recipe_ids": recipe_ids,
+            "terms": terms or ["soup"],
+            "ingredients": rng.sample(ingredients, min(len(ingredients), SAMPLE)) or ["salt"] * 5,
+            "predefined": list(PredefinedCatalog.objects.values_list("pk", flat=True)) or [0],
+            "users": user_ids,
+            "catalogs": catalogs,
+            "tokens": {},
+        }
+
+    def prepare(self, sample, rng, auth, build):
+        user = rng.choice(sample["users"]) if auth else None
+        method, path, body = build({**sample, "user": user}, rng)
+        token = None
+        if user is not None:
+            if user not in sample["tokens"]:
+                sample["tokens"][user] = str(AccessToken.for_user(User(pk=user)))
+            token = sample["tokens"][user]
+        return method, path, body, token
+
+    # ---- running ----
+    def run(self, requests, concurrency):
+        """Send `requests` from `concurrency` threads; latency, status and SQL stats."""
+        if not requests:
+            return None
+        chunks = [requests[i::concurrency] for i in range(concurrency)]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as pool:
+            outcomes = [o for chunk in pool.map(self.worker, chunks) for o in chunk]
+        wall = time.perf_counter() - started
+
+        latencies = [o[0] for o in outcomes]
+        queries = [o[2] for o in outcomes if o[2] is not None]
+        statuses = {}
+        for _, status, _ in outcomes:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        return {
+            "requests": len(outcomes),
+            "errors": sum(1 for _, status, _ in outcomes if status >= 500 or status == 0),
+            "status": statuses,
+            "p50_ms": _percentile(latencies, 50),
+            "p95_ms": _percentile(latencies, 95),
+            "p99_ms": _percentile(latencies, 99),
+            "mean_ms": round(float(np.mean(latencies)), 2),
+            "throughput_rps": round(len(outcomes) / wall, 1),
+            "queries_mean": round(float(np.mean(queries)), 2) if queries else None,
+            "queries_max": max(queries) if queries else None,
+        }
+
+    def worker(self, requests):
+        try:
+            return [self.send(*request) for request in requests]
+        finally:
+            connections.close_all()     # this thread's connections
+
+    def send(self, method, path, body, token):
+        """(latency ms, status, SQL queries or None) for one request."""
+        if self.base_url:
+            return self.send_http(method, path, body, token)
+        client = getattr(self.local, "client", None)
+        if client is None:
+            client = self.local.client = Client(raise_request_exception=False)
+        headers = {"HTTP_AUTHORIZATION": f"Bearer {token}"} if token else {}
+        captures = [CaptureQueriesContext(conn) for conn in connections.all()]
+        for capture in captures:
+            capture.__enter__()
+        started = time.perf_counter()
+        try:
+            if method == "GET":
+                response = client.get(path, **headers)
+            else:
+                response = client.generic(
+                    method, path, json.dumps(body), content_type="application/json", **headers
+                )
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            for capture in captures:
+                capture.__exit__(None, None, None)
+        return elapsed, response.status_code, sum(len(c) for c in captures)
+
+    def send_http(self, method, path, body, token):
+        request = urllib.request.Request(
+            self.base_url.rstrip("/") + path,
+            data=json.dumps(body).encode("utf-8") if body is not None else None,
+            method=method,
+            headers={"Content-Type": "application/json", "Accept": "application/json"},
+        )
+        if token:
+            request.add_header("Authorization", f"Bearer {token}")
+        started = time.perf_counter()
+        timing = None
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                response.read()
+                status, timing = response.status, response.headers.get("Server-Timing")
+        except urllib.error.HTTPError as exc:
+            status, timing = exc.code, exc.headers.get("Server-Timing")
+        except OSError:
+            status = 0                  # connection refused / timed out
+        elapsed = (time.perf_counter() - started) * 1000
+        match = SERVER_TIMING_QUERIES.search(timing or "")
+        return elapsed, status, int(match.group(1)) if match else None
+
+    # ---- output ----
+    def report_line(self, name, stats):
+        if stats is None:
+            return
+        queries = "-" if stats["queries_mean"] is None else f"{stats['queries_mean']:.1f}"
+        self.stdout.write(
+            f"{name:20} p50 {stats['p50_ms']:8.2f}  p95 {stats['p95_ms']:8.2f}  "
+            f"p99 {stats['p99_ms']:8.2f} ms  {stats['throughput_rps']:8.1f} req/s  "
+            f"queries {queries:>5}  errors {stats['errors']}"
+        )
+
+    def meta(self, opts, sample):
+        try:
+            commit = subprocess.run(
+                ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            "commit": commit,
+            "mode": "http" if self.base_url else "in-process",
+            "base_url": self.base_url,
+            "requests": opts["requests"],
+            "warmup": opts["warmup"],
+            "concurrency": opts["concurrency"],
+            "seed": opts["seed"],
+            "dataset": {
+                "recipes": Recipe.objects.count(),
+                "ingredients": Ingredient.objects.count(),
+                "users": User.objects.count(),
+            },
+            "python": platform.python_version(),
+            "django": django.get_version(),
+        }
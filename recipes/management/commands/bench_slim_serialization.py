@@ -0,0 +1,88 @@
+import random
+import time
+from collections import namedtuple
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from ...models import Recipe
+from ...renderers import ORJSONRenderer
+from ...serializers import SLIM_COLUMNS, SLIM_DEFAULT_IMAGE, SlimRecipeSerializer, slim_data, slim_rows
+from ...views import SLIM_FIELDS
+
+SlimRow = namedtuple("SlimRow", SLIM_COLUMNS)
+
+
+def _synthetic(count):
+    """Unsaved recipes plus the equivalent slim rows, edge cases included."""
+    rng = random.Random(count)
+    recipes, rows = [], []
+    for i in range(count):
+        images = rng.choice([None, [], [f"https://img.example/{i}.jpg", "x"]])
+        recipe = Recipe(
+            recipe_id=i,
+            name=rng.choice(["Pancakes", "Crème brûlée", "Tom Yum  soup", "Pão"]) + f" {i}",
+            images=images,
+            calories=rng.choice([None, 0.0, round(rng.uniform(0, 2000), 1), 1 / 3]),
+            total_mins=rng.choice([None, 5.0, 45.0, 1440.0]),
+        )
+        recipes.append(recipe)
+        rows.append(SlimRow(
+            recipe.recipe_id, recipe.name,
+            images[0] if images else SLIM_DEFAULT_IMAGE,
+            recipe.calories, recipe.total_mins,
+        ))
+    return (lambda: recipes), (lambda: rows)
+
+
+def _from_db(count):
+    ids = list(Recipe.objects.order_by("id").values_list("id", flat=True)[:count])
+    if not ids:
+        raise CommandError("No recipes loaded; drop --db or run load_recipes first.")
+    qs = Recipe.objects.filter(pk__in=ids).order_by("id")
+    return (lambda: list(qs.only(*SLIM_FIELDS))), (lambda: list(slim_rows(qs)))
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare SlimRecipeSerializer + JSONRenderer with the values_list "
+        "fast path + ORJSONRenderer: rows/s and byte-identical output"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10000, help="Rows per page (default 10000)")
+        parser.add_argument("--repeat", type=int, default=5, help="Timed runs per path (best is kept)")
+        parser.add_argument(
+            "--db", action="store_true",
+            help="Fetch the first --rows recipes from the database (timings include the query)",
+        )
+
+    def _best(self, fn, repeat):
+        best, out = None, None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            out = fn()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best, out
+
+    def handle(self, *args, **options):
+        count, repeat = options["rows"], options["repeat"]
+        recipes, rows = (_from_db if options["db"] else _synthetic)(count)
+
+        def serializer_path():
+            return JSONRenderer().render(SlimRecipeSerializer(recipes(), many=True).data)
+
+        def fast_path():
+            return ORJSONRenderer().render(slim_data(rows()))
+
+        slow, expected = self._best(serializer_path, repeat)
+        fast, got = self._best(fast_path, repeat)
+        if got != expected:
+            raise CommandError("Fast path output differs from SlimRecipeSerializer")
+
+        n = len(rows())
+        self.stdout.write(f"{n} rows, {len(got)} bytes, best of {repeat}")
+        self.stdout.write(f"  serializer + JSONRenderer : {slow * 1000:8.1f} ms  {n / slow:12,.0f} rows/s")
+        self.stdout.write(f"  slim_data + ORJSONRenderer: {fast * 1000:8.1f} ms  {n / fast:12,.0f} rows/s")
+        self.stdout.write(self.style.SUCCESS(f"Byte-identical; {slow / fast:.1f}x faster."))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from ...feed import build_cooccurrence
+
+
+class Command(BaseCommand):
+    help = "Rebuild the recipe co-occurrence counts behind /api/feed/ from favourites and catalogs"
+
+    def handle(self, *args, **options):
+        written = build_cooccurrence()
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {written} recipe pairs; every user's feed will be recomputed on next request."
+        ))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from ...similar import TOP_K, rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute the precomputed similar-recipe lists (only stale ones unless --full)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Recompute every recipe, not just new/changed ones and those they affect"
+        )
+        parser.add_argument(
+            "--top-k",
+            type=int,
+            default=TOP_K,
+            help=f"Neighbours kept per recipe (default {TOP_K})"
+        )
+
+    def handle(self, *args, **options):
+        written = rebuild(
+            full=options["full"],
+            k=options["top_k"],
+            progress=lambda done, total: self.stdout.write(f"  {done}/{total} recipes"),
+        )
+        self.stdout.write(self.style.SUCCESS(f"Similar recipes recomputed for {written} recipes."))
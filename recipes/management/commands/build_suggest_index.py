@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from ...suggest import build_index
+
+
+class Command(BaseCommand):
+    help = "Build the autocomplete prefix index and write it to a snapshot file"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            type=str,
+            required=True,
+            help="Snapshot path (point settings.SUGGEST_SNAPSHOT at it)"
+        )
+
+    def handle(self, *args, **options):
+        index = build_index()
+        index.save(options["output"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {len(index.entries)} terms ({len(index.top)} ranked nodes) "
+            f"to {options['output']}."
+        ))
@@ -0,0 +1,395 @@
+import io
+from datetime import datetime, timezone as dt_timezone
+
+import numpy as np
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from ...allergens import refresh_all_masks
+from ...catalog_membership import refresh_memberships
+from ...models import (
+    Allergen, Catalog, CatalogRecipe, Favorite, Ingredient, Recipe, RecipeAccess,
+    RecipeCategory, RecipeIngredient, UserAllergy, UserFeed,
+)
+from ...search_cache import search_cache
+
+USER_PREFIX = "synthetic-"      # bench_endpoints logs in as these users
+COPY_BATCH = 200_000            # rows per COPY statement
+DAY = 86400
+# timestamps count back from here rather than now, so a seed always gives
+# the same rows
+REFERENCE_TIME = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+# names are combinations of these words, so search and typeahead see
+# realistic term frequencies; ingredients past FORMS × VARIETIES × FOODS
+# repeat the combinations with a number ("fresh red apple 2")
+FOODS = """
+apple avocado bacon banana basil bean beef broccoli butter cabbage carrot
+cashew cauliflower celery cheese chicken chickpea chili chocolate cilantro
+cinnamon coconut cod corn cream cucumber egg eggplant flour garlic ginger
+honey kale lamb leek lemon lentil lime mango milk mint mushroom mustard oat
+olive onion orange paprika parsley pasta peanut pear pea pepper pork potato
+pumpkin quinoa raisin rice salmon sesame shrimp spinach squash sugar thyme
+tofu tomato tuna turkey vanilla walnut yogurt zucchini
+""".split()
+VARIETIES = """
+baby black blue brown golden green hot mild purple red smoked sweet white
+wild yellow young aged spicy plain sour jumbo mini organic local heirloom
+""".split()
+FORMS = """
+fresh dried ground chopped sliced diced minced frozen canned roasted toasted
+grated crushed whole shredded pickled cooked raw powdered
+""".split()
+DISHES = """
+soup salad stew curry pie cake bread tart casserole risotto pasta bowl
+sandwich wrap burger skillet bake roast muffins cookies pancakes smoothie
+chowder chili frittata gratin dumplings noodles tacos
+""".split()
+KEYWORDS = """
+easy quick healthy vegan vegetarian gluten-free dairy-free low-fat low-carb
+high-protein kid-friendly weeknight holiday summer winter spring autumn
+breakfast lunch dinner dessert snack beverage brunch party potluck
+one-pot freezer budget oven stovetop grill slow-cooker no-cook spicy sweet
+""".split()
+QUANTITIES = ["1", "2", "3", "1/2", "1/4", "3/4", "1 1/2", "4", "6", "8", "12"]
+
+
+def _zipf(rng, n, size, s=1.0):
+    """`size` draws from range(n), i with probability ∝ 1 / (i + 1) ** s."""
+    weights = 1.0 / np.arange(1, n + 1) ** s
+    return rng.choice(n, size=size, p=weights / weights.sum())
+
+
+def _sizes(rng, owners, mean, cap):
+    """Per-owner basket sizes: geometric (many small, a long tail), ≤ cap."""
+    if mean <= 0:
+        return np.zeros(owners, dtype=np.int64)
+    return np.minimum(rng.geometric(1 / (mean + 1), owners) - 1, cap)
+
+
+def _pairs(owners, items, n_items):
+    """(owner, item) pairs, duplicates dropped, sorted by owner."""
+    keys = np.unique(owners.astype(np.int64) * n_items + items)
+    return keys // n_items, keys % n_items
+
+
+def _timestamps(rng, now, count, days):
+    """`count` ISO timestamps spread over the `days` before now."""
+    ago = rng.integers(0, days * DAY, count).astype("timedelta64[s]")
+    stamps = np.datetime_as_string(np.datetime64(now.replace(tzinfo=None), "s") - ago)
+    return np.char.add(stamps, "+00")
+
+
+def _float(value):
+    return "\\N" if np.isnan(value) else f"{value:.1f}"
+
+
+def _next_id(cursor, table):
+    cursor.execute(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {table}")
+    return cursor.fetchone()[0]
+
+
+def _copy(cursor, table, columns, rows):
+    """COPY rows (tuples of COPY-text values) in batches; returns the row count."""
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN"
+    buf, pending, total = io.StringIO(), 0, 0
+    for row in rows:
+        buf.write("\t".join(row))
+        buf.write("\n")
+        pending += 1
+        if pending == COPY_BATCH:
+            buf.seek(0)
+            cursor.copy_expert(sql, buf)
+            total += pending
+            buf, pending = io.StringIO(), 0
+    if pending:
+        buf.seek(0)
+        cursor.copy_expert(sql, buf)
+        total += pending
+    return total
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a reproducible synthetic corpus with COPY: recipes, ingredients, "
+        "and users with favourites, catalogs and view history (for bench_endpoints)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--recipes", type=int, default=1_000_000)
+        parser.add_argument("--ingredients", type=int, default=50_000)
+        parser.add_argument("--users", type=int, default=100_000)
+        parser.add_argument("--categories", type=int, default=300)
+        parser.add_argument(
+            "--scale", type=float, default=1.0,
+            help="Multiply --recipes/--ingredients/--users, e.g. 0.01 for a quick local run",
+        )
+        parser.add_argument("--favorites-per-user", type=float, default=20)
+        parser.add_argument("--catalogs-per-user", type=float, default=2)
+        parser.add_argument("--recipes-per-catalog", type=float, default=10)
+        parser.add_argument("--views-per-user", type=float, default=10)
+        parser.add_argument("--seed", type=int, default=0, help="Same seed, same corpus")
+        parser.add_argument(
+            "--flush", action="store_true",
+            help="First delete every recipe, ingredient (and allergen mapping), category, "
+                 "user catalog and synthetic user (destructive: benchmark databases only)",
+        )
+
+    def handle(self, *args, **opts):
+        scale = opts["scale"]
+        n_recipes = max(1, int(opts["recipes"] * scale))
+        n_ingredients = max(1, int(opts["ingredients"] * scale))
+        n_users = max(1, int(opts["users"] * scale))
+        n_categories = max(1, opts["categories"])
+        if not opts["flush"] and (
+            Recipe.objects.exists() or Ingredient.objects.exists() or RecipeCategory.objects.exists()
+        ):
+            raise CommandError("The corpus is not empty; rerun with --flush to replace it.")
+
+        self.rng = np.random.default_rng(opts["seed"])
+        self.now = REFERENCE_TIME
+        self.stdout.write(
+            f"Generating {n_recipes} recipes, {n_ingredients} ingredients, {n_users} users "
+            f"(seed {opts['seed']})..."
+        )
+
+        trigger_tables = [
+            Recipe._meta.db_table, RecipeIngredient._meta.db_table,
+            Allergen.ingredients.through._meta.db_table,
+        ]
+        with transaction.atomic(), connection.cursor() as cursor:
+            if opts["flush"]:
+                self.flush(cursor)
+            # FK checks row by row instead of queueing millions of deferred ones;
+            # the search / allergen / touch triggers are replaced by set-based
+            # refreshes below
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+            for table in trigger_tables:
+                cursor.execute(f"ALTER TABLE {table} DISABLE TRIGGER USER")
+
+            categories = self.copy_categories(cursor, n_categories)
+            ingredients = self.copy_ingredients(cursor, n_ingredients)
+            recipes = self.copy_recipes(cursor, n_recipes, categories, ingredients)
+            users = self.copy_users(cursor, n_users)
+            self.copy_activity(cursor, users, recipes, opts)
+            self.copy_allergies(cursor, users, ingredients)
+
+            for table in trigger_tables:
+                cursor.execute(f"ALTER TABLE {table} ENABLE TRIGGER USER")
+            cursor.execute("SELECT recipes_bump_corpus_version()")
+
+        self.stdout.write("Building search vectors, allergen masks and catalog memberships...")
+        call_command("populate_search_vector", stdout=self.stdout)
+        refresh_all_masks()
+        refresh_memberships()
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        search_cache.bump_version()
+        self.stdout.write(self.style.SUCCESS(
+            "Synthetic corpus ready. Run build_similar_recipes and "
+            "build_recipe_cooccurrence for /similar/ and /feed/."
+        ))
+
+    def flush(self, cursor):
+        self.stdout.write("Flushing the existing corpus...")
+        cursor.execute(
+            f"TRUNCATE {Recipe._meta.db_table}, {Ingredient._meta.db_table}, "
+            f"{RecipeCategory._meta.db_table}, {Catalog._meta.db_table}, "
+            f"{UserFeed._meta.db_table} RESTART IDENTITY CASCADE"
+        )
+        cursor.execute(
+            f"DELETE FROM {UserAllergy._meta.db_table} WHERE user_id IN "
+            "(SELECT id FROM auth_user WHERE username LIKE %s)",
+            [USER_PREFIX + "%"],
+        )
+        cursor.execute("DELETE FROM auth_user WHERE username LIKE %s", [USER_PREFIX + "%"])
+
+    def copy_categories(self, cursor, count):
+        table = RecipeCategory._meta.db_table
+        first = _next_id(cursor, table)
+        names = [f"{DISHES[i % len(DISHES)].title()} {i // len(DISHES) + 1}" for i in range(count)]
+        _copy(cursor, table, ["id", "name"], ((str(first + i), n) for i, n in enumerate(names)))
+        self.setval(cursor, table)
+        return np.arange(first, first + count)
+
+    def copy_ingredients(self, cursor, count):
+        table = Ingredient._meta.db_table
+        first = _next_id(cursor, table)
+        # most common first: _zipf() draws low indexes most often
+        words = len(FORMS) * len(VARIETIES) * len(FOODS)
+        rounds = -(-count // words)
+        picks = self.rng.permutation(words * rounds)[:count]
+        names = [
+            f"{FORMS[p % words // (len(VARIETIES) * len(FOODS))]} "
+            f"{VARIETIES[p // len(FOODS) % len(VARIETIES)]} {FOODS[p % len(FOODS)]}"
+            + (f" {p // words + 1}" if p >= words else "")
+            for p in picks
+        ]
+        _copy(cursor, table, ["id", "name"], ((str(first + i), n) for i, n in enumerate(names)))
+        self.setval(cursor, table)
+        self.stdout.write(f"  {count} ingredients")
+        return np.arange(first, first + count)
+
+    def copy_recipes(self, cursor, count, categories, ingredients):
+        rng = self.rng
+        table = Recipe._meta.db_table
+        first = _next_id(cursor, table)
+        ids = np.arange(first, first + count)
+
+        prep = np.round(rng.lognormal(2.5, 0.6, count))
+        cook = np.round(rng.lognormal(3.0, 0.8, count))
+        total = prep + cook
+        for column in (prep, cook, total):
+            column[rng.random(count) < 0.05] = np.nan
+        nutrition = {
+            "calories": rng.gamma(4.0, 100.0, count),
+            "fat_content": rng.gamma(2.0, 10.0, count),
+            "saturated_fat_content": rng.gamma(1.5, 4.0, count),
+            "cholesterol_content": rng.gamma(1.5, 40.0, count),
+            "sodium_content": rng.gamma(2.0, 300.0, count),
+            "carbohydrate_content": rng.gamma(2.5, 20.0, count),
+            "fiber_content": rng.gamma(1.5, 2.0, count),
+            "sugar_content": rng.gamma(1.5, 10.0, count),
+            "protein_content": rng.gamma(2.0, 10.0, count),
+        }
+        category = categories[_zipf(rng, len(categories), count)]
+        dish = rng.integers(0, len(DISHES), count)
+        adjective = rng.integers(0, len(VARIETIES), count)
+        food = rng.integers(0, len(FOODS), count)
+        n_keywords = rng.integers(0, 7, count)
+        keywords = rng.integers(0, len(KEYWORDS), (count, 6))
+        n_images = np.where(rng.random(count) < 0.8, rng.integers(1, 4, count), 0)
+        updated = _timestamps(rng, self.now, count, 365)
+
+        def rows():
+            for i in range(count):
+                images = ",".join(
+                    f"https://img.example.com/recipes/{ids[i]}/{k}.jpg" for k in range(n_images[i])
+                )
+                name = f"{VARIETIES[adjective[i]].title()} {FOODS[food[i]]} {DISHES[dish[i]]}"
+                yield (
+                    str(ids[i]), str(ids[i]), name,
+                    _float(cook[i]), _float(prep[i]), _float(total[i]), str(category[i]),
+                    *(_float(values[i]) for values in nutrition.values()),
+                    "{" + ",".join(dict.fromkeys(KEYWORDS[k] for k in keywords[i, :n_keywords[i]])) + "}",
+                    "{" + images + "}",
+                    f"Prepare the {FOODS[food[i]]}. Make the {DISHES[dish[i]]}. Serve.",
+                    "", "0", updated[i],
+                )
+
+        columns = [
+            "id", "recipe_id", "name", "cook_mins", "prep_mins", "total_mins", "category_id",
+            *nutrition, "keywords", "images", "instructions", "content_hash", "allergen_mask",
+            "updated_at",
+        ]
+        _copy(cursor, table, columns, rows())
+        self.setval(cursor, table)
+        self.stdout.write(f"  {count} recipes")
+
+        # 3–15 ingredients each, common ingredients far more often
+        per_recipe = rng.integers(3, 16, count)
+        owners = np.repeat(np.arange(count), per_recipe)
+        recipe_idx, ingredient_idx = _pairs(
+            owners, _zipf(rng, len(ingredients), len(owners)), len(ingredients)
+        )
+        quantity = rng.integers(0, len(QUANTITIES), len(recipe_idx))
+        written = _copy(
+            cursor, RecipeIngredient._meta.db_table, ["recipe_id", "ingredient_id", "quantity"],
+            (
+                (str(ids[r]), str(ingredients[g]), QUANTITIES[q])
+                for r, g, q in zip(recipe_idx, ingredient_idx, quantity)
+            ),
+        )
+        self.stdout.write(f"  {written} recipe ingredients")
+        return ids
+
+    def copy_users(self, cursor, count):
+        first = _next_id(cursor, "auth_user")
+        joined = _timestamps(self.rng, self.now, count, 3 * 365)
+        columns = [
+            "id", "password", "is_superuser", "username", "first_name", "last_name",
+            "email", "is_staff", "is_active", "date_joined",
+        ]
+        _copy(cursor, "auth_user", columns, (
+            (str(first + i), "!", "f", f"{USER_PREFIX}{first + i}", "", "", "", "f", "t", joined[i])
+            for i in range(count)
+        ))
+        self.setval(cursor, "auth_user")
+        self.stdout.write(f"  {count} users")
+        return np.arange(first, first + count)
+
+    def copy_activity(self, cursor, users, recipes, opts):
+        """Favourites, catalogs with recipes and view history; popular recipes recur."""
+        rng = self.rng
+        popular = rng.permutation(recipes)      # rank → recipe pk
+
+        def baskets(owners, mean, cap):
+            sizes = _sizes(rng, len(owners), mean, cap)
+            owner_idx = np.repeat(np.arange(len(owners)), sizes)
+            items = _zipf(rng, len(popular), len(owner_idx), s=0.8)
+            return _pairs(owner_idx, items, len(popular))
+
+        user_idx, item = baskets(users, opts["favorites_per_user"], 500)
+        stamps = _timestamps(rng, self.now, len(user_idx), 365)
+        written = _copy(
+            cursor, Favorite._meta.db_table, ["user_id", "recipe_id", "favorited_at"],
+            ((str(users[u]), str(popular[r]), t) for u, r, t in zip(user_idx, item, stamps)),
+        )
+        self.stdout.write(f"  {written} favourites")
+
+        user_idx, item = baskets(users, opts["views_per_user"], 10)
+        stamps = _timestamps(rng, self.now, len(user_idx), 30)
+        written = _copy(
+            cursor, RecipeAccess._meta.db_table, ["user_id", "recipe_id", "accessed_at"],
+            ((str(users[u]), str(popular[r]), t) for u, r, t in zip(user_idx, item, stamps)),
+        )
+        self.stdout.write(f"  {written} recent views")
+
+        table = Catalog._meta.db_table
+        first = _next_id(cursor, table)
+        per_user = _sizes(rng, len(users), opts["catalogs_per_user"], 20)
+        owners = np.repeat(users, per_user)
+        # catalog names are unique per user: "Collection 1", "Collection 2", …
+        ordinal = np.arange(len(owners)) - np.repeat(np.cumsum(per_user) - per_user, per_user) + 1
+        created = _timestamps(rng, self.now, len(owners), 365)
+        catalogs = np.arange(first, first + len(owners))
+        _copy(cursor, table, ["id", "user_id", "name", "created_at"], (
+            (str(c), str(u), f"Collection {n}", t)
+            for c, u, n, t in zip(catalogs, owners, ordinal, created)
+        ))
+        self.setval(cursor, table)
+        catalog_idx, item = baskets(catalogs, opts["recipes_per_catalog"], 200)
+        stamps = _timestamps(rng, self.now, len(catalog_idx), 365)
+        written = _copy(
+            cursor, CatalogRecipe._meta.db_table, ["catalog_id", "recipe_id", "added_at"],
+            ((str(catalogs[c]), str(popular[r]), t) for c, r, t in zip(catalog_idx, item, stamps)),
+        )
+        self.stdout.write(f"  {len(catalogs)} catalogs, {written} catalog entries")
+
+    def copy_allergies(self, cursor, users, ingredients):
+        """With Allergen rows present: map each to ~0.5% of ingredients, give 10% of users one."""
+        allergens = list(Allergen.objects.values_list("id", flat=True))
+        if not allergens:
+            return
+        rng = self.rng
+        links = [
+            (a, g) for a in allergens
+            for g in rng.choice(ingredients, max(1, len(ingredients) // 200), replace=False)
+        ]
+        _copy(
+            cursor, Allergen.ingredients.through._meta.db_table, ["allergen_id", "ingredient_id"],
+            ((str(a), str(g)) for a, g in links),
+        )
+        allergic = rng.choice(users, len(users) // 10, replace=False)
+        _copy(
+            cursor, UserAllergy._meta.db_table, ["user_id", "allergen_id"],
+            ((str(u), str(a)) for u, a in zip(allergic, rng.choice(allergens, len(allergic)))),
+        )
+        self.stdout.write(f"  {len(allergic)} users with an allergy")
+
+    def setval(self, cursor, table):
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence(%s, 'id'), (SELECT MAX(id) FROM {table}))",
+            [table],
+        )
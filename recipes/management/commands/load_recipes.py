@@ -1,10 +1,230 @@
 import csv
+import hashlib
 import json
-from django.core.management.base import BaseCommand
+import multiprocessing
+import os
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
 from recipes.models import (
     Recipe, RecipeCategory, Ingredient, RecipeIngredient,
     Catalog, CatalogRecipe
 )
+from recipes.catalog_membership import refresh_memberships
+from recipes.search_cache import search_cache
+
+# CSV column → Recipe field for the numeric nutrition columns
+NUTRITION_COLUMNS = {
+    "calories": "Calories",
+    "fat_content": "FatContent",
+    "saturated_fat_content": "SaturatedFatContent",
+    "cholesterol_content": "CholesterolContent",
+    "sodium_content": "SodiumContent",
+    "carbohydrate_content": "CarbohydrateContent",
+    "fiber_content": "FiberContent",
+    "sugar_content": "SugarContent",
+    "protein_content": "ProteinContent",
+}
+
+# Recipe fields rewritten when an incremental import sees a changed row
+UPSERT_FIELDS = [
+    "name", "cook_mins", "prep_mins", "total_mins", "category",
+    "keywords", "images", "instructions", "content_hash", "updated_at",
+    *NUTRITION_COLUMNS,
+]
+
+# name → id caches, one pair per process (workers fill their own)
+_CATEGORY_IDS = {}
+_INGREDIENT_IDS = {}
+
+FINGERPRINT_BYTES = 1 << 20     # head of the file hashed into a checkpoint
+
+
+def _num(value):
+    return float(value) if value not in (None, "") else None
+
+
+def _row_hash(row):
+    return hashlib.sha1(
+        json.dumps(row, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+
+def _recipe_fields(row, category_id):
+    """Map one CSV row onto Recipe field values (everything but recipe_id)."""
+    fields = {
+        "content_hash": _row_hash(row),
+        "name": row["Name"],
+        "cook_mins": _num(row["CookMins"]),
+        "prep_mins": _num(row["PrepMins"]),
+        "total_mins": _num(row["TotalMins"]),
+        "category_id": category_id,
+        "keywords": json.loads(row["Keywords"] or "[]"),
+        "images": json.loads(row["Images"] or "[]"),
+        "instructions": row["RecipeInstructions"],
+    }
+    for field, column in NUTRITION_COLUMNS.items():
+        fields[field] = _num(row[column])
+    return fields
+
+
+def _fingerprint(path):
+    """What a checkpoint must match to resume: size, mtime and a hash of the head."""
+    stat = os.stat(path)
+    with open(path, "rb") as fh:
+        head = hashlib.sha1(fh.read(FINGERPRINT_BYTES)).hexdigest()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "head": head}
+
+
+def _resolve_names(model, names, cache):
+    """
+    Fill `cache` (name → id) for every name, creating the missing rows with a
+    single conflict-ignoring INSERT and reading their ids back in one SELECT.
+    Safe to run from several workers at once.
+    """
+    missing = {n for n in names if n not in cache}
+    if missing:
+        # sorted: workers take the unique-index locks in the same order, so
+        # overlapping inserts wait on each other instead of deadlocking
+        model.objects.bulk_create(
+            [model(name=n) for n in sorted(missing)], ignore_conflicts=True
+        )
+        cache.update(
+            model.objects.filter(name__in=missing).values_list("name", "id")
+        )
+
+
+def _parse_chunk(rows):
+    """
+    Key a chunk of CSV rows by recipe_id as (row, [(ingredient, qty), …]) and
+    make sure every category and ingredient it mentions has an id.
+    """
+    _resolve_names(RecipeCategory, {r["RecipeCategory"] for r in rows}, _CATEGORY_IDS)
+
+    parsed = {}
+    for row in rows:
+        ingredients = json.loads(row["IngredientList"] or "[]")
+        quantities = json.loads(row["Quantities"] or "[]")
+        parsed[int(row["RecipeId"])] = (row, list(zip(ingredients, quantities)))
+
+    _resolve_names(
+        Ingredient,
+        {name for _, pairs in parsed.values() for name, _ in pairs},
+        _INGREDIENT_IDS,
+    )
+    return parsed
+
+
+def _ingest_chunk(rows):
+    """
+    Write one chunk of CSV rows: ~5 queries per chunk instead of several per
+    row. Recipes that already exist are skipped, like the row-by-row import.
+    Returns the number of recipes created.
+    """
+    parsed = _parse_chunk(rows)
+
+    with transaction.atomic():
+        existing = set(
+            Recipe.objects.filter(recipe_id__in=parsed)
+            .values_list("recipe_id", flat=True)
+        )
+        recipes = Recipe.objects.bulk_create([
+            Recipe(
+                recipe_id=rid,
+                **_recipe_fields(row, _CATEGORY_IDS[row["RecipeCategory"]]),
+            )
+            for rid, (row, _) in parsed.items()
+            if rid not in existing
+        ])
+        RecipeIngredient.objects.bulk_create([
+            RecipeIngredient(
+                recipe_id=recipe.pk,
+                ingredient_id=_INGREDIENT_IDS[name],
+                quantity=qty,
+            )
+            for recipe in recipes
+            for name, qty in parsed[recipe.recipe_id][1]
+        ])
+        refresh_memberships([recipe.pk for recipe in recipes])
+    return len(recipes)
+
+
+def _upsert_chunk(rows):
+    """
+    Insert new recipes and update those whose row hash changed, with one
+    INSERT … ON CONFLICT (recipe_id) DO UPDATE. Ingredient links are rewritten
+    only for those recipes. Returns the number of recipes written.
+    """
+    parsed = _parse_chunk(rows)
+
+    with transaction.atomic():
+        stored = dict(
+            Recipe.objects.filter(recipe_id__in=parsed)
+            .values_list("recipe_id", "content_hash")
+        )
+        changed = [
+            Recipe(
+                recipe_id=rid,
+                **_recipe_fields(row, _CATEGORY_IDS[row["RecipeCategory"]]),
+            )
+            for rid, (row, _) in parsed.items()
+        ]
+        changed = [r for r in changed if stored.get(r.recipe_id) != r.content_hash]
+        if not changed:
+            return 0
+
+        Recipe.objects.bulk_create(
+            changed,
+            update_conflicts=True,
+            unique_fields=["recipe_id"],
+            update_fields=UPSERT_FIELDS,
+        )
+        pks = dict(
+            Recipe.objects.filter(recipe_id__in=[r.recipe_id for r in changed])
+            .values_list("recipe_id", "id")
+        )
+        RecipeIngredient.objects.filter(recipe_id__in=pks.values()).delete()
+        RecipeIngredient.objects.bulk_create([
+            RecipeIngredient(
+                recipe_id=pks[rid],
+                ingredient_id=_INGREDIENT_IDS[name],
+                quantity=qty,
+            )
+            for rid in pks
+            for name, qty in parsed[rid][1]
+        ])
+        refresh_memberships(list(pks.values()))
+    return len(changed)
+
+
+def _chunks(reader, size):
+    while True:
+        chunk = list(islice(reader, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _rows_with_offsets(csvfile, start):
+    """
+    Yield (row, byte offset just past that row) from a binary CSV file,
+    starting at `start` (0 = first data row). The csv reader pulls one line
+    at a time, so the file position after each row is exactly its end.
+    """
+    header = next(csv.reader([csvfile.readline().decode("utf-8-sig")]))
+    if start:
+        csvfile.seek(start)
+    lines = (line.decode("utf-8") for line in iter(csvfile.readline, b""))
+    for row in csv.DictReader(lines, fieldnames=header):
+        yield row, csvfile.tell()
+
+
+def _offset_chunks(rows, size):
+    """Group (row, offset) pairs into (rows, offset after the last row)."""
+    for chunk in _chunks(rows, size):
+        yield [row for row, _ in chunk], chunk[-1][1]
+
 
 class Command(BaseCommand):
     help = "Load recipes from a CSV file"
@@ -16,9 +236,53 @@ class Command(BaseCommand):
             required=True,
             help="Path to the CSV file"
         )
+        parser.add_argument(
+            "--bulk",
+            action="store_true",
+            help="Stream the CSV in chunks and write each chunk with bulk_create"
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Rows per bulk chunk (default: 2000)"
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Processes writing chunks in parallel; implies --bulk"
+        )
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="Upsert only new or changed rows and resume from the last checkpoint"
+        )
+        parser.add_argument(
+            "--checkpoint",
+            type=str,
+            help="Checkpoint file for --incremental (default: <path>.checkpoint)"
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Ignore an existing checkpoint and read the file from the start"
+        )
 
     def handle(self, *args, **options):
         path = options["path"]
+        if options["incremental"]:
+            if options["workers"] > 1:
+                raise CommandError("--incremental runs in a single process")
+            return self.handle_incremental(
+                path,
+                options["chunk_size"],
+                options["checkpoint"] or f"{path}.checkpoint",
+                options["restart"],
+            )
+        if options["bulk"] or options["workers"] > 1:
+            return self.handle_bulk(path, options["chunk_size"], options["workers"])
+
         with open(path, newline='', encoding='utf-8') as csvfile:
             reader = csv.DictReader(csvfile)
             self.stdout.write(f"Loading recipes from {path}...")
@@ -58,3 +322,61 @@ class Command(BaseCommand):
                     )
 
             self.stdout.write(self.style.SUCCESS("Import complete!"))
+
+    def handle_bulk(self, path, chunk_size, workers):
+        created = 0
+        with open(path, newline='', encoding='utf-8') as csvfile:
+            chunks = _chunks(csv.DictReader(csvfile), chunk_size)
+            self.stdout.write(
+                f"Bulk loading recipes from {path} "
+                f"({chunk_size} rows/chunk, {workers} worker(s))..."
+            )
+            if workers > 1:
+                # forked children must not share the parent's DB socket
+                connections.close_all()
+                ctx = multiprocessing.get_context("fork")
+                with ctx.Pool(workers) as pool:
+                    for n in pool.imap_unordered(_ingest_chunk, chunks):
+                        created += n
+            else:
+                for chunk in chunks:
+                    created += _ingest_chunk(chunk)
+
+        if created:
+            # bulk_create sends no post_save, so invalidate search results here
+            search_cache.bump_version()
+        self.stdout.write(self.style.SUCCESS(f"Import complete! {created} recipes created."))
+
+    def handle_incremental(self, path, chunk_size, checkpoint, restart):
+        offset = 0
+        fingerprint = _fingerprint(path)
+        if not restart and os.path.exists(checkpoint):
+            with open(checkpoint, encoding="utf-8") as fh:
+                state = json.load(fh)
+            # a checkpoint is only valid for the file it was written against
+            if state.get("file") == fingerprint:
+                offset = state["offset"]
+            else:
+                self.stdout.write(self.style.WARNING(
+                    f"{checkpoint} was written for a different file; starting over."
+                ))
+
+        written = 0
+        with open(path, "rb") as csvfile:
+            if offset:
+                self.stdout.write(f"Resuming {path} at byte {offset}...")
+            else:
+                self.stdout.write(f"Incrementally loading recipes from {path}...")
+            rows = _rows_with_offsets(csvfile, offset)
+            for chunk, end in _offset_chunks(rows, chunk_size):
+                written += _upsert_chunk(chunk)
+                with open(checkpoint, "w", encoding="utf-8") as fh:
+                    json.dump({"offset": end, "file": fingerprint}, fh)
+
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        if written:
+            search_cache.bump_version()
+        self.stdout.write(self.style.SUCCESS(
+            f"Import complete! {written} recipes inserted or updated."
+        ))
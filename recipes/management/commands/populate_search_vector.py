@@ -1,23 +1,49 @@
 from django.core.management.base import BaseCommand
-from django.contrib.postgres.search import SearchVector
-from django.db import models
-from ...models import Catalog, CatalogRecipe, Recipe
+from django.db import connection, transaction
+from django.db.models import Max, Min
+from ...models import Recipe
+
+# One set-based UPDATE per id range. Ingredient names are aggregated per
+# recipe in the FROM subquery; the vector itself comes from
+# recipes_search_vector() (migration 0006), the same function the triggers use.
+REBUILD_SQL = """
+UPDATE recipes_recipe AS r
+SET search_vector = recipes_search_vector(r.name, r.keywords, agg.names)
+FROM (
+    SELECT r2.id, string_agg(i.name, ' ') AS names
+    FROM recipes_recipe r2
+    LEFT JOIN recipes_recipeingredient ri ON ri.recipe_id = r2.id
+    LEFT JOIN recipes_ingredient i ON i.id = ri.ingredient_id
+    WHERE r2.id >= %s AND r2.id < %s
+    GROUP BY r2.id
+) AS agg
+WHERE r.id = agg.id
+"""
+
 
 class Command(BaseCommand):
-    help = "Populate the search_vector field for all recipes"
+    help = "Rebuild the search_vector field for all recipes"
 
-    def handle(self, *args, **kwargs):
-        recipes = Recipe.objects.prefetch_related('ingredients').all()
-        count = 0
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10000,
+            help="Recipe ids per UPDATE (default: 10000)"
+        )
 
-        for recipe in recipes:
-            ingredient_names = " ".join([ing.name for ing in recipe.ingredients.all()])
-            recipe.search_vector = (
-                SearchVector('name', weight='A') +
-                SearchVector('keywords', weight='B') +
-                SearchVector(models.Value(ingredient_names), config='english')
-            )
-            recipe.save(update_fields=['search_vector'])
-            count += 1
+    def handle(self, *args, **options):
+        batch = options["batch_size"]
+        bounds = Recipe.objects.aggregate(lo=Min("id"), hi=Max("id"))
+        if bounds["lo"] is None:
+            self.stdout.write("No recipes to index.")
+            return
+
+        count = 0
+        with connection.cursor() as cursor:
+            for start in range(bounds["lo"], bounds["hi"] + 1, batch):
+                with transaction.atomic():
+                    cursor.execute(REBUILD_SQL, [start, start + batch])
+                    count += cursor.rowcount
 
         self.stdout.write(self.style.SUCCESS(f"Updated search_vector for {count} recipes."))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from ...allergens import refresh_all_masks
+
+
+class Command(BaseCommand):
+    help = "Recompute Recipe.allergen_mask for every recipe"
+
+    def handle(self, *args, **options):
+        count = refresh_all_masks()
+        self.stdout.write(self.style.SUCCESS(f"Updated allergen_mask for {count} recipes."))
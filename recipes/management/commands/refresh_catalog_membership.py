@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from ...catalog_membership import refresh_catalog
+from ...models import PredefinedCatalog
+
+
+class Command(BaseCommand):
+    help = "Rebuild the materialized recipe membership of every predefined catalog"
+
+    def handle(self, *args, **options):
+        for catalog in PredefinedCatalog.objects.all():
+            refresh_catalog(catalog)
+            catalog.refresh_from_db(fields=["member_count"])
+            self.stdout.write(f"  - {catalog.name}: {catalog.member_count} recipes")
+        self.stdout.write(self.style.SUCCESS("Predefined catalog membership refreshed."))
@@ -0,0 +1,129 @@
+# recipes/middleware.py
+"""
+Middleware. Each class works in both the WSGI (sync) and ASGI (async)
+stacks without forcing a thread hop on the latter.
+"""
+import random
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.functional import SimpleLazyObject
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from . import replicas, sql_stats
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoiseMiddleware is sync-only, so under ASGI Django would run it –
+    and everything below it in MIDDLEWARE, views included – in a worker
+    thread. This keeps the chain async: static files are still opened and
+    served in a thread, everything else is passed straight on.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:            # walks the static dirs
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
+
+
+class ReplicaPinMiddleware:
+    """
+    Pins an API user's reads to the primary after a successful write
+    (replicas.py). Not loaded when no replica is configured.
+    """
+    sync_capable = True
+    async_capable = True
+    safe_methods = ("GET", "HEAD", "OPTIONS", "TRACE")
+
+    def __init__(self, get_response):
+        if not replicas.REPLICAS:
+            raise MiddlewareNotUsed
+        replicas.check_pin_cache()
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def writer(self, request, response):
+        """The id of the user who just wrote, if any."""
+        if request.method in self.safe_methods or response.status_code >= 400:
+            return None
+        # DRF replaces the session user with the token's; a session user is
+        # left alone (evaluating it would query, and it never reads replicas)
+        user = getattr(request, "user", None)
+        if user is None or isinstance(user, SimpleLazyObject) or not user.is_authenticated:
+            return None
+        return user.id
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        response = self.get_response(request)
+        user_id = self.writer(request, response)
+        if user_id is not None:
+            replicas.pin(user_id)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        user_id = self.writer(request, response)
+        if user_id is not None:
+            await replicas.apin(user_id)
+        return response
+
+
+class SQLStatsMiddleware:
+    """
+    Query count, DB time and repeated SQL shapes for a sample of requests:
+    Server-Timing header plus the slow-request log (sql_stats.py). Not
+    loaded when SQL_STATS["SAMPLE_RATE"] is 0.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.rate = sql_stats.conf["SAMPLE_RATE"]
+        if not self.rate:
+            raise MiddlewareNotUsed
+        sql_stats.install()
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if random.random() >= self.rate:
+            return self.get_response(request)
+        stats, token = sql_stats.start()
+        response = self.get_response(request)
+        sql_stats.finish(stats, token, request, response)
+        return response
+
+    async def __acall__(self, request):
+        if random.random() >= self.rate:
+            return await self.get_response(request)
+        stats, token = sql_stats.start()
+        response = await self.get_response(request)
+        sql_stats.finish(stats, token, request, response)
+        return response
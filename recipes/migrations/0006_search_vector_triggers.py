@@ -0,0 +1,101 @@
+from django.db import migrations
+
+# Keeps Recipe.search_vector current without rerunning populate_search_vector:
+#  • recipes_search_vector()  – the one definition of the vector
+#                               (name → A, keywords → B, ingredient names)
+#  • BEFORE INSERT/UPDATE OF name, keywords on recipes_recipe
+#  • statement-level AFTER triggers on recipes_recipeingredient, refreshing
+#    each affected recipe once per statement (bulk_create friendly)
+
+FORWARD_SQL = """
+CREATE OR REPLACE FUNCTION recipes_search_vector(
+    r_name text, r_keywords varchar[], ingredient_names text
+) RETURNS tsvector LANGUAGE sql STABLE AS $$
+    SELECT setweight(to_tsvector(COALESCE(r_name, '')), 'A')
+        || setweight(to_tsvector(COALESCE(array_to_string(r_keywords, ' '), '')), 'B')
+        || to_tsvector('english'::regconfig, COALESCE(ingredient_names, ''));
+$$;
+
+CREATE OR REPLACE FUNCTION recipes_ingredient_names(r_id bigint)
+RETURNS text LANGUAGE sql STABLE AS $$
+    SELECT string_agg(i.name, ' ')
+    FROM recipes_recipeingredient ri
+    JOIN recipes_ingredient i ON i.id = ri.ingredient_id
+    WHERE ri.recipe_id = r_id;
+$$;
+
+CREATE OR REPLACE FUNCTION recipes_recipe_search_vector_trg()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.search_vector := recipes_search_vector(
+        NEW.name, NEW.keywords, recipes_ingredient_names(NEW.id)
+    );
+    RETURN NEW;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION recipes_recipeingredient_search_vector_trg()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE recipes_recipe r
+        SET search_vector = recipes_search_vector(
+            r.name, r.keywords, recipes_ingredient_names(r.id))
+        WHERE r.id IN (SELECT recipe_id FROM new_rows);
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE recipes_recipe r
+        SET search_vector = recipes_search_vector(
+            r.name, r.keywords, recipes_ingredient_names(r.id))
+        WHERE r.id IN (SELECT recipe_id FROM old_rows);
+    ELSE
+        UPDATE recipes_recipe r
+        SET search_vector = recipes_search_vector(
+            r.name, r.keywords, recipes_ingredient_names(r.id))
+        WHERE r.id IN (SELECT recipe_id FROM new_rows
+                       UNION SELECT recipe_id FROM old_rows);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER recipes_recipe_search_vector
+    BEFORE INSERT OR UPDATE OF name, keywords ON recipes_recipe
+    FOR EACH ROW EXECUTE FUNCTION recipes_recipe_search_vector_trg();
+
+CREATE TRIGGER recipes_recipeingredient_search_vector_ins
+    AFTER INSERT ON recipes_recipeingredient
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION recipes_recipeingredient_search_vector_trg();
+
+CREATE TRIGGER recipes_recipeingredient_search_vector_upd
+    AFTER UPDATE ON recipes_recipeingredient
+    REFERENCING NEW TABLE AS new_rows OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION recipes_recipeingredient_search_vector_trg();
+
+CREATE TRIGGER recipes_recipeingredient_search_vector_del
+    AFTER DELETE ON recipes_recipeingredient
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION recipes_recipeingredient_search_vector_trg();
+"""
+
+REVERSE_SQL = """
+DROP TRIGGER IF EXISTS recipes_recipeingredient_search_vector_del ON recipes_recipeingredient;
+DROP TRIGGER IF EXISTS recipes_recipeingredient_search_vector_upd ON recipes_recipeingredient;
+DROP TRIGGER IF EXISTS recipes_recipeingredient_search_vector_ins ON recipes_recipeingredient;
+DROP TRIGGER IF EXISTS recipes_recipe_search_vector ON recipes_recipe;
+DROP FUNCTION IF EXISTS recipes_recipeingredient_search_vector_trg();
+DROP FUNCTION IF EXISTS recipes_recipe_search_vector_trg();
+DROP FUNCTION IF EXISTS recipes_ingredient_names(bigint);
+DROP FUNCTION IF EXISTS recipes_search_vector(text, varchar[], text);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_recipe_content_hash'),
+    ]
+
+    operations = [
+        migrations.RunSQL(FORWARD_SQL, REVERSE_SQL),
+    ]
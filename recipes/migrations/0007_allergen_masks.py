@@ -0,0 +1,123 @@
+# Generated by Django 4.2.20 on 2026-10-18 02:38
+
+from django.db import migrations, models
+
+# Recipe.allergen_mask = OR of (1 << Allergen.bit) over the allergens mapped
+# to the recipe's ingredients. Statement-level triggers on the ingredient
+# links and on the allergen → ingredient mapping recompute it for just the
+# affected recipes.
+
+FORWARD_SQL = """
+CREATE OR REPLACE FUNCTION recipes_allergen_mask(r_id bigint)
+RETURNS bigint LANGUAGE sql STABLE AS $$
+    SELECT COALESCE(bit_or(1::bigint << a.bit), 0)
+    FROM recipes_recipeingredient ri
+    JOIN recipes_allergen_ingredients ai ON ai.ingredient_id = ri.ingredient_id
+    JOIN recipes_allergen a ON a.id = ai.allergen_id
+    WHERE ri.recipe_id = r_id;
+$$;
+
+CREATE OR REPLACE FUNCTION recipes_recipeingredient_allergen_mask_trg()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE recipes_recipe r SET allergen_mask = recipes_allergen_mask(r.id)
+        WHERE r.id IN (SELECT recipe_id FROM new_rows);
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE recipes_recipe r SET allergen_mask = recipes_allergen_mask(r.id)
+        WHERE r.id IN (SELECT recipe_id FROM old_rows);
+    ELSE
+        UPDATE recipes_recipe r SET allergen_mask = recipes_allergen_mask(r.id)
+        WHERE r.id IN (SELECT recipe_id FROM new_rows
+                       UNION SELECT recipe_id FROM old_rows);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION recipes_allergen_ingredients_mask_trg()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE recipes_recipe r SET allergen_mask = recipes_allergen_mask(r.id)
+        WHERE r.id IN (SELECT ri.recipe_id FROM recipes_recipeingredient ri
+                       JOIN new_rows n ON n.ingredient_id = ri.ingredient_id);
+    ELSE
+        UPDATE recipes_recipe r SET allergen_mask = recipes_allergen_mask(r.id)
+        WHERE r.id IN (SELECT ri.recipe_id FROM recipes_recipeingredient ri
+                       JOIN old_rows o ON o.ingredient_id = ri.ingredient_id);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER recipes_recipeingredient_allergen_mask_ins
+    AFTER INSERT ON recipes_recipeingredient
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION recipes_recipeingredient_allergen_mask_trg();
+
+CREATE TRIGGER recipes_recipeingredient_allergen_mask_upd
+    AFTER UPDATE ON recipes_recipeingredient
+    REFERENCING NEW TABLE AS new_rows OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION recipes_recipeingredient_allergen_mask_trg();
+
+CREATE TRIGGER recipes_recipeingredient_allergen_mask_del
+    AFTER DELETE ON recipes_recipeingredient
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION recipes_recipeingredient_allergen_mask_trg();
+
+CREATE TRIGGER recipes_allergen_ingredients_mask_ins
+    AFTER INSERT ON recipes_allergen_ingredients
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION recipes_allergen_ingredients_mask_trg();
+
+CREATE TRIGGER recipes_allergen_ingredients_mask_del
+    AFTER DELETE ON recipes_allergen_ingredients
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION recipes_allergen_ingredients_mask_trg();
+"""
+
+REVERSE_SQL = """
+DROP TRIGGER IF EXISTS recipes_allergen_ingredients_mask_del ON recipes_allergen_ingredients;
+DROP TRIGGER IF EXISTS recipes_allergen_ingredients_mask_ins ON recipes_allergen_ingredients;
+DROP TRIGGER IF EXISTS recipes_recipeingredient_allergen_mask_del ON recipes_recipeingredient;
+DROP TRIGGER IF EXISTS recipes_recipeingredient_allergen_mask_upd ON recipes_recipeingredient;
+DROP TRIGGER IF EXISTS recipes_recipeingredient_allergen_mask_ins ON recipes_recipeingredient;
+DROP FUNCTION IF EXISTS recipes_allergen_ingredients_mask_trg();
+DROP FUNCTION IF EXISTS recipes_recipeingredient_allergen_mask_trg();
+DROP FUNCTION IF EXISTS recipes_allergen_mask(bigint);
+"""
+
+
+def assign_bits(apps, schema_editor):
+    Allergen = apps.get_model('recipes', 'Allergen')
+    for bit, allergen in enumerate(Allergen.objects.order_by('id')[:63]):
+        allergen.bit = bit
+        allergen.save(update_fields=['bit'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_search_vector_triggers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='allergen',
+            name='bit',
+            field=models.PositiveSmallIntegerField(editable=False, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='allergen',
+            name='ingredients',
+            field=models.ManyToManyField(blank=True, related_name='allergens', to='recipes.ingredient'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='allergen_mask',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(assign_bits, migrations.RunPython.noop),
+        migrations.RunSQL(FORWARD_SQL, REVERSE_SQL),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.20 on 2026-10-18 02:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_allergen_masks'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='favorite',
+            index=models.Index(fields=['user', 'favorited_at', 'recipe'], name='recipes_fav_user_id_ffc22a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['total_mins', 'id'], name='recipes_rec_total_m_1ed313_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.20 on 2026-10-18 02:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='predefinedcatalog',
+            name='member_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='PredefinedCatalogRecipe',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sort_key', models.FloatField()),
+                ('catalog', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='recipes.predefinedcatalog')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='recipes.recipe')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['catalog', 'sort_key', 'recipe'], name='recipes_pre_catalog_e1240e_idx')],
+                'unique_together': {('catalog', 'recipe')},
+            },
+        ),
+    ]
@@ -0,0 +1,137 @@
+# Generated by Django 4.2.20 on 2026-10-18 03:10
+
+from django.db import migrations, models
+import django.utils.timezone
+
+# ETags for the read-only endpoints (recipes/conditional.py).
+#
+# recipes_corpus_version is bumped once per statement that writes any table
+# a recipe or predefined-catalog response is built from; list ETags read its
+# last_value. A sequence rather than a counter row, so concurrent loaders
+# never queue on a lock.
+#
+# Recipe.updated_at is auto_now for ORM writes; the triggers below also move
+# it when a recipe's ingredient links or an ingredient's name change, so the
+# detail ETag covers the nested ingredients.
+
+CORPUS_TABLES = (
+    'recipes_recipe',
+    'recipes_recipeingredient',
+    'recipes_ingredient',
+    'recipes_recipecategory',
+    'recipes_predefinedcatalogtype',
+    'recipes_predefinedcatalog',
+    'recipes_predefinedcatalogrecipe',
+)
+
+FORWARD_SQL = """
+CREATE SEQUENCE IF NOT EXISTS recipes_corpus_version;
+
+CREATE OR REPLACE FUNCTION recipes_corpus_version_trg()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM nextval('recipes_corpus_version');
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION recipes_recipeingredient_touch_trg()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE recipes_recipe SET updated_at = now()
+        WHERE id IN (SELECT recipe_id FROM new_rows);
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE recipes_recipe SET updated_at = now()
+        WHERE id IN (SELECT recipe_id FROM old_rows);
+    ELSE
+        UPDATE recipes_recipe SET updated_at = now()
+        WHERE id IN (SELECT recipe_id FROM new_rows
+                     UNION SELECT recipe_id FROM old_rows);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION recipes_ingredient_touch_trg()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE recipes_recipe SET updated_at = now()
+    WHERE id IN (SELECT ri.recipe_id FROM recipes_recipeingredient ri
+                 JOIN new_rows n ON n.id = ri.ingredient_id
+                 JOIN old_rows o ON o.id = n.id
+                 WHERE n.name IS DISTINCT FROM o.name);
+    RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER recipes_recipeingredient_touch_ins
+    AFTER INSERT ON recipes_recipeingredient
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION recipes_recipeingredient_touch_trg();
+
+CREATE TRIGGER recipes_recipeingredient_touch_upd
+    AFTER UPDATE ON recipes_recipeingredient
+    REFERENCING NEW TABLE AS new_rows OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION recipes_recipeingredient_touch_trg();
+
+CREATE TRIGGER recipes_recipeingredient_touch_del
+    AFTER DELETE ON recipes_recipeingredient
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION recipes_recipeingredient_touch_trg();
+
+CREATE TRIGGER recipes_ingredient_touch_upd
+    AFTER UPDATE ON recipes_ingredient
+    REFERENCING NEW TABLE AS new_rows OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION recipes_ingredient_touch_trg();
+""" + "".join(
+    f"""
+CREATE TRIGGER {table}_corpus_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+    FOR EACH STATEMENT EXECUTE FUNCTION recipes_corpus_version_trg();
+"""
+    for table in CORPUS_TABLES
+)
+
+REVERSE_SQL = "".join(
+    f"DROP TRIGGER IF EXISTS {table}_corpus_version ON {table};\n"
+    for table in CORPUS_TABLES
+) + """
+DROP TRIGGER IF EXISTS recipes_ingredient_touch_upd ON recipes_ingredient;
+DROP TRIGGER IF EXISTS recipes_recipeingredient_touch_del ON recipes_recipeingredient;
+DROP TRIGGER IF EXISTS recipes_recipeingredient_touch_upd ON recipes_recipeingredient;
+DROP TRIGGER IF EXISTS recipes_recipeingredient_touch_ins ON recipes_recipeingredient;
+DROP FUNCTION IF EXISTS recipes_ingredient_touch_trg();
+DROP FUNCTION IF EXISTS recipes_recipeingredient_touch_trg();
+DROP FUNCTION IF EXISTS recipes_corpus_version_trg();
+DROP SEQUENCE IF EXISTS recipes_corpus_version;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_predefined_catalog_membership'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='predefinedcatalogtype',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='predefinedcatalog',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunSQL(FORWARD_SQL, REVERSE_SQL),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.20 on 2026-10-18 02:51
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_conditional_get'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeNeighbors',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='neighbors', serialize=False, to='recipes.recipe')),
+                ('neighbor_ids', django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), default=list, size=None)),
+                ('scores', django.contrib.postgres.fields.ArrayField(base_field=models.FloatField(), default=list, size=None)),
+                ('computed_at', models.DateTimeField()),
+            ],
+        ),
+    ]
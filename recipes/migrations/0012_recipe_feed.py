@@ -0,0 +1,40 @@
+# Generated by Django 4.2.20 on 2026-10-18 02:52
+
+from django.conf import settings
+import django.contrib.postgres.fields
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('recipes', '0011_recipe_neighbors'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserFeed',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='feed', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('recipe_ids', django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), default=list, size=None)),
+                ('generation', models.PositiveIntegerField(default=0)),
+                ('built_generation', models.PositiveIntegerField(null=True)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RecipePair',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.IntegerField()),
+                ('other', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='recipes.recipe')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='recipes.recipe')),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('recipe', models.F('other'))), fields=['-count', 'recipe'], name='recipes_pair_popular_idx')],
+                'unique_together': {('recipe', 'other')},
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.20 on 2026-10-18 02:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0012_recipe_feed'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='catalogrecipe',
+            index=models.Index(fields=['catalog', 'added_at', 'recipe'], name='recipes_cat_catalog_bde37e_idx'),
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 4.2.20 on 2026-10-18 09:40
+
+from django.db import migrations
+
+# The corpus version (recipes/conditional.py) moves from a sequence to
+# counter rows. nextval() is not transactional: the version moved when a
+# write ran, not when it committed, so a request served while a load was
+# still open paired the new ETag with the old body and kept it after the
+# commit. It also reached streaming replicas only every 32 calls.
+#
+# A counter row is bumped inside the writing transaction and read under
+# MVCC, so the version a reader sees always matches the rows it sees, on
+# the primary and on replicas alike. Writers bump the slot of their own
+# backend (one of SLOTS rows), so concurrent loaders rarely wait on the
+# same row lock; the version is the sum of the slots.
+
+SLOTS = 16
+
+FORWARD_SQL = f"""
+CREATE TABLE recipes_corpus_version_slot (
+    slot  smallint PRIMARY KEY,
+    value bigint NOT NULL
+);
+INSERT INTO recipes_corpus_version_slot (slot, value)
+SELECT s, CASE WHEN s = 0 THEN (SELECT last_value FROM recipes_corpus_version) ELSE 0 END
+FROM generate_series(0, {SLOTS - 1}) AS s;
+
+CREATE OR REPLACE FUNCTION recipes_bump_corpus_version()
+RETURNS void LANGUAGE sql AS $$
+    UPDATE recipes_corpus_version_slot SET value = value + 1
+    WHERE slot = pg_backend_pid() % {SLOTS};
+$$;
+
+CREATE OR REPLACE FUNCTION recipes_corpus_version_trg()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM recipes_bump_corpus_version();
+    RETURN NULL;
+END;
+$$;
+
+DROP SEQUENCE recipes_corpus_version;
+"""
+
+REVERSE_SQL = """
+CREATE SEQUENCE recipes_corpus_version;
+SELECT setval('recipes_corpus_version', GREATEST(sum(value), 1)) FROM recipes_corpus_version_slot;
+
+CREATE OR REPLACE FUNCTION recipes_corpus_version_trg()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM nextval('recipes_corpus_version');
+    RETURN NULL;
+END;
+$$;
+
+DROP FUNCTION IF EXISTS recipes_bump_corpus_version();
+DROP TABLE IF EXISTS recipes_corpus_version_slot;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0013_catalog_recipe_added_index'),
+    ]
+
+    operations = [
+        migrations.RunSQL(FORWARD_SQL, REVERSE_SQL),
+    ]
@@ -79,10 +79,18 @@ class Recipe(models.Model):
     )
     # Full-text search vector field
     search_vector = SearchVectorField(null=True, editable=False)
+    # SHA-1 of the source CSV row, used by `load_recipes --incremental`
+    content_hash = models.CharField(max_length=40, blank=True, editable=False)
+    # OR of Allergen.bit over the recipe's ingredients (maintained by triggers)
+    allergen_mask = models.BigIntegerField(default=0, editable=False)
+    # drives ETag / Last-Modified on /api/recipes/<recipe_id>/
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         indexes = [
             GinIndex(fields=['search_vector']),
+            # keyset pagination order (RecipePagination)
+            models.Index(fields=['total_mins', 'id']),
         ]
 
     def __str__(self):
@@ -144,6 +152,10 @@ class CatalogRecipe(models.Model):
 
     class Meta:
         unique_together = ('catalog', 'recipe')
+        indexes = [
+            # keyset pagination order (CatalogRecipePagination)
+            models.Index(fields=['catalog', 'added_at', 'recipe']),
+        ]
 
     def __str__(self):
         return f"{self.recipe.name} in {self.catalog.name}"
@@ -166,6 +178,10 @@ class Favorite(models.Model):
 
     class Meta:
         unique_together = ('user', 'recipe')
+        indexes = [
+            # keyset pagination order (FavoritePagination)
+            models.Index(fields=['user', 'favorited_at', 'recipe']),
+        ]
 
     def __str__(self):
         return f"{self.user.username} favorited {self.recipe.name}"
@@ -188,7 +204,25 @@ class Allergen(models.Model):
     """
     Predefined list of possible allergens (e.g., "Peanuts").
     """
+    MAX_BITS = 63       # Recipe.allergen_mask is a signed bigint
+
     name = models.CharField(max_length=100, unique=True)
+    # position of this allergen in Recipe.allergen_mask
+    bit = models.PositiveSmallIntegerField(unique=True, null=True, editable=False)
+    ingredients = models.ManyToManyField(
+        Ingredient,
+        related_name='allergens',
+        blank=True
+    )
+
+    def save(self, *args, **kwargs):
+        if self.bit is None:
+            used = set(Allergen.objects.exclude(bit=None).values_list("bit", flat=True))
+            free = [b for b in range(self.MAX_BITS) if b not in used]
+            if not free:
+                raise ValueError(f"At most {self.MAX_BITS} allergens are supported")
+            self.bit = free[0]
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.name
@@ -221,6 +255,7 @@ class PredefinedCatalogType(models.Model):
     Groups predefined catalogs under a common type (e.g., "Meal Type").
     """
     name = models.CharField(max_length=255, unique=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
@@ -240,9 +275,114 @@ class PredefinedCatalog(models.Model):
         default=dict,
         help_text='Django ORM filter kwargs for this catalog'
     )
+    # cached size of the materialized membership (catalog_membership.py)
+    member_count = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ('type', 'name')
 
     def __str__(self):
         return f"{self.name} ({self.type.name})"
+
+
+class PredefinedCatalogRecipe(models.Model):
+    """
+    Materialized membership of a predefined catalog: one row per recipe
+    matching its filter_criteria, with the key the catalog is browsed by.
+    """
+    catalog = models.ForeignKey(
+        PredefinedCatalog,
+        on_delete=models.CASCADE,
+        related_name='memberships'
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE
+    )
+    sort_key = models.FloatField()
+
+    class Meta:
+        unique_together = ('catalog', 'recipe')
+        indexes = [
+            models.Index(fields=['catalog', 'sort_key', 'recipe']),
+        ]
+
+    def __str__(self):
+        return f"{self.recipe.name} in {self.catalog.name}"
+
+
+class RecipeNeighbors(models.Model):
+    """
+    Precomputed "more like this" list for one recipe (similar.py): the most
+    similar recipes by TF-IDF cosine over ingredients and keywords.
+    """
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='neighbors'
+    )
+    # Recipe pks, most similar first, with their cosine scores
+    neighbor_ids = ArrayField(models.BigIntegerField(), default=list)
+    scores = ArrayField(models.FloatField(), default=list)
+    # recipes updated after this are recomputed by build_similar_recipes
+    computed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Neighbours of {self.recipe_id}"
+
+
+class RecipePair(models.Model):
+    """
+    Item-item co-occurrence for the feed (feed.py): in how many baskets (a
+    user's favourites, a user catalog) both recipes appear. Stored in both
+    directions; the diagonal (recipe == other) counts the baskets holding
+    the recipe at all.
+    """
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    other = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    count = models.IntegerField()
+
+    class Meta:
+        unique_together = ('recipe', 'other')
+        indexes = [
+            # most popular recipes, the cold-start feed
+            models.Index(
+                fields=['-count', 'recipe'],
+                name='recipes_pair_popular_idx',
+                condition=models.Q(recipe=models.F('other')),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.recipe_id} & {self.other_id}: {self.count}"
+
+
+class UserFeed(models.Model):
+    """
+    A user's cached recommendations. `generation` is bumped whenever their
+    favourites or recent views change; the list is recomputed on the next
+    /api/feed/ request if it was built for an older generation.
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='feed'
+    )
+    recipe_ids = ArrayField(models.BigIntegerField(), default=list)
+    generation = models.PositiveIntegerField(default=0)
+    built_generation = models.PositiveIntegerField(null=True)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Feed of {self.user.username}"
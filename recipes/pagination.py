@@ -0,0 +1,160 @@
+# recipes/pagination.py
+"""
+Keyset ("seek") pagination: ?cursor=<opaque>&page_size=<n>.
+
+A page is WHERE (key, id) comes after the last row's (key, id), ORDER BY
+key, id LIMIT n + 1 – an index range scan on a composite index, so page
+5000 costs the same as page 1. No COUNT(*) is run unless ?count=1.
+
+Orderings follow Postgres' NULL placement (ASC → NULLS LAST, DESC → NULLS
+FIRST), so nullable keys such as Recipe.total_mins page correctly.
+"""
+import base64
+import binascii
+import json
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def encode_cursor(values):
+    # full isoformat: keys must round-trip exactly (DjangoJSONEncoder drops µs)
+    raw = json.dumps(values, default=lambda v: v.isoformat()).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(token, size):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+    except (ValueError, binascii.Error):
+        raise NotFound("Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise NotFound("Invalid cursor")
+    return values
+
+
+def _nullable(model, name):
+    try:
+        return model._meta.get_field(name).null
+    except FieldDoesNotExist:       # annotations (rank, favorited_at, …)
+        return False
+
+
+def keyset_filter(model, ordering, values):
+    """
+    Q matching the rows strictly after `values` in `ordering`, e.g.
+    ("total_mins", "id"), [25.0, 812] → total_mins > 25 OR total_mins IS NULL
+    OR (total_mins = 25 AND id > 812).
+    """
+    after, equal = Q(pk__in=[]), Q()
+    for spec, value in zip(ordering, values):
+        name, desc = spec.lstrip("-"), spec.startswith("-")
+        nullable = _nullable(model, name)
+        if value is None:
+            beyond = Q(**{f"{name}__isnull": False}) if desc else Q(pk__in=[])
+            same = Q(**{f"{name}__isnull": True})
+        else:
+            beyond = Q(**{f"{name}__{'lt' if desc else 'gt'}": value})
+            if nullable and not desc:
+                beyond |= Q(**{f"{name}__isnull": True})
+            same = Q(**{name: value})
+        after |= equal & beyond
+        equal &= same
+    return after
+
+
+class KeysetPagination(BasePagination):
+    page_size = 20
+    max_page_size = 100
+    # ?ordering=<name> → key columns, last one unique
+    orderings = {"id": ("id",)}
+    default_ordering = "id"
+
+    def get_ordering(self, request):
+        return self.orderings.get(
+            request.query_params.get("ordering"), self.orderings[self.default_ordering]
+        )
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get("page_size", self.page_size))
+        except ValueError:
+            size = self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def page_query(self, queryset, request):
+        """(queryset to COUNT or None, the page's queryset with one extra row)."""
+        self.request = request
+        self.ordering = self.get_ordering(request)
+        self.size = self.get_page_size(request)
+
+        counted = None
+        if request.query_params.get("count") in ("1", "true"):
+            counted = queryset
+
+        token = request.query_params.get("cursor")
+        if token:
+            values = decode_cursor(token, len(self.ordering))
+            queryset = queryset.filter(keyset_filter(queryset.model, self.ordering, values))
+        return counted, queryset.order_by(*self.ordering)[:self.size + 1]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        counted, page = self.page_query(queryset, request)
+        self.count = None if counted is None else counted.count()
+        return self.trim(list(page))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        counted, page = self.page_query(queryset, request)
+        self.count = None if counted is None else await counted.acount()
+        return self.trim([row async for row in page])
+
+    def trim(self, rows):
+        self.next_values = None
+        if len(rows) > self.size:
+            rows = rows[:self.size]
+            last = rows[-1]
+            self.next_values = [getattr(last, spec.lstrip("-")) for spec in self.ordering]
+        return rows
+
+    def get_next_link(self):
+        if self.next_values is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, "cursor", encode_cursor(self.next_values))
+
+    def get_paginated_response(self, data):
+        body = {"next": self.get_next_link(), "results": data}
+        if self.count is not None:
+            body["count"] = self.count
+        return Response(body)
+
+
+class RecipePagination(KeysetPagination):
+    # the same orders as the columnar engine (columnar.py) serves filtered
+    orderings = {
+        "id": ("id",),
+        "total_mins": ("total_mins", "id"),
+        "-total_mins": ("-total_mins", "-id"),     # the same index, backwards
+    }
+
+
+class FavoritePagination(KeysetPagination):
+    # newest favourite first; favorited_at is annotated by FavoriteViewSet
+    orderings = {"recent": ("-favorited_at", "-id")}
+    default_ordering = "recent"
+
+
+class CatalogMemberPagination(KeysetPagination):
+    # sort_key is annotated from PredefinedCatalogRecipe
+    orderings = {"sort": ("sort_key", "id")}
+    default_ordering = "sort"
+
+
+class CatalogRecipePagination(KeysetPagination):
+    # order of insertion; added_at is annotated from CatalogRecipe
+    orderings = {"added": ("added_at", "id")}
+    default_ordering = "added"
@@ -0,0 +1,77 @@
+# recipes/pantry.py
+"""
+"What can I cook" matching over an in-memory ingredient → recipe index.
+
+For every ingredient the index keeps the sorted recipe pks that use it as a
+compact array('q'), plus each recipe's distinct ingredient count, counted
+from the same rows so the two always agree. Matching a pantry is then a
+merge of a handful of arrays instead of a GROUP BY over the whole
+RecipeIngredient table.
+"""
+import heapq
+from array import array
+from collections import Counter
+
+from .indexes import VersionedIndex
+from .models import Ingredient, RecipeIngredient
+
+
+class PantryIndex:
+    def __init__(self, postings, totals, names):
+        self.postings = postings        # ingredient pk → array('q') of recipe pks
+        self.totals = totals            # recipe pk → distinct ingredient count
+        self.names = names              # lower-cased name → ingredient pk
+
+    def resolve(self, names):
+        """Split pantry names into (ingredient pks, names not in the corpus)."""
+        ids, unknown = set(), []
+        for name in names:
+            pk = self.names.get(name.strip().lower())
+            if pk is None:
+                unknown.append(name)
+            else:
+                ids.add(pk)
+        return ids, unknown
+
+    def rank(self, ingredient_ids, n):
+        """
+        Return the best `n` [(recipe pk, matched, missing)] among recipes
+        sharing at least one ingredient with the pantry: fewest missing
+        first, then the most matched, then pk for a stable order.
+        """
+        matched = Counter()
+        for pk in ingredient_ids:
+            matched.update(self.postings.get(pk, ()))
+        totals = self.totals
+        return heapq.nsmallest(
+            n,
+            ((rid, k, totals[rid] - k) for rid, k in matched.items()),
+            key=lambda r: (r[2], -r[1], r[0]),
+        )
+
+
+def build_index(version=None):
+    postings, totals = {}, Counter()
+    current, ids = None, array("q")
+    for ing_id, recipe_id in (
+        RecipeIngredient.objects.values_list("ingredient_id", "recipe_id")
+        .order_by("ingredient_id", "recipe_id").distinct()
+        .iterator(chunk_size=20000)
+    ):
+        if ing_id != current:
+            if current is not None:
+                postings[current] = ids
+            current, ids = ing_id, array("q")
+        ids.append(recipe_id)
+        totals[recipe_id] += 1
+    if current is not None:
+        postings[current] = ids
+
+    names = {
+        name.lower(): pk
+        for pk, name in Ingredient.objects.values_list("id", "name").iterator()
+    }
+    return PantryIndex(postings, dict(totals), names)
+
+
+pantry_index = VersionedIndex(build_index)
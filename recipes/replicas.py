@@ -0,0 +1,122 @@
+# recipes/replicas.py
+"""
+Read replicas for the read-only endpoints.
+
+Views opt in (ReplicaReadsMixin, async_views' `replica=True`): once the
+caller is authenticated, the rest of the request reads from one replica,
+picked at random per request. Everything else – writes, reads inside a
+transaction on the primary, raw `connection` cursors, auth and token
+lookups, every view that didn't opt in – uses the primary (`default`).
+
+Read-your-writes: a successful POST / PUT / PATCH / DELETE by an
+authenticated user pins that user's reads to the primary for PIN_SECONDS
+(ReplicaPinMiddleware), and a request that writes reads from the primary
+from then on. Pins are kept in a Django cache; with several workers it
+must be a shared one (settings.READ_REPLICAS["PIN_CACHE_ALIAS"]).
+
+Replicas are the `replica*` aliases built from DATABASE_REPLICA_URLS in
+settings. Without any, nothing here does anything. The corpus version
+behind list ETags (conditional.py) is a committed counter row, so a
+replica serves the version that matches the rows it has replayed.
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, connections
+
+DEFAULTS = {"PIN_SECONDS": 5, "PIN_CACHE_ALIAS": "default"}
+
+conf = {**DEFAULTS, **getattr(settings, "READ_REPLICAS", {})}
+REPLICAS = [alias for alias in settings.DATABASES if alias.startswith("replica")]
+
+# per request: a one-item list holding the alias to read from, or None.
+# Mutable so that a write seen in a sync_to_async thread (which runs on a
+# copy of the context) still pins the rest of the request.
+_reads = ContextVar("recipes_replica_reads", default=None)
+
+
+def _pin_key(user_id):
+    return f"recipes:replicas:pin:{user_id}"
+
+
+def _pins():
+    return caches[conf["PIN_CACHE_ALIAS"]]
+
+
+def check_pin_cache():
+    """
+    Pins must be seen by every worker, or a user's next read can land on
+    another one, miss the pin and read a lagging replica.
+    """
+    if isinstance(_pins(), (LocMemCache, DummyCache)):
+        raise ImproperlyConfigured(
+            f"READ_REPLICAS['PIN_CACHE_ALIAS'] ({conf['PIN_CACHE_ALIAS']!r}) is a "
+            "per-process cache; read-your-writes with replicas needs a shared one "
+            "(redis / memcached / database) in CACHES."
+        )
+
+
+def pin(user_id):
+    _pins().set(_pin_key(user_id), 1, timeout=conf["PIN_SECONDS"])
+
+
+async def apin(user_id):
+    await _pins().aset(_pin_key(user_id), 1, timeout=conf["PIN_SECONDS"])
+
+
+def read_from_replica(user):
+    """Route this request's reads to a replica unless `user` is pinned; returns a reset token."""
+    if not REPLICAS or (user.is_authenticated and _pins().get(_pin_key(user.id))):
+        return None
+    return _reads.set([random.choice(REPLICAS)])
+
+
+async def aread_from_replica(user):
+    if not REPLICAS or (user.is_authenticated and await _pins().aget(_pin_key(user.id))):
+        return None
+    return _reads.set([random.choice(REPLICAS)])
+
+
+def reset(token):
+    if token is not None:
+        _reads.reset(token)
+
+
+class ReplicaRouter:
+    """settings.DATABASE_ROUTERS entry."""
+
+    def db_for_read(self, model, **hints):
+        reads = _reads.get()
+        if reads is None or reads[0] is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return reads[0]
+
+    def db_for_write(self, model, **hints):
+        reads = _reads.get()
+        if reads is not None:
+            reads[0] = None             # read what we just wrote
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True                     # replicas are copies of default
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS   # replicas get the schema by replication
+
+
+class ReplicaReadsMixin:
+    """DRF views: read from a replica after authentication (see above)."""
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.replica_token = read_from_replica(request.user)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        reset(getattr(self, "replica_token", None))
+        self.replica_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,161 @@
+# recipes/search_cache.py
+"""
+Result cache for /api/search/.
+
+Two tiers, both keyed by (corpus version, normalized query, exclude, page,
+limit, caller's allergen mask) and holding the ordered recipe_id list of one
+result page:
+
+  • an in-process LRU (size-bounded, per-entry TTL)
+  • an optional shared Django cache (settings.SEARCH_CACHE["SHARED_ALIAS"])
+
+Saving or deleting a Recipe / RecipeIngredient bumps the corpus version
+(see signals.py), which orphans every cached page at once. With a shared
+alias the version lives in that cache, so all workers see the bump;
+without one it is per process and TTL bounds staleness elsewhere.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+VERSION_KEY = "recipes:search:corpus_version"
+DEFAULTS = {"MAX_ENTRIES": 2048, "TTL": 300, "SHARED_ALIAS": None}
+
+
+def normalize_query(query):
+    return " ".join(query.lower().split())
+
+
+class _LRU:
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SearchResultCache:
+    def __init__(self):
+        conf = {**DEFAULTS, **getattr(settings, "SEARCH_CACHE", {})}
+        self.ttl = conf["TTL"]
+        self.local = _LRU(conf["MAX_ENTRIES"], conf["TTL"])
+        self.shared = caches[conf["SHARED_ALIAS"]] if conf["SHARED_ALIAS"] else None
+        self._local_version = 1
+        self.counters = {"local_hits": 0, "shared_hits": 0, "misses": 0}
+
+    # ---- corpus version ----
+    def version(self):
+        if self.shared is None:
+            return self._local_version
+        return self.shared.get_or_set(VERSION_KEY, 1, timeout=None)
+
+    async def aversion(self):
+        if self.shared is None:
+            return self._local_version
+        return await self.shared.aget_or_set(VERSION_KEY, 1, timeout=None)
+
+    def bump_version(self):
+        self._local_version += 1
+        self.local.clear()
+        if self.shared is not None:
+            try:
+                self.shared.incr(VERSION_KEY)
+            except ValueError:          # key missing / evicted
+                self.shared.set(VERSION_KEY, self._local_version, timeout=None)
+
+    # ---- lookups (a… variants for async views: only the shared tier awaits) ----
+    @staticmethod
+    def _key(version, query, exclude, page, limit, allergen_mask):
+        parts = [version, normalize_query(query), exclude or "", page, limit, allergen_mask]
+        digest = hashlib.sha1(json.dumps(parts).encode("utf-8")).hexdigest()
+        return f"recipes:search:{digest}"
+
+    def key(self, query, exclude, page, limit, allergen_mask=0):
+        return self._key(self.version(), query, exclude, page, limit, allergen_mask)
+
+    async def akey(self, query, exclude, page, limit, allergen_mask=0):
+        return self._key(await self.aversion(), query, exclude, page, limit, allergen_mask)
+
+    def get(self, key):
+        value = self._get_local(key)
+        if value is None and self.shared is not None:
+            value = self._got_shared(key, self.shared.get(key))
+        return self._count(value)
+
+    async def aget(self, key):
+        value = self._get_local(key)
+        if value is None and self.shared is not None:
+            value = self._got_shared(key, await self.shared.aget(key))
+        return self._count(value)
+
+    def set(self, key, value):
+        self.local.set(key, value)
+        if self.shared is not None:
+            self.shared.set(key, value, timeout=self.ttl)
+
+    async def aset(self, key, value):
+        self.local.set(key, value)
+        if self.shared is not None:
+            await self.shared.aset(key, value, timeout=self.ttl)
+
+    def _get_local(self, key):
+        value = self.local.get(key)
+        if value is not None:
+            self.counters["local_hits"] += 1
+        return value
+
+    def _got_shared(self, key, value):
+        if value is not None:
+            self.counters["shared_hits"] += 1
+            self.local.set(key, value)
+        return value
+
+    def _count(self, value):
+        if value is None:
+            self.counters["misses"] += 1
+        return value
+
+    def stats(self):
+        lookups = sum(self.counters.values())
+        hits = lookups - self.counters["misses"]
+        return {
+            **self.counters,
+            "hit_rate": round(hits / lookups, 4) if lookups else None,
+            "local_entries": len(self.local),
+            "max_entries": self.local.max_entries,
+            "version": self.version(),
+        }
+
+
+search_cache = SearchResultCache()
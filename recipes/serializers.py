@@ -1,6 +1,9 @@
 from django.contrib.auth.models import User
+from django.db.models import Case, CharField, F, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
 from rest_framework import serializers
 from rest_framework_simplejwt.tokens import RefreshToken
+from .batch import BATCH_MAX
 from .models import Recipe, Catalog, CatalogRecipe, Favorite, PredefinedCatalogType, PredefinedCatalog, Allergen, \
     UserAllergy, RecipeIngredient
 
@@ -39,12 +42,26 @@ class RecipeSerializer(serializers.ModelSerializer):
     is_favorite = serializers.SerializerMethodField()
     ingredients = IngredientQtySerializer(source="recipe_ingredients", many=True)  # 🔥 override here
 
+    # heavy fields left out of list pages unless asked for with ?expand=
+    LIST_OMIT = ("ingredients", "instructions")
+
     class Meta:
         model  = Recipe
-        exclude = ("search_vector",)
+        exclude = ("search_vector", "content_hash", "allergen_mask")
         read_only_fields = ("is_favorite",)
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # sparse fieldsets: context["fields"] keeps, context["omit"] drops
+        keep = self.context.get("fields")
+        omit = set(self.context.get("omit", ()))
+        for name in list(self.fields):
+            if (keep is not None and name not in keep) or name in omit:
+                self.fields.pop(name)
+
     def get_is_favorite(self, obj):
+        if hasattr(obj, "favorited"):              # Exists() annotation
+            return obj.favorited
         request = self.context.get("request")
         if not request or not request.user or request.user.is_anonymous:
             return False
@@ -52,6 +69,9 @@ class RecipeSerializer(serializers.ModelSerializer):
 
 
 # recipes/serializers.py
+CATALOG_PLACEHOLDER_IMAGE = "https://via.placeholder.com/200"
+
+
 class CatalogRecipeSerializer(serializers.ModelSerializer):
     """Slim recipe representation inside a catalog (one DB hit)."""
     recipe_id = serializers.IntegerField(source="recipe.recipe_id")
@@ -65,8 +85,8 @@ class CatalogRecipeSerializer(serializers.ModelSerializer):
         fields = ("recipe_id", "name", "image","calories", "total_mins")
 
     def get_image(self, obj):
-        img = (obj.recipe.image or obj.recipe.image[0:1]) if hasattr(obj.recipe, "image") else None
-        return img or "https://via.placeholder.com/200"
+        images = obj.recipe.images
+        return images[0] if images else CATALOG_PLACEHOLDER_IMAGE
 
 
 class CatalogSerializer(serializers.ModelSerializer):
@@ -83,20 +103,49 @@ class CatalogSerializer(serializers.ModelSerializer):
         return bool(user and user.is_authenticated and obj.user_id == user.id)
 
 
+# catalog grid: counts and cover from SQL (CatalogViewSet, ?summary=1)
+# cover = first image of the earliest-added recipe that has one
+CATALOG_COVER = Coalesce(
+    Subquery(
+        CatalogRecipe.objects.filter(catalog=OuterRef("pk"), recipe__images__len__gt=0)
+        .order_by("added_at", "id")
+        .values("recipe__images__0")[:1]
+    ),
+    Value(CATALOG_PLACEHOLDER_IMAGE),
+    output_field=CharField(),
+)
+
+
+class CatalogSummarySerializer(serializers.ModelSerializer):
+    recipe_count = serializers.IntegerField(read_only=True)
+    cover_image = serializers.CharField(read_only=True)
+    is_owner = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Catalog
+        fields = ("id", "name", "is_owner", "recipe_count", "cover_image")
+
+    def get_is_owner(self, obj):
+        user = self.context.get("request").user
+        return bool(user and user.is_authenticated and obj.user_id == user.id)
+
+
 class FavoriteSerializer(serializers.ModelSerializer):
     class Meta:
         model = Favorite
         fields = ('recipe',)
 
-class PredefinedCatalogTypeSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = PredefinedCatalogType
-        fields = ('id', 'name')
-
 class PredefinedCatalogSerializer(serializers.ModelSerializer):
     class Meta:
         model = PredefinedCatalog
-        fields = ('id', 'type', 'name', 'filter_criteria')
+        fields = ('id', 'type', 'name', 'filter_criteria', 'member_count')
+
+class PredefinedCatalogTypeSerializer(serializers.ModelSerializer):
+    catalogs = PredefinedCatalogSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = PredefinedCatalogType
+        fields = ('id', 'name', 'catalogs')
 
 class AllergenSerializer(serializers.ModelSerializer):
     class Meta:
@@ -110,6 +159,9 @@ class UserAllergySerializer(serializers.ModelSerializer):
 
 
 
+SLIM_DEFAULT_IMAGE = "https://encrypted-tbn0.gstatic.com/images?q=tbn:ANd9GcQFL5uibOV8chTl50DVzJkzLrOdLXQQL9EoNw&s"
+
+
 class SlimRecipeSerializer(serializers.ModelSerializer):
     image = serializers.SerializerMethodField()
 
@@ -118,8 +170,33 @@ class SlimRecipeSerializer(serializers.ModelSerializer):
         fields = ("recipe_id", "name", "image", "calories", "total_mins"  )
 
     def get_image(self, obj):
-        DEFAULT = "https://encrypted-tbn0.gstatic.com/images?q=tbn:ANd9GcQFL5uibOV8chTl50DVzJkzLrOdLXQQL9EoNw&s"
-        return obj.images[0] if obj.images else DEFAULT
+        return obj.images[0] if obj.images else SLIM_DEFAULT_IMAGE
+
+
+# ---- fast path: SlimRecipeSerializer's output without model instances ----
+# images[1] (first element) in SQL; empty or NULL arrays get the default
+SLIM_IMAGE = Case(
+    When(images__len__gt=0, then=F("images__0")),
+    default=Value(SLIM_DEFAULT_IMAGE),
+    output_field=CharField(),
+)
+SLIM_COLUMNS = ("recipe_id", "name", "image", "calories", "total_mins")
+
+
+def slim_rows(qs, *keys):
+    """
+    Named tuples of the slim columns followed by `keys` (e.g. the
+    pagination keys), so KeysetPagination can read the cursor off them.
+    """
+    return qs.annotate(image=SLIM_IMAGE).values_list(*SLIM_COLUMNS, *keys, named=True)
+
+
+def slim_data(rows):
+    """Same dicts, key order and values as SlimRecipeSerializer(rows, many=True).data."""
+    return [
+        {"recipe_id": r[0], "name": r[1], "image": r[2], "calories": r[3], "total_mins": r[4]}
+        for r in rows
+    ]
 
 
 class CatalogCreateSerializer(serializers.ModelSerializer):
@@ -130,4 +207,9 @@ class CatalogCreateSerializer(serializers.ModelSerializer):
         fields = ("id", "name", "recipes")
 
 class FavoriteCreateSerializer(serializers.Serializer):
-    recipe_id = serializers.IntegerField()
\ No newline at end of file
+    recipe_id = serializers.IntegerField()
+
+class RecipeIdsSerializer(serializers.Serializer):
+    recipe_ids = serializers.ListField(
+        child=serializers.IntegerField(), allow_empty=False, max_length=BATCH_MAX
+    )
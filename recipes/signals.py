@@ -0,0 +1,73 @@
+# recipes/signals.py
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .catalog_membership import forget_recipe, refresh_catalog, refresh_memberships
+from .feed import basket_added, mark_stale
+from .models import (
+    Allergen, CatalogRecipe, Favorite, PredefinedCatalog, Recipe, RecipeIngredient,
+)
+from .search_cache import search_cache
+
+
+@receiver([post_save, post_delete], sender=Recipe)
+@receiver([post_save, post_delete], sender=RecipeIngredient)
+def invalidate_search_cache(sender, **kwargs):
+    search_cache.bump_version()
+
+
+@receiver(m2m_changed, sender=Allergen.ingredients.through)
+def allergen_mapping_changed(sender, action, **kwargs):
+    # the triggers have already rewritten allergen_mask; cached pages are stale
+    if action in ("post_add", "post_remove", "post_clear"):
+        search_cache.bump_version()
+
+
+# ---- predefined catalog membership ----
+@receiver(post_save, sender=Recipe)
+def refresh_recipe_membership(sender, instance, update_fields=None, **kwargs):
+    # save(update_fields=…) only touches the catalogs reading those fields
+    fields = None
+    if update_fields is not None:
+        fields = {Recipe._meta.get_field(name).name for name in update_fields}
+    refresh_memberships([instance.pk], fields)
+
+
+@receiver(pre_delete, sender=Recipe)
+def drop_recipe_membership(sender, instance, **kwargs):
+    forget_recipe(instance.pk)
+
+
+@receiver(post_save, sender=PredefinedCatalog)
+def refresh_predefined_catalog(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or "filter_criteria" in update_fields:
+        refresh_catalog(instance)
+
+
+# ---- feed: co-occurrence counts and per-user staleness ----
+@receiver(post_save, sender=Favorite)
+def favorite_added(sender, instance, created, **kwargs):
+    if created:
+        others = (
+            Favorite.objects.filter(user_id=instance.user_id)
+            .exclude(recipe_id=instance.recipe_id)
+            .values_list("recipe_id", flat=True)
+        )
+        basket_added([instance.recipe_id], others)
+        mark_stale([instance.user_id])
+
+
+@receiver(post_delete, sender=Favorite)
+def favorite_removed(sender, instance, **kwargs):
+    mark_stale([instance.user_id])
+
+
+@receiver(post_save, sender=CatalogRecipe)
+def catalog_recipe_added(sender, instance, created, **kwargs):
+    if created:
+        others = (
+            CatalogRecipe.objects.filter(catalog_id=instance.catalog_id)
+            .exclude(recipe_id=instance.recipe_id)
+            .values_list("recipe_id", flat=True)
+        )
+        basket_added([instance.recipe_id], others)
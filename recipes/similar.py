@@ -0,0 +1,161 @@
+# recipes/similar.py
+"""
+Precomputed neighbours behind /api/recipes/<recipe_id>/similar/.
+
+Every recipe is a TF-IDF vector over its ingredients and keywords
+(binary term frequency, smoothed idf, L2-normalised), so a sparse product
+X[block] @ X.T gives cosine similarities for a block of recipes against
+the whole corpus. Blocks are sized to stay under BLOCK_CELLS dense cells;
+top-K per row comes from argpartition. Results live in RecipeNeighbors, one
+row per recipe, so serving is a primary-key lookup plus hydrating the ids.
+
+Incremental runs (the default for build_similar_recipes) recompute:
+  - recipes updated since their neighbours were computed, or never computed;
+  - recipes whose list contains one of those, or a deleted recipe;
+  - recipes for which a changed recipe now scores above their K-th neighbour.
+idf drifts slightly as the corpus grows; `--full` recomputes everything.
+"""
+import numpy as np
+from scipy import sparse
+
+from django.utils import timezone
+
+from .models import Recipe, RecipeIngredient, RecipeNeighbors
+
+TOP_K = 20
+BLOCK_CELLS = 32_000_000        # ~128 MB of float32 similarities per block
+FULL_FRACTION = 0.1             # past this share of changed recipes, redo all
+WRITE_BATCH = 2000
+
+
+def build_matrix():
+    """(recipe pks, row-normalised TF-IDF csr_matrix) over the whole corpus."""
+    pks, rows, cols = [], [], []
+    row_of, vocab = {}, {}
+    for pk, keywords in (
+        Recipe.objects.values_list("id", "keywords").order_by("id").iterator(chunk_size=20000)
+    ):
+        row_of[pk] = len(pks)
+        pks.append(pk)
+        for kw in keywords:
+            rows.append(row_of[pk])
+            cols.append(vocab.setdefault(("k", kw.lower()), len(vocab)))
+    for recipe_id, ingredient_id in RecipeIngredient.objects.values_list(
+        "recipe_id", "ingredient_id"
+    ).iterator(chunk_size=20000):
+        if recipe_id in row_of:         # recipe added while we were reading
+            rows.append(row_of[recipe_id])
+            cols.append(vocab.setdefault(("i", ingredient_id), len(vocab)))
+
+    n = len(pks)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+        shape=(n, len(vocab)),
+    )
+    matrix.sum_duplicates()
+    matrix.data[:] = 1.0                # binary tf
+
+    df = np.bincount(matrix.indices, minlength=len(vocab))
+    idf = (np.log((1 + n) / (1 + df)) + 1).astype(np.float32)
+    matrix = matrix.multiply(idf).tocsr()
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    matrix = sparse.diags((1 / norms).astype(np.float32)) @ matrix
+    return np.array(pks, dtype=np.int64), matrix.tocsr()
+
+
+def top_neighbors(matrix, rows, k=TOP_K):
+    """Yield (row, neighbour rows, scores) for `rows`, most similar first."""
+    n = matrix.shape[0]
+    block = max(1, BLOCK_CELLS // max(n, 1))
+    transposed = matrix.T.tocsc()
+    for start in range(0, len(rows), block):
+        chunk = rows[start:start + block]
+        sims = (matrix[chunk] @ transposed).toarray()
+        sims[np.arange(len(chunk)), chunk] = 0          # not similar to itself
+        kk = min(k, n - 1)
+        if kk <= 0:
+            for row in chunk:
+                yield row, [], []
+            continue
+        best = np.argpartition(-sims, kk - 1, axis=1)[:, :kk]
+        for i, row in enumerate(chunk):
+            cand = best[i]
+            scores = sims[i, cand]
+            keep = scores > 0
+            cand, scores = cand[keep], scores[keep]
+            order = np.lexsort((cand, -scores))
+            yield row, cand[order], scores[order]
+
+
+def _stale_rows(pks, matrix, k):
+    """Rows needing recomputation, per the rules in the module docstring."""
+    row_of = {int(pk): i for i, pk in enumerate(pks)}
+    updated = dict(Recipe.objects.values_list("id", "updated_at"))
+    stored = {
+        rid: (ids, scores, at)
+        for rid, ids, scores, at in RecipeNeighbors.objects.values_list(
+            "recipe_id", "neighbor_ids", "scores", "computed_at"
+        ).iterator(chunk_size=20000)
+    }
+
+    changed = {
+        pk for pk in row_of
+        if pk not in stored or updated[pk] > stored[pk][2]
+    }
+    if not changed:
+        return []
+    if len(changed) > FULL_FRACTION * len(pks):
+        return list(range(len(pks)))
+    stale = set(changed)
+    kth = np.zeros(len(pks), dtype=np.float32)   # score a newcomer must beat
+    for rid, (ids, scores, _) in stored.items():
+        if rid not in row_of:
+            continue
+        if any(nid in changed or nid not in row_of for nid in ids):
+            stale.add(rid)
+        elif len(scores) >= k:
+            kth[row_of[rid]] = scores[k - 1]
+
+    changed_rows = [row_of[pk] for pk in changed]
+    sims = matrix @ matrix[changed_rows].T         # n × changed, sparse
+    best = np.asarray(sims.max(axis=1).todense()).ravel()
+    stale.update(int(pks[i]) for i in np.flatnonzero(best > kth))
+    return sorted(row_of[pk] for pk in stale)
+
+
+def rebuild(full=False, k=TOP_K, progress=None):
+    """Recompute neighbour lists; returns the number of recipes rewritten."""
+    started = timezone.now()
+    pks, matrix = build_matrix()
+    if full:
+        rows = list(range(len(pks)))
+    else:
+        rows = _stale_rows(pks, matrix, k)
+
+    batch, written = [], 0
+    for row, cand, scores in top_neighbors(matrix, rows, k):
+        batch.append(RecipeNeighbors(
+            recipe_id=int(pks[row]),
+            neighbor_ids=[int(pk) for pk in pks[cand]],
+            scores=[round(float(s), 6) for s in scores],
+            computed_at=started,
+        ))
+        if len(batch) >= WRITE_BATCH:
+            written += _write(batch)
+            batch = []
+            if progress:
+                progress(written, len(rows))
+    written += _write(batch)
+    return written
+
+
+def _write(batch):
+    if batch:
+        RecipeNeighbors.objects.bulk_create(
+            batch,
+            update_conflicts=True,
+            unique_fields=["recipe"],
+            update_fields=["neighbor_ids", "scores", "computed_at"],
+        )
+    return len(batch)
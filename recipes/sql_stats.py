@@ -0,0 +1,132 @@
+# recipes/sql_stats.py
+"""
+Per-request SQL instrumentation (SQLStatsMiddleware).
+
+For a sampled request every query on every connection – including the
+ones async views run in sync_to_async threads – is counted and timed, and
+its SQL normalized to a shape (literals and IN lists collapsed) so that
+an N+1 shows up as one shape repeated N times. The totals go out in a
+Server-Timing header:
+
+    Server-Timing: sql;dur=12.41;desc="14 queries", sql-dup;desc="11 repeated", app;dur=38.20
+
+A request over the query-count or time budget is written to the
+`recipes.sql_stats` logger as one JSON line with its repeated shapes.
+
+The execute wrapper is installed on each connection as it is created and
+does one ContextVar lookup for requests that aren't sampled. With
+SAMPLE_RATE 0 the middleware isn't loaded and nothing is installed.
+"""
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "SAMPLE_RATE": 0.0,             # fraction of requests instrumented; 0 turns it off
+    "SERVER_TIMING": True,
+    "SLOW_QUERIES": 25,             # log requests running more queries than this …
+    "SLOW_MS": 500,                 # … or taking longer (whole request, ms)
+    "MAX_LOGGED_SHAPES": 10,
+}
+
+conf = {**DEFAULTS, **getattr(settings, "SQL_STATS", {})}
+
+_current = ContextVar("recipes_sql_stats", default=None)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)")
+_SPACE = re.compile(r"\s+")
+
+
+def normalize(sql):
+    """The query's shape: literals → ?, IN (...) lists collapsed, whitespace squeezed."""
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _IN_LIST.sub("(...)", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+class RequestStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.seconds = 0.0
+        self.queries = []               # raw SQL; normalized once, at the end
+
+    def record(self, sql, seconds):
+        self.queries.append(sql)
+        self.seconds += seconds
+
+    def shapes(self):
+        return Counter(normalize(sql) for sql in self.queries)
+
+    def summary(self, shapes):
+        return {
+            "queries": len(self.queries),
+            "db_ms": round(self.seconds * 1000, 2),
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 2),
+            "repeated": sum(n - 1 for n in shapes.values() if n > 1),
+        }
+
+
+def _execute(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.record(sql, time.perf_counter() - started)
+
+
+def _install(connection, **kwargs):
+    if _execute not in connection.execute_wrappers:
+        # outermost: connection.execute_wrapper() pops the last entry on exit
+        connection.execute_wrappers.insert(0, _execute)
+
+
+def install():
+    """Wrap connections opened from now on, and this thread's open ones."""
+    connection_created.connect(_install, dispatch_uid="recipes.sql_stats")
+    for connection in connections.all(initialized_only=True):
+        _install(connection)
+
+
+def start():
+    """Collect this request's queries; returns (stats, reset token)."""
+    stats = RequestStats()
+    return stats, _current.set(stats)
+
+
+def finish(stats, token, request, response):
+    _current.reset(token)
+    shapes = stats.shapes()
+    summary = stats.summary(shapes)
+    if conf["SERVER_TIMING"]:
+        response["Server-Timing"] = (
+            f'sql;dur={summary["db_ms"]};desc="{summary["queries"]} queries", '
+            f'sql-dup;desc="{summary["repeated"]} repeated", '
+            f'app;dur={summary["total_ms"]}'
+        )
+    if summary["queries"] > conf["SLOW_QUERIES"] or summary["total_ms"] > conf["SLOW_MS"]:
+        logger.warning(json.dumps({
+            "event": "slow_request",
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            **summary,
+            "shapes": [
+                {"count": count, "sql": sql}
+                for sql, count in shapes.most_common(conf["MAX_LOGGED_SHAPES"])
+            ],
+        }))
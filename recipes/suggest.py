@@ -0,0 +1,122 @@
+# recipes/suggest.py
+"""
+In-process prefix index behind /api/search/suggest/.
+
+Terms come from Recipe.name, Ingredient.name and Recipe.keywords, each with
+a popularity weight (favourites for recipes, usage count for ingredients and
+keywords). They are kept as one sorted list of lower-cased keys; a prefix
+maps to a contiguous slice of it (two bisects). Trie nodes whose slice is
+larger than SCAN_LIMIT carry precomputed top-k completions, everything
+smaller is ranked on the fly, so no lookup touches more than SCAN_LIMIT
+entries and none touches Postgres.
+
+The index is built on first use (or loaded from settings.SUGGEST_SNAPSHOT,
+written by `manage.py build_suggest_index`) and rebuilt in the background
+when the corpus version moves (see indexes.py).
+"""
+import heapq
+import json
+import os
+from bisect import bisect_left
+from collections import Counter
+
+from django.conf import settings
+from django.db.models import Count
+
+from .conditional import corpus_version
+from .models import Favorite, Ingredient, Recipe
+from .indexes import VersionedIndex
+
+TOP_K = 20          # precomputed completions per large node; SuggestView.max_limit
+SCAN_LIMIT = 256
+MAX_KEY = "\uffff"
+
+
+class SuggestIndex:
+    def __init__(self, entries, version=None):
+        # entries: (key, text, kind, weight, recipe_id | None)
+        self.entries = sorted(entries, key=lambda e: e[0])
+        self.keys = [e[0] for e in self.entries]
+        self.version = version
+        self.top = {}
+        self._build_nodes(0, len(self.entries), "")
+
+    def _build_nodes(self, lo, hi, prefix):
+        if hi - lo <= SCAN_LIMIT:
+            return
+        self.top[prefix] = self._rank(lo, hi, TOP_K)
+        depth = len(prefix)
+        while lo < hi:
+            if len(self.keys[lo]) <= depth:     # the prefix itself is a term
+                lo += 1
+                continue
+            child = self.keys[lo][:depth + 1]
+            end = bisect_left(self.keys, child + MAX_KEY, lo, hi)
+            self._build_nodes(lo, end, child)
+            lo = end
+
+    def _rank(self, lo, hi, k):
+        best = heapq.nlargest(k, range(lo, hi), key=lambda i: self.entries[i][3])
+        return [self.entries[i] for i in best]
+
+    def complete(self, prefix, limit=TOP_K):
+        prefix = " ".join(prefix.lower().split())
+        if not prefix:
+            return []
+        if prefix in self.top and limit <= TOP_K:
+            return self.top[prefix][:limit]
+        lo = bisect_left(self.keys, prefix)
+        hi = bisect_left(self.keys, prefix + MAX_KEY, lo)
+        return self._rank(lo, hi, limit)
+
+    # ---- snapshots ----
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump({"version": self.version, "entries": self.entries}, fh)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as fh:
+            data = json.load(fh)
+        return cls([tuple(e) for e in data["entries"]], data["version"])
+
+
+def build_index(version=None):
+    """Read every term and its weight from the database (three queries)."""
+    if version is None:
+        version = corpus_version()
+    entries = []
+
+    favs = Counter(dict(
+        Favorite.objects.values("recipe_id")
+        .annotate(n=Count("id")).values_list("recipe_id", "n")
+    ))
+    keywords = Counter()
+    for pk, rid, name, kws in (
+        Recipe.objects.values_list("id", "recipe_id", "name", "keywords")
+        .iterator(chunk_size=5000)
+    ):
+        entries.append((name.lower(), name, "recipe", 1 + favs[pk], rid))
+        keywords.update(kws)
+
+    for name, uses in (
+        Ingredient.objects.annotate(n=Count("recipeingredient"))
+        .values_list("name", "n").iterator(chunk_size=5000)
+    ):
+        entries.append((name.lower(), name, "ingredient", uses, None))
+
+    entries.extend(
+        (kw.lower(), kw, "keyword", uses, None) for kw, uses in keywords.items()
+    )
+    return SuggestIndex(entries, version)
+
+
+def _load_snapshot():
+    path = getattr(settings, "SUGGEST_SNAPSHOT", None)
+    if path and os.path.exists(path):
+        index = SuggestIndex.load(path)
+        return index, index.version
+    return None
+
+
+suggest_index = VersionedIndex(build_index, _load_snapshot)
@@ -1,3 +1,833 @@
-from django.test import TestCase
+import datetime
+import decimal
+import io
+import threading
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit
 
-# Create your tests here.
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.core.management import call_command
+from django.db import DatabaseError, connections
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast
+from django.test import AsyncRequestFactory, SimpleTestCase, TestCase
+from django.urls import resolve
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from . import access_log, async_views, columnar, indexes, pantry, replicas, views
+from .batch import BATCH_MAX
+from .conditional import corpus_version
+from .feed import compute_feed
+from .middleware import ReplicaPinMiddleware
+from .models import (
+    Catalog, CatalogRecipe, Favorite, Ingredient, PredefinedCatalog, PredefinedCatalogType,
+    Recipe, RecipeIngredient, RecipeNeighbors, RecipePair,
+)
+from .pagination import RecipePagination
+from .views import RecipeViewSet, SearchView
+from .renderers import ORJSONRenderer
+from .search_cache import search_cache
+from .serializers import RecipeIdsSerializer
+from .suggest import SCAN_LIMIT, TOP_K, SuggestIndex
+
+
+class KeysetPaginationTests(TestCase):
+    """
+    Walk every page until `next` is None: each row exactly once, in the
+    order of a plain ORDER BY (ties and NULLs included).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        # runs of equal keys longer than a page, NULLs, and floats with no
+        # exact decimal form
+        minutes = [None, 10.0, 10.0, 10.0, 10.0, 1 / 3, 0.1 + 0.2, None, 25.5, 10.0]
+        words = ["soup", "soup soup", "tomato soup", "soup with soup and soup", "soup"]
+        Recipe.objects.bulk_create([
+            Recipe(recipe_id=1000 + i, name=f"{words[i % len(words)]} {i}",
+                   total_mins=minutes[i % len(minutes)])
+            for i in range(47)
+        ])
+
+    def walk(self, paginator_class, queryset, **params):
+        factory, seen, cursor = APIRequestFactory(), [], None
+        for _ in range(100):
+            query = {**params, **({"cursor": cursor} if cursor else {})}
+            paginator = paginator_class()
+            rows = paginator.paginate_queryset(queryset, Request(factory.get("/", query)))
+            seen += [r.id for r in rows]
+            link = paginator.get_next_link()
+            if link is None:
+                return seen
+            cursor = parse_qs(urlsplit(link).query)["cursor"][0]
+        self.fail("pagination did not terminate")
+
+    def assertPagesMatch(self, seen, expected):
+        self.assertEqual(len(seen), len(set(seen)), "rows repeated across pages")
+        self.assertEqual(seen, expected)
+
+    def test_id(self):
+        expected = list(Recipe.objects.order_by("id").values_list("id", flat=True))
+        self.assertPagesMatch(self.walk(RecipePagination, Recipe.objects.all(), page_size=4), expected)
+
+    def test_nullable_key_ascending(self):
+        # ASC → NULLS LAST
+        expected = list(Recipe.objects.order_by("total_mins", "id").values_list("id", flat=True))
+        self.assertIsNone(Recipe.objects.get(pk=expected[-1]).total_mins)
+        seen = self.walk(RecipePagination, Recipe.objects.all(), ordering="total_mins", page_size=3)
+        self.assertPagesMatch(seen, expected)
+
+    def test_nullable_key_descending(self):
+        # DESC → NULLS FIRST
+        expected = list(Recipe.objects.order_by("-total_mins", "-id").values_list("id", flat=True))
+        self.assertIsNone(Recipe.objects.get(pk=expected[0]).total_mins)
+        seen = self.walk(RecipePagination, Recipe.objects.all(), ordering="-total_mins", page_size=3)
+        self.assertPagesMatch(seen, expected)
+
+    def test_single_row_pages(self):
+        expected = list(Recipe.objects.order_by("total_mins", "id").values_list("id", flat=True))
+        seen = self.walk(RecipePagination, Recipe.objects.all(), ordering="total_mins", page_size=1)
+        self.assertPagesMatch(seen, expected)
+
+
+class SearchCursorTests(TestCase):
+    """?cursor= on /api/search/ pages through float ranks and tied ranks."""
+
+    @classmethod
+    def setUpTestData(cls):
+        words = ["soup", "soup soup", "tomato soup", "soup with soup and soup", "soup"]
+        Recipe.objects.bulk_create([
+            Recipe(recipe_id=2000 + i, name=f"{words[i % len(words)]} {i}")
+            for i in range(40)
+        ])
+
+    def setUp(self):
+        search_cache.bump_version()
+
+    def expected(self, query):
+        search = SearchQuery(query, search_type="websearch")
+        return list(
+            Recipe.objects.filter(search_vector=search)
+            .annotate(rank=Cast(SearchRank(F("search_vector"), search), FloatField()))
+            .order_by("-rank", "id")
+            .values_list("recipe_id", flat=True)
+        )
+
+    def walk(self, query, limit):
+        seen, params = [], {"q": query, "limit": limit}
+        for _ in range(100):
+            body = self.client.get("/api/search/", params, headers={"Accept": "application/json"}).json()
+            seen += [r["recipe_id"] for r in body["results"]]
+            if body["next_cursor"] is None:
+                return seen
+            params = {"q": query, "limit": limit, "cursor": body["next_cursor"]}
+        self.fail("pagination did not terminate")
+
+    def test_ranks_page_without_repeats(self):
+        expected = self.expected("soup")
+        self.assertEqual(len(expected), 40)
+        for limit in (1, 3, 7):
+            seen = self.walk("soup", limit)
+            self.assertEqual(len(seen), len(set(seen)), "rows repeated across pages")
+            self.assertEqual(seen, expected)
+
+
+class ORJSONRendererTests(SimpleTestCase):
+    """Same bytes as JSONRenderer, or the same exception."""
+
+    def assertRendersLikeJSONRenderer(self, data):
+        try:
+            expected = JSONRenderer().render(data)
+        except Exception as exc:
+            with self.assertRaises(type(exc)):
+                ORJSONRenderer().render(data)
+        else:
+            self.assertEqual(ORJSONRenderer().render(data), expected)
+
+    def test_validation_errors_with_int_keys(self):
+        serializer = RecipeIdsSerializer(data={"recipe_ids": ["x", 2, "y"]})
+        self.assertFalse(serializer.is_valid())
+        self.assertRendersLikeJSONRenderer(serializer.errors)
+
+    def test_non_str_keys(self):
+        self.assertRendersLikeJSONRenderer({1: "a", 2.5: [True], None: {0: None}, True: 1})
+
+    def test_big_ints(self):
+        self.assertRendersLikeJSONRenderer({"id": 2 ** 70, "neg": -(2 ** 64)})
+
+    def test_non_finite_floats(self):
+        for value in (float("nan"), float("inf"), float("-inf")):
+            self.assertRendersLikeJSONRenderer({"results": [{"calories": None}, {"calories": value}]})
+
+    def test_plain_values(self):
+        self.assertRendersLikeJSONRenderer({
+            "next": None,
+            "results": [{"recipe_id": 1, "name": "Crème brûlée \u2028", "calories": 1e16,
+                         "total_mins": 0.1 + 0.2, "images": []}],
+            "when": datetime.datetime(2025, 1, 1, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+            "price": decimal.Decimal("1.10"),
+        })
+
+
+class SyntheticCorpusTests(TestCase):
+    """generate_synthetic_corpus runs with its default sizes."""
+
+    def test_default_ingredients(self):
+        # --ingredients keeps its default (more than the word combinations);
+        # --users is cut down too, only to keep the test fast
+        call_command("generate_synthetic_corpus", recipes=30, users=5, stdout=io.StringIO())
+        self.assertEqual(Recipe.objects.count(), 30)
+        self.assertEqual(Ingredient.objects.count(), 50_000)
+        self.assertTrue(Ingredient.objects.filter(name__endswith=" 2").exists())
+
+
+class CatalogLookupTests(APITestCase):
+    """Catalog actions 404 on a catalog id that is malformed or not the user's."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("owner")
+        other = User.objects.create_user("other")
+        cls.foreign = Catalog.objects.create(user=other, name="Theirs")
+        cls.recipe = Recipe.objects.create(recipe_id=3000, name="Lookup stew")
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def actions(self, catalog_id):
+        body = {"recipe_ids": [self.recipe.recipe_id]}
+        return [
+            self.client.get(f"/api/catalogs/{catalog_id}/recipes/"),
+            self.client.post(f"/api/catalogs/{catalog_id}/add-recipes/", body, format="json"),
+            self.client.post(f"/api/catalogs/{catalog_id}/remove-recipes/", body, format="json"),
+        ]
+
+    def test_non_numeric_id(self):
+        for response in self.actions("abc"):
+            self.assertEqual(response.status_code, 404)
+
+    def test_other_users_catalog(self):
+        for response in self.actions(self.foreign.id):
+            self.assertEqual(response.status_code, 404)
+        self.assertFalse(CatalogRecipe.objects.filter(catalog=self.foreign).exists())
+
+
+class SuggestIndexTests(SimpleTestCase):
+    """Completions are the heaviest terms under the prefix, for any limit."""
+
+    def setUp(self):
+        # enough "to…" terms for precomputed nodes, few enough "z…" to scan
+        words = [f"to{i:04d}" for i in range(SCAN_LIMIT * 2)] + [f"z{i}" for i in range(30)]
+        self.entries = [
+            (word, word.title(), "recipe", (i * 7919) % 1009 + i / 10_000, i)
+            for i, word in enumerate(words)
+        ]
+        self.index = SuggestIndex(self.entries)
+
+    def expected(self, prefix, limit):
+        matching = [e for e in self.entries if e[0].startswith(prefix)]
+        return sorted(matching, key=lambda e: -e[3])[:limit]
+
+    def test_precomputed_and_scanned_prefixes(self):
+        self.assertIn("to", self.index.top)
+        for prefix in ("t", "to", "to01", "z", "z1"):
+            for limit in (1, 5, TOP_K, TOP_K + 5):
+                self.assertEqual(self.index.complete(prefix, limit), self.expected(prefix, limit))
+
+    def test_prefix_is_normalized(self):
+        self.assertEqual(self.index.complete("  TO0 ", 3), self.expected("to0", 3))
+        self.assertEqual(self.index.complete("  ", 3), [])
+
+
+class VersionedIndexTests(SimpleTestCase):
+    """Rebuilds follow the DB corpus version, one per burst of writes."""
+
+    def setUp(self):
+        self.version = 1
+        self.builds = []
+        self.gate = threading.Event()
+        self.gate.set()
+        patcher = mock.patch.object(indexes, "corpus_version", lambda: self.version)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def build(self, version):
+        self.gate.wait(5)
+        self.builds.append(version)
+        return f"index@{version}"
+
+    def settle(self, index):
+        if index._worker is not None:
+            index._worker.join(5)
+
+    def test_rebuilds_when_the_version_moves(self):
+        index = indexes.VersionedIndex(self.build)
+        with mock.patch.dict(indexes.conf, CHECK_INTERVAL=0, MIN_REBUILD_INTERVAL=0):
+            self.assertEqual(index.get(), "index@1")
+            index.get()
+            self.assertEqual(self.builds, [1])
+
+            self.gate.clear()
+            self.version = 2
+            self.assertEqual(index.get(), "index@1")    # old index serves meanwhile
+            self.gate.set()
+            self.settle(index)
+            self.assertEqual(index.get(), "index@2")
+        self.assertEqual(self.builds, [1, 2])
+
+    def test_burst_of_writes_is_one_rebuild(self):
+        index = indexes.VersionedIndex(self.build)
+        with mock.patch.dict(indexes.conf, CHECK_INTERVAL=0, MIN_REBUILD_INTERVAL=60):
+            index.get()
+            for version in range(2, 10):
+                self.version = version
+                index.get()
+                self.settle(index)
+        self.assertEqual(self.builds, [1, 2])
+
+    def test_snapshot_is_checked_against_the_db(self):
+        index = indexes.VersionedIndex(self.build, load=lambda: ("snapshot", 1))
+        with mock.patch.dict(indexes.conf, CHECK_INTERVAL=0, MIN_REBUILD_INTERVAL=0):
+            self.assertEqual(index.get(), "snapshot")
+            self.version = 3
+            index.get()
+            self.settle(index)
+            self.assertEqual(index.get(), "index@3")
+
+
+class ColumnarParityTests(APITestCase):
+    """
+    /api/recipes/ pages the same rows in the same order whether a request
+    goes through the columnar engine (any filter) or SQL.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        # 0.1 + 0.2 sits just above a 0.3 bound in float8 but not in float32
+        mins = [0.1 + 0.2, None, 45.0, 45.0, 12.5, None, 0.3, 45.0, 90.0]
+        calories = [None, 320.0, 320.0, 150.5, None, 800.0, 75.0]
+        Recipe.objects.bulk_create([
+            Recipe(recipe_id=4000 + i, name=f"Parity bake {i}",
+                   total_mins=mins[i % len(mins)], calories=calories[i % len(calories)])
+            for i in range(31)
+        ])
+
+    def setUp(self):
+        # a snapshot of this test's rows, built in the request thread
+        patcher = mock.patch.object(
+            columnar, "columnar_index", indexes.VersionedIndex(columnar.build_snapshot)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def walk(self, params):
+        seen, url, query = [], "/api/recipes/", {**params, "fields": "recipe_id"}
+        for _ in range(100):
+            body = self.client.get(url, query).json()
+            seen += [r["recipe_id"] for r in body["results"]]
+            if body["next"] is None:
+                return seen
+            url, query = body["next"], None     # the link carries every param
+        self.fail("pagination did not terminate")
+
+    def expected(self, queryset, *ordering):
+        return list(queryset.order_by(*ordering).values_list("recipe_id", flat=True))
+
+    def test_total_mins_both_directions(self):
+        everything = {"calories_min": -1, "page_size": 4}     # served by the engine
+        with_calories = Recipe.objects.filter(calories__gte=-1)
+        for ordering, keys in (("total_mins", ("total_mins", "id")),
+                               ("-total_mins", ("-total_mins", "-id"))):
+            self.assertEqual(
+                self.walk({"ordering": ordering, "page_size": 4}),
+                self.expected(Recipe.objects.all(), *keys),
+            )
+            self.assertEqual(
+                self.walk({**everything, "ordering": ordering}),
+                self.expected(with_calories, *keys),
+            )
+
+    def test_engine_only_ordering(self):
+        for ordering, keys in (("calories", ("calories", "id")), ("-calories", ("-calories", "-id"))):
+            self.assertEqual(
+                self.walk({"ordering": ordering, "page_size": 3}),
+                self.expected(Recipe.objects.all(), *keys),
+            )
+
+    def test_float_bound(self):
+        self.assertEqual(
+            self.walk({"total_mins_max": "0.3", "page_size": 2}),
+            self.expected(Recipe.objects.filter(total_mins__lte=0.3), "id"),
+        )
+
+    def test_unknown_ordering_is_id(self):
+        self.assertEqual(
+            self.walk({"calories_min": 100, "ordering": "-name"}),
+            self.expected(Recipe.objects.filter(calories__gte=100), "id"),
+        )
+
+    def test_facet_counts(self):
+        for params, rows in (({}, Recipe.objects.all()),
+                             ({"calories_min": 100}, Recipe.objects.filter(calories__gte=100))):
+            body = self.client.get("/api/recipes/facets/", params).json()
+            self.assertEqual(body["count"], rows.count())
+            self.assertEqual(
+                [b["count"] for b in body["cook_time"]],
+                [rows.filter(total_mins__lt=b["total_mins_lt"]).count() for b in body["cook_time"]],
+            )
+
+    def test_unservable_facet_filter(self):
+        with mock.patch.object(columnar, "conditions_from", return_value=None):
+            response = self.client.get("/api/recipes/facets/", {"calories_min": 100})
+        self.assertEqual(response.status_code, 400)
+
+
+class FeedCountTests(APITestCase):
+    """RecipePair counts baskets, once per basket, from both write paths."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.a, cls.b, cls.c, cls.d = (
+            Recipe.objects.create(recipe_id=5000 + i, name=name)
+            for i, name in enumerate(["Pesto", "Gnocchi", "Focaccia", "Tiramisu"])
+        )
+        cls.ann, cls.bob = User.objects.create_user("ann"), User.objects.create_user("bob")
+
+    def pairs(self):
+        return {(p.recipe_id, p.other_id): p.count for p in RecipePair.objects.all()}
+
+    def test_favourites(self):
+        for user, recipes in ((self.ann, [self.a, self.b]), (self.bob, [self.a, self.b, self.c])):
+            for recipe in recipes:
+                Favorite.objects.create(user=user, recipe=recipe)
+        a, b, c = self.a.pk, self.b.pk, self.c.pk
+        self.assertEqual(self.pairs(), {
+            (a, a): 2, (b, b): 2, (c, c): 1,
+            (a, b): 2, (b, a): 2,
+            (a, c): 1, (c, a): 1, (b, c): 1, (c, b): 1,
+        })
+
+    def test_batch_add_counts_each_row_once(self):
+        self.client.force_authenticate(self.ann)
+        url = "/api/favorites/add-recipes/"
+        self.client.post(url, {"recipe_ids": [self.a.recipe_id, self.b.recipe_id]}, format="json")
+        self.client.post(url, {"recipe_ids": [self.b.recipe_id, self.c.recipe_id]}, format="json")
+        a, b, c = self.a.pk, self.b.pk, self.c.pk
+        self.assertEqual(self.pairs(), {
+            (a, a): 1, (b, b): 1, (c, c): 1,
+            (a, b): 1, (b, a): 1, (a, c): 1, (c, a): 1, (b, c): 1, (c, b): 1,
+        })
+
+    def test_feed_ranks_co_favourites(self):
+        for recipe in (self.a, self.b, self.c):
+            Favorite.objects.create(user=self.bob, recipe=recipe)
+        Favorite.objects.create(user=self.ann, recipe=self.b)
+        Favorite.objects.create(user=self.ann, recipe=self.c)
+        carol = User.objects.create_user("carol")
+        Favorite.objects.create(user=carol, recipe=self.c)
+        # c co-occurs with b twice and with a once; favourites are left out
+        self.assertEqual(compute_feed(carol.id), [self.b.pk, self.a.pk])
+
+
+class AsyncRecipeDetailTests(TestCase):
+    """The async recipe detail answers like RecipeViewSet.retrieve."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.recipe = Recipe.objects.create(recipe_id=6000, name="Async risotto", calories=512.0)
+
+    def setUp(self):
+        self.factory = AsyncRequestFactory()
+
+    async def detail(self, method, recipe_id, headers=None):
+        request = getattr(self.factory, method)(f"/api/recipes/{recipe_id}/", headers=headers)
+        return await async_views.recipe_detail(request, recipe_id=recipe_id)
+
+    def test_wsgi_routes_are_drf_views(self):
+        # settings.ASYNC_VIEWS is off outside backend/asgi.py
+        self.assertIs(resolve("/api/recipes/6000/").func.cls, RecipeViewSet)
+        self.assertIs(resolve("/api/search/").func.cls, SearchView)
+
+    async def test_same_body_as_drf(self):
+        response = await self.detail("get", 6000)
+        expected = await self.async_client.get("/api/recipes/6000/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, expected.content)
+        self.assertEqual(response["ETag"], expected["ETag"])
+
+    async def test_missing_recipe(self):
+        response = await self.detail("get", 6999)
+        expected = await self.async_client.get("/api/recipes/6999/")
+        self.assertEqual((response.status_code, response.content), (404, expected.content))
+
+    async def test_revalidation(self):
+        etag = (await self.detail("get", 6000))["ETag"]
+        response = await self.detail("get", 6000, {"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+    async def test_head_has_no_body(self):
+        body = (await self.detail("get", 6000)).content
+        response = await self.detail("head", 6000)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(int(response["Content-Length"]), len(body))
+
+
+class SimilarRecipesTests(APITestCase):
+    """/api/recipes/<recipe_id>/similar/ in neighbour order, 404 for unknown ids."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.base, *cls.others = [
+            Recipe.objects.create(recipe_id=7000 + i, name=f"Curry {i}") for i in range(4)
+        ]
+        RecipeNeighbors.objects.create(
+            recipe=cls.base, neighbor_ids=[cls.others[2].pk, cls.others[0].pk, cls.others[1].pk],
+            computed_at=timezone.now(),
+        )
+
+    def test_neighbour_order_and_limit(self):
+        body = self.client.get("/api/recipes/7000/similar/", {"limit": 2}).json()
+        self.assertEqual([r["recipe_id"] for r in body["results"]], [7003, 7001])
+
+    def test_not_computed_yet(self):
+        self.assertEqual(self.client.get("/api/recipes/7001/similar/").json(), {"results": []})
+
+    def test_unknown_or_malformed_id(self):
+        for path in ("/api/recipes/7999/similar/", "/api/recipes/abc/similar/", "/api/recipes/abc/"):
+            self.assertEqual(self.client.get(path).status_code, 404, path)
+
+
+class PredefinedCatalogRecipesTests(APITestCase):
+    """Materialized predefined catalog membership, browsed through the API."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.recipes = {
+            mins: Recipe.objects.create(recipe_id=8000 + i, name=f"Quick dish {i}", total_mins=mins)
+            for i, mins in enumerate([25.0, 5.0, 40.0, None, 12.0])
+        }
+        kind = PredefinedCatalogType.objects.create(name="Cook Time")
+        cls.quick = PredefinedCatalog.objects.create(
+            type=kind, name="< 30 Mins", filter_criteria={"total_mins_lt": 30}
+        )
+        cls.everything = PredefinedCatalog.objects.create(type=kind, name="All", filter_criteria={})
+
+    def members(self, catalog):
+        body = self.client.get(f"/api/predefined-catalogs/{catalog.id}/recipes/").json()
+        return [r["recipe_id"] for r in body["results"]]
+
+    def test_quickest_first(self):
+        self.assertEqual(self.members(self.quick), [8001, 8004, 8000])
+        self.quick.refresh_from_db()
+        self.assertEqual(self.quick.member_count, 3)
+
+    def test_saves_refresh_membership(self):
+        slow = self.recipes[40.0]
+        slow.total_mins = 8.0
+        slow.save()
+        self.assertEqual(self.members(self.quick), [8001, 8002, 8004, 8000])
+        slow.name = "Renamed"
+        slow.save(update_fields=["name"])
+        self.assertEqual(self.members(self.quick), [8001, 8002, 8004, 8000])
+
+    def test_empty_criteria_stay_empty(self):
+        self.assertEqual(self.members(self.everything), [])
+
+    def test_unknown_or_malformed_catalog(self):
+        for path in ("/api/predefined-catalogs/999999/recipes/", "/api/predefined-catalogs/abc/recipes/"):
+            self.assertEqual(self.client.get(path).status_code, 404, path)
+
+
+class AccessBufferTests(APITestCase):
+    """Recipe views go through the write-behind buffer, flushed on demand here."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("viewer")
+        cls.first, cls.second = (
+            Recipe.objects.create(recipe_id=9000 + i, name=f"Viewed pie {i}") for i in range(2)
+        )
+
+    def setUp(self):
+        # no flusher thread: its connection would commit outside this test's transaction
+        for name, value in (("background", False), ("_thread", None), ("_pending", {}), ("_to_trim", set())):
+            patcher = mock.patch.object(access_log.access_buffer, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.buffer = access_log.access_buffer
+        self.client.force_authenticate(self.user)
+
+    def committed_views(self):
+        """RecipeAccess rows for the user as another connection sees them."""
+        found = []
+
+        def count():
+            try:
+                found.append(RecipeAccess.objects.filter(user=self.user).count())
+            finally:
+                connections.close_all()
+        thread = threading.Thread(target=count)
+        thread.start()
+        thread.join()
+        return found[0]
+
+    def test_views_flush_inside_the_test_transaction(self):
+        self.client.get("/api/recipes/9000/")
+        self.assertIsNone(self.buffer._thread)
+        recent = self.client.get("/api/recent/").json()["results"]
+        self.assertEqual([r["recipe_id"] for r in recent], [9000])     # merged from the buffer
+
+        self.assertEqual(self.buffer.flush(), 1)
+        views = RecipeAccess.objects.filter(user=self.user).values_list("recipe_id", flat=True)
+        self.assertEqual(list(views), [self.first.pk])
+        self.assertEqual(self.committed_views(), 0)
+
+    def test_failed_flush_is_requeued(self):
+        self.buffer.record(self.user.id, self.first.pk)
+        with mock.patch.object(access_log.transaction, "atomic", side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.buffer.flush()
+        self.assertEqual([pk for pk, _ in self.buffer.recent(self.user.id)], [self.first.pk])
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertTrue(RecipeAccess.objects.filter(user=self.user, recipe=self.first).exists())
+
+    def test_requeue_is_bounded(self):
+        self.buffer.record(self.user.id, self.first.pk)
+        batch, self.buffer._pending = self.buffer._pending, {}
+        with mock.patch.object(self.buffer, "max_pending", 1), mock.patch.object(self.buffer, "dropped", 0):
+            self.buffer.record(self.user.id, self.second.pk)       # arrived during the failed flush
+            with self.assertLogs("recipes.access_log", "WARNING"):
+                self.buffer._requeue(batch)
+            self.assertEqual(self.buffer.dropped, 1)
+        self.assertEqual([pk for pk, _ in self.buffer.recent(self.user.id)], [self.second.pk])
+
+
+class BatchBasketTests(APITestCase):
+    """Per-id statuses of the batch add / remove endpoints."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("batcher")
+        cls.catalog = Catalog.objects.create(user=cls.user, name="Weeknights")
+        cls.tacos, cls.chili = (
+            Recipe.objects.create(recipe_id=rid, name=name)
+            for rid, name in ((9100, "Tacos"), (9101, "Chili"))
+        )
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def post(self, action, ids):
+        url = f"/api/catalogs/{self.catalog.id}/{action}/"
+        body = self.client.post(url, {"recipe_ids": ids}, format="json").json()
+        return [(r["recipe_id"], r["status"]) for r in body["results"]]
+
+    def test_add_then_remove(self):
+        self.assertEqual(
+            self.post("add-recipes", [9100, 9199, 9100]), [(9100, "added"), (9199, "not_found")]
+        )
+        self.assertEqual(
+            self.post("add-recipes", [9101, 9100]), [(9101, "added"), (9100, "already_present")]
+        )
+        self.assertEqual(
+            self.post("remove-recipes", [9100, 9100, 9199]), [(9100, "removed"), (9199, "not_found")]
+        )
+        self.assertEqual(self.post("remove-recipes", [9100]), [(9100, "not_present")])
+        self.assertEqual(list(self.catalog.catalog_recipes.values_list("recipe_id", flat=True)), [self.chili.pk])
+
+    def test_lost_race_is_not_added(self):
+        CatalogRecipe.objects.create(catalog=self.catalog, recipe=self.tacos)
+        # the basket was read before a concurrent request inserted tacos
+        stale = mock.Mock(**{"values_list.return_value": []})
+        with mock.patch.object(CatalogRecipe.objects, "filter", return_value=stale):
+            self.assertEqual(
+                self.post("add-recipes", [9100, 9101]), [(9100, "already_present"), (9101, "added")]
+            )
+        self.assertEqual(self.catalog.catalog_recipes.count(), 2)
+
+    def test_invalid_batch(self):
+        url = f"/api/catalogs/{self.catalog.id}/add-recipes/"
+        for ids in ([], ["tacos"], list(range(BATCH_MAX + 1))):
+            response = self.client.post(url, {"recipe_ids": ids}, format="json")
+            self.assertEqual(response.status_code, 400)
+
+
+class PantryRankingTests(APITestCase):
+    """/api/pantry/ ranks by fewest missing, then most matched ingredients."""
+
+    @classmethod
+    def setUpTestData(cls):
+        eggs, milk, flour, sugar = (
+            Ingredient.objects.create(name=name) for name in ("Eggs", "Milk", "Flour", "Sugar")
+        )
+        for rid, mins, used in (
+            (10000, 60.0, [eggs, milk]),
+            (10001, 10.0, [eggs, eggs, milk, flour]),    # eggs listed twice, counted once
+            (10002, 10.0, [eggs]),
+            (10003, 10.0, [sugar]),
+        ):
+            recipe = Recipe.objects.create(recipe_id=rid, name=f"Pantry {rid}", total_mins=mins)
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(recipe=recipe, ingredient=i, quantity="1") for i in used
+            )
+
+    def setUp(self):
+        patcher = mock.patch.object(views, "pantry_index", indexes.VersionedIndex(pantry.build_index))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def rank(self, **params):
+        body = self.client.get("/api/pantry/", {"ingredients": "eggs, MILK,saffron", **params}).json()
+        self.assertEqual(body["unknown"], ["saffron"])
+        return [(r["recipe_id"], r["matched"], r["missing"]) for r in body["results"]]
+
+    def test_ranking(self):
+        self.assertEqual(self.rank(), [(10000, 2, 0), (10002, 1, 0), (10001, 2, 1)])
+
+    def test_filtered(self):
+        self.assertEqual(self.rank(total_mins_lte=30), [(10002, 1, 0), (10001, 2, 1)])
+
+    def test_paging(self):
+        body = self.client.get("/api/pantry/", {"ingredients": "eggs", "limit": 2}).json()
+        self.assertEqual(body["next"], 2)
+        body = self.client.get("/api/pantry/", {"ingredients": "eggs", "limit": 2, "page": 2}).json()
+        self.assertEqual([r["recipe_id"] for r in body["results"]], [10001])
+        self.assertIsNone(body["next"])
+
+    def test_recipe_deleted_after_build(self):
+        self.rank()                                 # builds the index
+        Recipe.objects.filter(recipe_id=10002).delete()
+        self.assertEqual(self.rank(), [(10000, 2, 0), (10001, 2, 1)])
+
+    def test_totals_cover_every_posting(self):
+        index = pantry.build_index()
+        posted = {pk for ids in index.postings.values() for pk in ids}
+        self.assertEqual(set(index.totals), posted)
+
+
+class SearchCacheInvalidationTests(APITestCase):
+    """Cached /api/search/ pages are dropped when a Recipe is saved or deleted."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.omelette = Recipe.objects.create(recipe_id=10100, name="Quiche omelette")
+
+    def setUp(self):
+        search_cache.bump_version()
+
+    def search(self):
+        body = self.client.get("/api/search/", {"q": "quiche"}, headers={"Accept": "application/json"}).json()
+        return [r["recipe_id"] for r in body["results"]]
+
+    def test_repeat_is_a_hit(self):
+        self.search()
+        hits = search_cache.counters["local_hits"]
+        self.assertEqual(self.search(), [10100])
+        self.assertEqual(search_cache.counters["local_hits"], hits + 1)
+
+    def test_save(self):
+        self.assertEqual(self.search(), [10100])
+        Recipe.objects.create(recipe_id=10101, name="Quiche lorraine")
+        self.assertEqual(sorted(self.search()), [10100, 10101])
+        self.omelette.name = "Plain omelette"
+        self.omelette.save()
+        self.assertEqual(self.search(), [10101])
+
+    def test_delete(self):
+        self.search()
+        version, misses = search_cache.version(), search_cache.counters["misses"]
+        self.omelette.delete()
+        self.assertGreater(search_cache.version(), version)
+        self.assertEqual(self.search(), [])
+        self.assertEqual(search_cache.counters["misses"], misses + 1)
+
+
+class ConditionalGetTests(APITestCase):
+    """ETags follow the corpus version trigger (lists) and updated_at (detail)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("etag")
+        cls.recipe = Recipe.objects.create(recipe_id=10200, name="Validator pie")
+
+    def revalidate(self, url):
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        again = self.client.get(url, headers={"If-None-Match": first["ETag"]})
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again["ETag"], first["ETag"])
+        return first["ETag"]
+
+    def test_trigger_bumps_on_corpus_writes_only(self):
+        version = corpus_version()
+        Catalog.objects.create(user=self.user, name="Not corpus")
+        Favorite.objects.create(user=self.user, recipe=self.recipe)
+        self.assertEqual(corpus_version(), version)
+        Recipe.objects.create(recipe_id=10201, name="Validator tart")
+        self.assertGreater(corpus_version(), version)
+        version = corpus_version()
+        Ingredient.objects.create(name="Validator salt")
+        self.assertGreater(corpus_version(), version)
+
+    def test_list(self):
+        etag = self.revalidate("/api/recipes/")
+        self.recipe.name = "Validator pie, revised"
+        self.recipe.save()
+        response = self.client.get("/api/recipes/", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_detail(self):
+        url = "/api/recipes/10200/"
+        etag = self.revalidate(url)
+        self.assertIn("Last-Modified", self.client.get(url))
+        self.recipe.save()                          # auto_now moves updated_at
+        response = self.client.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(self.client.get("/api/recipes/10299/").status_code, 404)
+
+
+class ReplicaRoutingTests(SimpleTestCase):
+    """A request's reads go to a replica until it writes or its user is pinned."""
+
+    def setUp(self):
+        self.pins = LocMemCache("replica-pins", {})
+        for patcher in (
+            mock.patch.object(replicas, "REPLICAS", ["replica1"]),
+            mock.patch.object(replicas, "_pins", return_value=self.pins),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.router = replicas.ReplicaRouter()
+
+    def test_reads_until_a_write(self):
+        self.assertEqual(self.router.db_for_read(Recipe), "default")
+        token = replicas.read_from_replica(AnonymousUser())
+        self.assertEqual(self.router.db_for_read(Recipe), "replica1")
+        self.assertEqual(self.router.db_for_write(Recipe), "default")
+        self.assertEqual(self.router.db_for_read(Recipe), "default")
+        replicas.reset(token)
+        self.assertEqual(self.router.db_for_read(Recipe), "default")
+
+    def test_pinned_user(self):
+        replicas.pin(7)
+        self.assertIsNone(replicas.read_from_replica(User(id=7)))
+        self.assertEqual(self.router.db_for_read(Recipe), "default")
+        token = replicas.read_from_replica(User(id=8))
+        self.addCleanup(replicas.reset, token)
+        self.assertEqual(self.router.db_for_read(Recipe), "replica1")
+
+    def test_pin_middleware(self):
+        with self.assertRaises(ImproperlyConfigured):
+            ReplicaPinMiddleware(lambda request: None)
+        with mock.patch.object(replicas, "REPLICAS", []), self.assertRaises(MiddlewareNotUsed):
+            ReplicaPinMiddleware(lambda request: None)
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import (
@@ -6,7 +7,8 @@ from rest_framework_simplejwt.views import (
     TokenBlacklistView,
 )
 from .views import RecipeViewSet, CatalogViewSet, PredefinedCatalogTypeViewSet, \
-    PredefinedCatalogViewSet, RecentList, FavoriteList, SignupView, FavoriteViewSet, SearchView
+    PredefinedCatalogViewSet, RecentList, FavoriteList, SignupView, FavoriteViewSet, SearchView, \
+    SearchCacheStatsView, SuggestView, PantryView, FeedView
 
 router = DefaultRouter()
 router.register('recipes', RecipeViewSet, basename='recipe')
@@ -26,10 +28,28 @@ urlpatterns = [
     path('auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('auth/logout/', TokenBlacklistView.as_view(), name='token_blacklist'),
 
-    path('recent/', RecentList.as_view()),
-    path("search/", SearchView.as_view(), name="search"),
+    path("search/suggest/", SuggestView.as_view(), name="search-suggest"),
+    path("pantry/", PantryView.as_view(), name="pantry"),
+    path("feed/", FeedView.as_view(), name="feed"),
+    path("search/cache-stats/", SearchCacheStatsView.as_view(), name="search-cache-stats"),
     # path("favorites/", FavoriteList.as_view(), name="favorites"),
 
 
 ]
+if settings.ASYNC_VIEWS:
+    # ASGI: async GET for the hottest endpoints (async_views.py); other
+    # methods fall through to the same DRF views
+    from . import async_views
+    urlpatterns += [
+        path('recent/', async_views.recent),
+        path("search/", async_views.search, name="search"),
+        path("recipes/<int:recipe_id>/", async_views.recipe_detail),
+        path("favorites/", async_views.favorites),
+    ]
+else:
+    # WSGI: the coroutines would each run through async_to_sync
+    urlpatterns += [
+        path('recent/', RecentList.as_view()),
+        path("search/", SearchView.as_view(), name="search"),
+    ]
 urlpatterns += router.urls
@@ -4,19 +4,21 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from .serializers import SignupSerializer
 from django.contrib.auth.models import User
-from django.contrib.postgres.search import SearchVector, SearchQuery, SearchRank
+from django.contrib.postgres.search import SearchQuery, SearchRank
 from rest_framework.views import APIView
 from .serializers import SlimRecipeSerializer
-from django.db.models import Case, When, IntegerField
+from django.db.models import Case, When, IntegerField, FloatField
 
 from .models import (
     Recipe,
+    RecipeIngredient,
     Favorite,
     Catalog,
     CatalogRecipe,
     RecipeAccess,
     PredefinedCatalogType,
     PredefinedCatalog,
+    RecipeNeighbors,
 )
 from .serializers import (
     SlimRecipeSerializer,
@@ -24,6 +26,8 @@ from .serializers import (
     CatalogSerializer,
     PredefinedCatalogTypeSerializer,
     PredefinedCatalogSerializer,
+    slim_data,
+    slim_rows,
 )
 
 # ───────────────────────────────────────────────────────────────
@@ -124,41 +128,253 @@ class CatalogViewSet(viewsets.ModelViewSet):
 # ───────────────────────────────────────────────────────────────
 # 4 ·  Recipe list / detail  (lookup by recipe_id)
 # recipes/views.py
-from django.utils import timezone
-from django.db.models import F
+from django.db.models import F, Count, Exists, Max, OuterRef, Prefetch
+from django.db.models.functions import Cast, Greatest
 from .filters import RecipeFilter
-class RecipeViewSet(viewsets.ReadOnlyModelViewSet):
+from .allergens import exclude_allergens, user_allergen_mask
+from .search_cache import search_cache
+from .suggest import suggest_index
+from .pantry import pantry_index
+from .access_log import access_buffer
+from .conditional import ConditionalGetMixin, corpus_version
+from .replicas import ReplicaReadsMixin
+from .similar import TOP_K
+from .feed import FEED_SIZE, get_feed
+from . import columnar
+from rest_framework.exceptions import ValidationError
+from rest_framework.utils.urls import replace_query_param
+from .pagination import (
+    CatalogMemberPagination, CatalogRecipePagination, FavoritePagination, RecipePagination,
+    decode_cursor, encode_cursor, keyset_filter,
+)
+class RecipeViewSet(ReplicaReadsMixin, ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     lookup_field = "recipe_id"
+    lookup_value_regex = r"\d+"       # as <int:recipe_id>: anything else is a 404, not a ValueError
     queryset = Recipe.objects.all()
     serializer_class = RecipeSerializer
     permission_classes = [permissions.AllowAny]
     filterset_class = RecipeFilter
+    pagination_class = RecipePagination     # ?cursor= keyset on id / (total_mins, id)
+    max_batch = 300                         # ids per /api/recipes/batch/ request
 
-    # def get_serializer_context(self):
-    #     ctx = super().get_serializer_context()
-    #     ctx["request"] = self.request          # <- make request available
-    #     return ctx
+    def get_queryset(self):
+        qs = super().get_queryset().defer("search_vector")
+        if self.action == "list":
+            qs = exclude_allergens(qs, self.request)
+
+        if self.renders("ingredients"):
+            qs = qs.prefetch_related(Prefetch(
+                "recipe_ingredients",
+                queryset=RecipeIngredient.objects.select_related("ingredient"),
+            ))
+        if not self.renders("instructions"):
+            qs = qs.defer("instructions")
+        user = self.request.user
+        if self.renders("is_favorite") and user.is_authenticated:
+            qs = qs.annotate(favorited=Exists(
+                Favorite.objects.filter(user=user, recipe=OuterRef("pk"))
+            ))
+        return qs
+
+    # ---- sparse fieldsets: ?fields=a,b  /  ?expand=ingredients,instructions ----
+    def get_serializer_context(self):
+        ctx = super().get_serializer_context()
+        params = self.request.query_params
+        if "fields" in params:
+            ctx["fields"] = set(params["fields"].split(","))
+        elif self.action == "list":
+            expand = set(params.get("expand", "").split(","))
+            ctx["omit"] = set(RecipeSerializer.LIST_OMIT) - expand
+        return ctx
+
+    def renders(self, name):
+        ctx = self.get_serializer_context()
+        if "fields" in ctx:
+            return name in ctx["fields"]
+        return name not in ctx.get("omit", ())
+
+    # ---- conditional GET (conditional.py) ----
+    def list_validators(self, request):
+        parts = [corpus_version()]
+        if self.action == "facets" or columnar.handles(request.query_params):
+            # a worker's snapshot may lag the DB; it must not share an ETag
+            parts.append(columnar.columnar_index.get().corpus_version)
+        return parts, None
+
+    def detail_validators(self, request):
+        row = self.detail_row(self.kwargs["recipe_id"]).first()
+        if row is None:
+            return None                 # let get_object() raise the 404
+        self.recipe_pk, updated_at = row
+        return [updated_at], updated_at
+
+    def user_validators(self, request):
+        user = request.user
+        if not user.is_authenticated:
+            return []
+        favorites, totals = self.favorite_totals(user)
+        return self.user_parts(user, user_allergen_mask(request), favorites.aggregate(**totals))
+
+    # the steps are shared with the async endpoint (async_views.recipe_detail)
+    @staticmethod
+    def detail_row(recipe_id):
+        """(pk, updated_at) of the recipe: .first() / .afirst() it."""
+        return Recipe.objects.filter(recipe_id=recipe_id).values_list("pk", "updated_at")
+
+    @staticmethod
+    def favorite_totals(user):
+        """The user's favourites and the aggregates their validators need."""
+        return Favorite.objects.filter(user=user), {"count": Count("id"), "last": Max("favorited_at")}
+
+    @staticmethod
+    def user_parts(user, allergen_mask, favorites):
+        # is_favorite and allergen filtering make the body per-user
+        return [user.id, allergen_mask, favorites["count"], favorites["last"]]
+
+    @staticmethod
+    def counts_as_view(request, response):
+        # a revalidated (304) view still counts as a view
+        return request.user.is_authenticated and response.status_code in (200, 304)
+
+    def render_list(self, request, *args, **kwargs):
+        if columnar.handles(request.query_params):
+            response = self.columnar_list(request)
+            if response is not None:
+                return response
+        return super().render_list(request, *args, **kwargs)
+
+    def columnar_list(self, request):
+        """
+        Range filters and numeric sorts evaluated on the in-memory columnar
+        snapshot (columnar.py); only the resulting page of ids hits the DB.
+        Returns None when a filter can't be served, to fall back to SQL.
+        """
+        filterset = RecipeFilter(request.query_params, queryset=Recipe.objects.none())
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+        translated = columnar.conditions_from(filterset)
+        if translated is None:
+            return None
+        conditions, category = translated
+
+        ordering = request.query_params.get("ordering", "id")
+        order, desc = ordering.lstrip("-"), ordering.startswith("-")
+        if order not in columnar.NUMERIC_FIELDS:
+            order, desc = "id", False       # as RecipePagination: unknown → id
+        token = request.query_params.get("cursor")
+
+        snapshot = columnar.columnar_index.get()
+        keep = snapshot.mask(conditions, category, user_allergen_mask(request))
+        ids, next_key = snapshot.page(
+            keep, order,
+            desc=desc,
+            after=decode_cursor(token, 2) if token else None,
+            limit=self.paginator.get_page_size(request),
+        )
 
-    def retrieve(self, request, *args, **kwargs):
-        response = super().retrieve(request, *args, **kwargs)
+        by_pk = self.get_queryset().in_bulk(ids)
+        recipes = [by_pk[pk] for pk in ids if pk in by_pk]
+        body = {
+            "next": replace_query_param(
+                request.build_absolute_uri(), "cursor", encode_cursor(next_key)
+            ) if next_key else None,
+            "results": self.get_serializer(recipes, many=True).data,
+        }
+        if request.query_params.get("count") in ("1", "true"):
+            body["count"] = int(keep.sum())
+        return Response(body)
+
+    # ---- GET /api/recipes/facets/ ----
+    @action(detail=False, methods=["get"])
+    def facets(self, request):
+        return self.conditional(
+            request, self.list_validators, self.list_max_age, self.render_facets
+        )
 
-        if request.user.is_authenticated:
-            recipe = self.get_object()
+    def render_facets(self, request):
+        """
+        Category, cook-time, calorie-band and top-keyword counts for the
+        RecipeFilter params, from one vectorized pass over the columnar
+        snapshot. The unfiltered result is computed once per snapshot.
+        """
+        filterset = RecipeFilter(request.query_params, queryset=Recipe.objects.none())
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+        translated = columnar.conditions_from(filterset)
+        if translated is None:
+            raise ValidationError({"detail": "These filters are not supported for facets."})
+        conditions, category = translated
+        allergen_mask = user_allergen_mask(request)
+
+        snapshot = columnar.columnar_index.get()
+        if not conditions and category is None and not allergen_mask:
+            if snapshot.base_facets is None:
+                snapshot.base_facets = snapshot.facets(snapshot.mask([]))
+            return Response(snapshot.base_facets)
+        return Response(snapshot.facets(snapshot.mask(conditions, category, allergen_mask)))
+
+    # ---- GET /api/recipes/batch/?ids=<recipe_id>,<recipe_id>,…[&slim=1] ----
+    @action(detail=False, methods=["get"])
+    def batch(self, request):
+        """
+        Hydrate many recipes in one round trip: one IN query (ingredients
+        prefetched, is_favorite as an Exists() column), returned in the
+        order asked for. Full representation by default (?fields= works),
+        SlimRecipeSerializer's with ?slim=1. Not recorded as views.
+        """
+        try:
+            ids = [int(i) for i in request.query_params.get("ids", "").split(",") if i.strip()]
+        except ValueError:
+            return Response({"detail": "ids must be comma-separated integers"}, status=400)
+        ids = list(dict.fromkeys(ids))
+        if len(ids) > self.max_batch:
+            return Response({"detail": f"at most {self.max_batch} ids"}, status=400)
+
+        if request.query_params.get("slim") in ("1", "true"):
+            by_id = {r.recipe_id: r for r in slim_rows(Recipe.objects.filter(recipe_id__in=ids))}
+            results = slim_data(by_id[rid] for rid in ids if rid in by_id)
+        else:
+            by_id = {r.recipe_id: r for r in self.get_queryset().filter(recipe_id__in=ids)}
+            results = self.get_serializer(
+                [by_id[rid] for rid in ids if rid in by_id], many=True
+            ).data
+        return Response({
+            "results": results,
+            "not_found": [rid for rid in ids if rid not in by_id],
+        })
+
+    # ---- GET /api/recipes/<recipe_id>/similar/?limit=<n> ----
+    @action(detail=True, methods=["get"])
+    def similar(self, request, recipe_id=None):
+        """
+        "More like this" from the precomputed neighbour lists (similar.py,
+        `manage.py build_similar_recipes`): one primary-key lookup for the
+        ids, one query for the slim rows, in similarity order.
+        """
+        try:
+            limit = max(min(int(request.query_params.get("limit", 10)), TOP_K), 1)
+        except ValueError:
+            return Response({"detail": "limit must be an integer"}, status=400)
 
-            # 1️⃣  upsert with fresh timestamp
-            RecipeAccess.objects.update_or_create(
-                user=request.user, recipe=recipe,
-                defaults={"accessed_at": timezone.now()}
-            )
+        ids = (
+            RecipeNeighbors.objects.filter(recipe__recipe_id=recipe_id)
+            .values_list("neighbor_ids", flat=True).first()
+        )
+        if ids is None:
+            get_object_or_404(Recipe, recipe_id=recipe_id)
+            ids = []                    # not computed yet
+        by_pk = {r.id: r for r in slim_rows(
+            exclude_allergens(Recipe.objects.filter(pk__in=ids), request), "id"
+        )}
+        rows = [by_pk[pk] for pk in ids if pk in by_pk][:limit]
+        return Response({"results": slim_data(rows)})
 
-            # 2️⃣  keep only 10 newest for this user
-            recent_ids = (
-                RecipeAccess.objects
-                .filter(user=request.user)
-                .order_by("-accessed_at")
-                .values_list("id", flat=True)[:10]
-            )
-            RecipeAccess.objects.filter(user=request.user).exclude(id__in=recent_ids).delete()
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+
+        # buffered, flushed and trimmed to 10 per user in the background
+        if self.counts_as_view(request, response):
+            access_buffer.record(request.user.id, self.recipe_pk)
 
         return response
 
@@ -166,16 +382,64 @@ class RecipeViewSet(viewsets.ReadOnlyModelViewSet):
 
 # ───────────────────────────────────────────────────────────────
 # 5 ·  Predefined catalog browsing
-class PredefinedCatalogTypeViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = PredefinedCatalogType.objects.all()
+class PredefinedCatalogTypeViewSet(ReplicaReadsMixin, ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    # types with their catalogs (and cached member counts) in one response
+    queryset = PredefinedCatalogType.objects.prefetch_related("catalogs")
     serializer_class = PredefinedCatalogTypeSerializer
     permission_classes = [permissions.AllowAny]
+    lookup_value_regex = r"\d+"
+    list_max_age = 300
+
+    def detail_validators(self, request):
+        # the type and its nested catalogs
+        latest = (
+            PredefinedCatalogType.objects.filter(pk=self.kwargs["pk"])
+            .annotate(latest=Greatest("updated_at", Max("catalogs__updated_at")))
+            .values_list("latest", flat=True).first()
+        )
+        return None if latest is None else ([latest], latest)
 
 
-class PredefinedCatalogViewSet(viewsets.ReadOnlyModelViewSet):
+class PredefinedCatalogViewSet(ReplicaReadsMixin, ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = PredefinedCatalog.objects.all()
     serializer_class = PredefinedCatalogSerializer
     permission_classes = [permissions.AllowAny]
+    lookup_value_regex = r"\d+"
+    list_max_age = 300
+
+    def detail_validators(self, request):
+        updated_at = (
+            PredefinedCatalog.objects.filter(pk=self.kwargs["pk"])
+            .values_list("updated_at", flat=True).first()
+        )
+        return None if updated_at is None else ([updated_at], updated_at)
+
+    def user_validators(self, request):
+        if self.action == "recipes" and user_allergen_mask(request):
+            return [user_allergen_mask(request)]
+        return []
+
+    # ---- GET /api/predefined-catalogs/<pk>/recipes/ ----
+    @action(detail=True, methods=["get"])
+    def recipes(self, request, pk=None):
+        # an unknown catalog is a 404, before any validator or keyset query
+        catalog = self.get_object()
+        return self.conditional(
+            request, self.list_validators, self.list_max_age, self.render_recipes, catalog=catalog
+        )
+
+    def render_recipes(self, request, catalog):
+        """Catalog contents from the materialized membership table."""
+        qs = exclude_allergens(
+            Recipe.objects
+            .filter(predefinedcatalogrecipe__catalog_id=catalog.id)
+            .only(*SLIM_FIELDS)
+            .annotate(sort_key=F("predefinedcatalogrecipe__sort_key")),
+            request,
+        )
+        paginator = CatalogMemberPagination()
+        page = paginator.paginate_queryset(slim_rows(qs, "sort_key", "id"), request, view=self)
+        return paginator.get_paginated_response(slim_data(page))
 
 class SignupView(generics.CreateAPIView):
     """
@@ -201,24 +465,50 @@ from django.shortcuts import get_object_or_404
 from .models import Recipe, Favorite, Catalog, CatalogRecipe, RecipeAccess
 from .serializers import (
     SlimRecipeSerializer, RecipeSerializer, CatalogSerializer,
-    CatalogCreateSerializer, FavoriteCreateSerializer
+    CatalogCreateSerializer, FavoriteCreateSerializer, RecipeIdsSerializer,
+    CatalogSummarySerializer, CATALOG_COVER, slim_data, slim_rows,
 )
+from . import batch
+from .feed import mark_stale
 
 # AUTH = [permissions.IsAuthenticated]
 
+
+class SlimListMixin:
+    """
+    list() for SlimRecipeSerializer views without the serializer: rows come
+    from values_list (serializers.slim_rows), plus `slim_keys` for the
+    paginator, and are emitted as the same dicts.
+    """
+    slim_keys = ()
+
+    def list(self, request, *args, **kwargs):
+        queryset = slim_rows(self.filter_queryset(self.get_queryset()), *self.slim_keys)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(slim_data(page))
+        return Response(slim_data(queryset))
+
 # ───── 1. Favourite toggle ───────────────────────────────────────
-class FavoriteViewSet(viewsets.ModelViewSet):          # 🟢 ModelViewSet → allows POST
+class FavoriteViewSet(SlimListMixin, viewsets.ModelViewSet):   # 🟢 ModelViewSet → allows POST
     permission_classes = [permissions.IsAuthenticated]
     lookup_field = "recipe_id"                         # URL uses /favorites/<recipe_id>/
     http_method_names = ["get", "post", "delete"]      # (optional limit)
 
     # List should return slim recipe objects (image + name)
     serializer_class = SlimRecipeSerializer
+    pagination_class = FavoritePagination   # newest first, keyset on (favorited_at, id)
+    slim_keys = ("id", "favorited_at")
 
     def get_queryset(self):
-        return Recipe.objects.filter(
-            favorite__user=self.request.user
-        ).distinct()
+        # (user, recipe) is unique, so the join needs no DISTINCT
+        return exclude_allergens(
+            Recipe.objects
+            .filter(favorite__user=self.request.user)
+            .only(*SLIM_FIELDS)
+            .annotate(favorited_at=F("favorite__favorited_at")),
+            self.request,
+        )
 
     # ---------- Create ----------
     def create(self, request, *args, **kwargs):
@@ -238,6 +528,28 @@ class FavoriteViewSet(viewsets.ModelViewSet):          # 🟢 ModelViewSet → a
             user=request.user, recipe__recipe_id=rid
         ).delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+    # ---------- Batch: POST /api/favorites/add-recipes/  {"recipe_ids": [...]} ----------
+    @action(detail=False, methods=["post"], url_path="add-recipes")
+    def add_recipes(self, request):
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = batch.add_recipes(
+            Favorite, {"user_id": request.user.id}, serializer.validated_data["recipe_ids"]
+        )
+        mark_stale([request.user.id])
+        return Response({"results": results})
+
+    # ---------- Batch: POST /api/favorites/remove-recipes/ ----------
+    @action(detail=False, methods=["post"], url_path="remove-recipes")
+    def remove_recipes(self, request):
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = batch.remove_recipes(
+            Favorite, {"user_id": request.user.id}, serializer.validated_data["recipe_ids"]
+        )
+        mark_stale([request.user.id])
+        return Response({"results": results})
 class CatalogViewSet(viewsets.ModelViewSet):
     serializer_class   = CatalogSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -245,9 +557,37 @@ class CatalogViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         # only the user's own catalogs
-        return (Catalog.objects
-                .filter(user=self.request.user)
-                .prefetch_related("catalog_recipes__recipe"))
+        qs = Catalog.objects.filter(user=self.request.user)
+        if self.summary():
+            # grid view: count and cover per catalog in one query, no recipes
+            return qs.annotate(
+                recipe_count=Count("catalog_recipes"), cover_image=CATALOG_COVER
+            ).order_by("id")
+        if self.action in ("list", "retrieve"):
+            qs = qs.prefetch_related("catalog_recipes__recipe")
+        return qs
+
+    def summary(self):
+        """GET /api/catalogs/?summary=1"""
+        return self.action == "list" and self.request.query_params.get("summary") in ("1", "true")
+
+    def get_serializer_class(self):
+        return CatalogSummarySerializer if self.summary() else super().get_serializer_class()
+
+    # ---- GET /api/catalogs/<id>/recipes/?cursor=<opaque>&page_size=<n> ----
+    @action(detail=True, methods=["get"])
+    def recipes(self, request, id=None):
+        """Catalog contents, slim and paginated, in the order they were added."""
+        # DRF's variant: a non-numeric id is a 404, not a ValueError
+        catalog = generics.get_object_or_404(Catalog.objects.only("id"), id=id, user=request.user)
+        qs = (
+            Recipe.objects
+            .filter(catalogrecipe__catalog_id=catalog.id)
+            .annotate(added_at=F("catalogrecipe__added_at"))
+        )
+        paginator = CatalogRecipePagination()
+        page = paginator.paginate_queryset(slim_rows(qs, "added_at", "id"), request, view=self)
+        return paginator.get_paginated_response(slim_data(page))
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -270,62 +610,294 @@ class CatalogViewSet(viewsets.ModelViewSet):
         ).delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    # batch: POST /api/catalogs/<id>/add-recipes/  {"recipe_ids": [...]}
+    @action(detail=True, methods=["post"], url_path="add-recipes")
+    def add_recipes(self, request, id=None):
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        catalog = generics.get_object_or_404(Catalog.objects.only("id"), id=id, user=request.user)
+        results = batch.add_recipes(
+            CatalogRecipe, {"catalog_id": catalog.id}, serializer.validated_data["recipe_ids"]
+        )
+        return Response({"results": results})
+
+    # batch: POST /api/catalogs/<id>/remove-recipes/  {"recipe_ids": [...]}
+    @action(detail=True, methods=["post"], url_path="remove-recipes")
+    def remove_recipes(self, request, id=None):
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        catalog = generics.get_object_or_404(Catalog.objects.only("id"), id=id, user=request.user)
+        results = batch.remove_recipes(
+            CatalogRecipe, {"catalog_id": catalog.id}, serializer.validated_data["recipe_ids"]
+        )
+        return Response({"results": results})
+
 
-class RecentList(generics.ListAPIView):
+class RecentList(SlimListMixin, generics.ListAPIView):
     serializer_class    = SlimRecipeSerializer
     permission_classes  = [permissions.IsAuthenticated]
+    keep = 10
 
     def get_queryset(self):
-        ids = list(                # turn the queryset into a Python list
+        user_id = self.request.user.id
+        return self.recipes(self.merge(user_id, self.stored(user_id)))
+
+    # the steps are shared with the async endpoint (async_views.recent)
+    @classmethod
+    def stored(cls, user_id):
+        return (
             RecipeAccess.objects
-            .filter(user=self.request.user)
+            .filter(user_id=user_id)
             .order_by("-accessed_at")
-            .values_list("recipe__recipe_id", flat=True)[:10]
+            .values_list("recipe_id", "accessed_at")[:cls.keep]
         )
 
+    @classmethod
+    def merge(cls, user_id, stored):
+        """Newest-first recipe pks from the table rows and the buffer."""
+        # merge in views that are still waiting in the write-behind buffer
+        latest = {}
+        for pk, ts in [*stored, *access_buffer.recent(user_id)]:
+            if pk not in latest or ts > latest[pk]:
+                latest[pk] = ts
+        return sorted(latest, key=latest.get, reverse=True)[:cls.keep]
+
+    @staticmethod
+    def recipes(ids):
         if not ids:
             return Recipe.objects.none()
 
         # build CASE … WHEN … THEN … END
         ordering = Case(
-            *[When(recipe_id=rid, then=pos) for pos, rid in enumerate(ids)],
+            *[When(pk=pk, then=pos) for pos, pk in enumerate(ids)],
             output_field=IntegerField(),
         )
 
         return (
             Recipe.objects
-            .filter(recipe_id__in=ids)
+            .filter(pk__in=ids)
             .order_by(ordering)     # ⬅ preserved newest‑first
         )
 
 
 # ───── search feature ────────────────────
-class SearchView(APIView):
+SLIM_FIELDS = ("recipe_id", "name", "images", "calories", "total_mins")
+
+
+class SearchView(ReplicaReadsMixin, APIView):
+    """
+    GET /api/search/?q=<text>&exclude=<recipe_id>&cursor=<opaque>&limit=<size>
+
+    Matches against the stored, GIN-indexed `search_vector` with
+    websearch_to_tsquery, so only matching rows are ranked. Pages are keyset
+    on (rank, id) via `cursor` (returned as `next_cursor`); the older
+    `page=<n>` offset paging still works and fills `next`.
+    """
     permission_classes = [permissions.AllowAny]
+    max_limit = 50
+    ordering = ("-rank", "id")
 
     def get(self, request):
-        query      = request.query_params.get("q", "")
-        exclude_id = request.query_params.get("exclude")   # ← NEW
-        limit      = int(request.query_params.get("limit", 10))
+        try:
+            query, exclude_id, cursor, limit, page = self.parse(request.query_params)
+        except ValueError:
+            return Response({"detail": "page and limit must be integers"}, status=400)
 
         if not query:
-            return Response({"results": []})
+            return Response({"results": [], "next": None, "next_cursor": None})
 
-        vector = (
-            SearchVector("name", weight="A") +
-            SearchVector("keywords", weight="B") +
-            SearchVector("ingredients__name", weight="B")
+        key = search_cache.key(
+            query, exclude_id, cursor or page, limit, user_allergen_mask(request)
         )
+        cached = search_cache.get(key)
+        if cached is not None:
+            return Response(self.cached_body(cached, self.cached_rows(cached)))
+
+        rows = list(self.window(self.search_rows(query, exclude_id, request), cursor, page, limit))
+        entry, rows = self.page(rows, cursor, page, limit)
+        search_cache.set(key, entry)
+        return Response(self.body(entry, rows))
+
+    # the steps are shared with the async endpoint (async_views.search)
+    def parse(self, params):
+        """(query, exclude, cursor, limit, page); ValueError on bad numbers."""
+        query      = params.get("q", "")
+        exclude_id = params.get("exclude")   # ← NEW
+        cursor     = params.get("cursor")
+        limit = max(min(int(params.get("limit", 10)), self.max_limit), 1)
+        page  = max(int(params.get("page", 1)), 1)
+        return query, exclude_id, cursor, limit, page
+
+    def search_rows(self, query, exclude_id, request):
+        search = SearchQuery(query, search_type="websearch")
         qs = (
             Recipe.objects
-            .annotate(rank=SearchRank(vector, SearchQuery(query)))
-            .filter(rank__gte=0.1)
-            .order_by("-rank")
-            .distinct()
+            .filter(search_vector=search)
+            .only(*SLIM_FIELDS)
+            # ts_rank is float4; as float8 the cursor's Python float compares exact
+            .annotate(rank=Cast(SearchRank(F("search_vector"), search), FloatField()))
+            .order_by(*self.ordering)
         )
 
         if exclude_id:
             qs = qs.exclude(recipe_id=exclude_id)
+        return slim_rows(exclude_allergens(qs, request), "id", "rank")
+
+    def window(self, qs, cursor, page, limit):
+        # fetch one extra row to know whether a next page exists (no COUNT)
+        if cursor:
+            values = decode_cursor(cursor, len(self.ordering))
+            return qs.filter(keyset_filter(Recipe, self.ordering, values))[:limit + 1]
+        offset = (page - 1) * limit
+        return qs[offset:offset + limit + 1]
+
+    def page(self, rows, cursor, page, limit):
+        """(cache entry with the page's ids and links, the page's rows)."""
+        next_page = None
+        if not cursor and len(rows) > limit:
+            next_page = page + 1
+
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_cursor = encode_cursor([last.rank, last.id])
+        rows = rows[:limit]
+
+        return {
+            "ids": [r.recipe_id for r in rows],
+            "next": next_page,
+            "next_cursor": next_cursor,
+        }, rows
+
+    def body(self, entry, rows):
+        return {
+            "results": slim_data(rows),
+            "next": entry["next"],
+            "next_cursor": entry["next_cursor"],
+        }
+
+    def cached_rows(self, cached):
+        return slim_rows(Recipe.objects.filter(recipe_id__in=cached["ids"]))
+
+    def cached_body(self, cached, rows):
+        by_id = {r.recipe_id: r for r in rows}
+        return {
+            "results": slim_data(by_id[rid] for rid in cached["ids"] if rid in by_id),
+            "next": cached["next"],
+            "next_cursor": cached["next_cursor"],
+        }
+
+
+class SuggestView(APIView):
+    """
+    GET /api/search/suggest/?prefix=<text>&limit=<n>
+
+    Typeahead completions from the in-process prefix index (suggest.py).
+    """
+    permission_classes = [permissions.AllowAny]
+    max_limit = 20
+
+    def get(self, request):
+        prefix = request.query_params.get("prefix", "")
+        try:
+            limit = max(min(int(request.query_params.get("limit", 10)), self.max_limit), 1)
+        except ValueError:
+            return Response({"detail": "limit must be an integer"}, status=400)
+
+        results = [
+            {"text": text, "kind": kind, "recipe_id": rid}
+            for _, text, kind, _, rid in suggest_index.get().complete(prefix, limit)
+        ]
+        return Response({"results": results})
 
-        serializer = SlimRecipeSerializer(qs[:limit], many=True)
-        return Response({"results": serializer.data})
+
+# ───── pantry ("what can I cook") ────────
+class PantryView(APIView):
+    """
+    GET /api/pantry/?ingredients=eggs,milk,flour&page=<n>&limit=<size>
+
+    Recipes ranked by fewest missing ingredients, then most matched, from
+    the in-memory inverted index (pantry.py). Accepts the RecipeFilter
+    params (total_mins_lte, recipe_category, …) to narrow the results;
+    filtered results come from the best `max_candidates` matches.
+    """
+    permission_classes = [permissions.AllowAny]
+    max_limit = 50
+    max_candidates = 5000   # best-ranked recipes a filtered request is drawn from
+
+    def get(self, request):
+        names = [n for n in request.query_params.get("ingredients", "").split(",") if n.strip()]
+        try:
+            limit = max(min(int(request.query_params.get("limit", 10)), self.max_limit), 1)
+            page  = max(int(request.query_params.get("page", 1)), 1)
+        except ValueError:
+            return Response({"detail": "page and limit must be integers"}, status=400)
+
+        filtered = any(name in request.query_params for name in RecipeFilter.base_filters)
+        if filtered:
+            filterset = RecipeFilter(request.query_params, queryset=Recipe.objects.all())
+            if not filterset.is_valid():
+                raise ValidationError(filterset.errors)
+
+        index = pantry_index.get()
+        ids, unknown = index.resolve(names)
+        wanted = page * limit + 1
+        if filtered:
+            # one query over the best candidates, not one per window of them
+            ranked = index.rank(ids, max(self.max_candidates, wanted))
+            allowed = set(
+                filterset.qs.filter(pk__in=[r[0] for r in ranked]).values_list("pk", flat=True)
+            )
+            ranked = [r for r in ranked if r[0] in allowed]
+        else:
+            ranked = index.rank(ids, wanted)
+
+        rows = ranked[(page - 1) * limit:page * limit]
+        by_pk = {r.id: r for r in slim_rows(
+            Recipe.objects.filter(pk__in=[r[0] for r in rows]), "id")}
+        results = []
+        for pk, matched, missing in rows:
+            if pk not in by_pk:
+                continue                # deleted since the index was built
+            item, = slim_data([by_pk[pk]])
+            item.update(matched=matched, missing=missing)
+            results.append(item)
+        return Response({
+            "results": results,
+            "unknown": unknown,
+            "next": page + 1 if len(ranked) > page * limit else None,
+        })
+
+
+# ───── personalised feed ─────────────────
+class FeedView(APIView):
+    """
+    GET /api/feed/?limit=<n>
+
+    Recipes recommended from the caller's favourites and recent views via
+    item-item co-occurrence (feed.py). The ranked list is cached per user
+    and only recomputed after their favourites or views change.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    max_limit = FEED_SIZE
+
+    def get(self, request):
+        try:
+            limit = max(min(int(request.query_params.get("limit", 20)), self.max_limit), 1)
+        except ValueError:
+            return Response({"detail": "limit must be an integer"}, status=400)
+
+        ids = get_feed(request.user.id)
+        by_pk = {r.id: r for r in slim_rows(
+            exclude_allergens(Recipe.objects.filter(pk__in=ids), request), "id"
+        )}
+        rows = [by_pk[pk] for pk in ids if pk in by_pk][:limit]
+        return Response({"results": slim_data(rows)})
+
+
+class SearchCacheStatsView(APIView):
+    """GET /api/search/cache-stats/ – hit/miss counters for sizing the cache."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(search_cache.stats())